@@ -0,0 +1,187 @@
+"""Batch solving of many independent instances in one request.
+
+A task is built for one interactive run: it holds a slot in ``max_tasks``,
+streams every generation, and lives until its websocket session ends. Batch
+jobs suit offline work better. A job takes hundreds of instance configs,
+solves each one to completion in the worker pool and keeps only its final
+result::
+
+    {'index': 3, 'status': 'completed', 'best_fitness': 412.7, 'best_solution': [...],
+     'generations': 250, 'stop_reason': 'stagnation', 'seconds': 0.84}
+
+Results are streamed as NDJSON in completion order and can be polled by job
+ID. Instances go to the workers in chunks, so one round trip solves several of
+them. Within a worker process, instances of the same shape reuse the parent
+and offspring buffers of the previous one. Every chunk is one scheduler turn
+on one of the job's lanes, so batch jobs share slots fairly with interactive
+tasks.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+
+import numpy as np
+
+from .optimizer import GeneticOptimizer
+from .scheduler import Scheduler, scheduled
+
+logger = logging.getLogger(__name__)
+
+# default chunks per lane, enough to balance chunks of uneven length
+CHUNKS_PER_LANE = 4
+MAX_CHUNK = 16
+
+# buffer pairs a worker process keeps between instances, one per population shape
+_SPARE_LIMIT = 4
+_spare_buffers: 'OrderedDict[tuple, Tuple[np.ndarray, np.ndarray]]' = OrderedDict()
+
+
+def _shape_key(config: dict) -> tuple:
+    """What decides an instance's population shape and dtype."""
+    function = (config.get('parameters') or {}).get('function') or {}
+    return (config.get('problem_type'), config.get('population_size'), config.get('dimension'),
+            function.get('dtype'))
+
+
+def _solve(job_id: str, index: int, config: dict) -> dict:
+    """Run one instance to completion and return its final result."""
+    start = time.perf_counter()
+    try:
+        config = dict(config, task_id=f"{job_id}/{index}")
+        key = _shape_key(config)
+        # the optimizer checks the spare pair fits before taking it over
+        optimizer = GeneticOptimizer(config, buffers=_spare_buffers.pop(key, None))
+        while not optimizer.finished:
+            update_data = optimizer.step(config['task_id'])
+        _spare_buffers[key] = (optimizer._parents, optimizer._offspring)
+        while len(_spare_buffers) > _SPARE_LIMIT:
+            _spare_buffers.popitem(last=False)
+    except Exception as e:
+        logger.warning(f"Batch {job_id}: instance {index} failed: {e}")
+        return {'index': index, 'status': 'failed', 'error': str(e),
+                'seconds': time.perf_counter() - start}
+    return {
+        'index': index,
+        'status': 'completed',
+        'best_fitness': update_data['best_fitness'],
+        'best_solution': optimizer.best_solution.tolist(),
+        'generations': optimizer.generation,
+        'stop_reason': optimizer.stop_reason,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def _solve_chunk(job_id: str, chunk: List[Tuple[int, dict]]) -> List[dict]:
+    """Process-pool entry point: solve a chunk of (index, config) instances in order."""
+    return [_solve(job_id, index, config) for index, config in chunk]
+
+
+class BatchJob:
+    """Instances of one batch request and their results in completion order."""
+
+    def __init__(self, job_id: str, configs: List[dict], priority: int = 0,
+                 instances_per_chunk: Optional[int] = None):
+        self.job_id = job_id
+        self.configs = configs
+        self.priority = priority
+        self.instances_per_chunk = instances_per_chunk
+        self.status = 'queued'
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.results: List[dict] = []
+        self.failed = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def total(self) -> int:
+        return len(self.configs)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('completed', 'cancelled')
+
+    def _notify(self) -> None:
+        # waiters hold the old event; the next change needs a fresh one
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _add_results(self, results: List[dict]) -> None:
+        self.results.extend(results)
+        self.failed += sum(1 for result in results if result['status'] == 'failed')
+        self._notify()
+
+    def progress(self) -> dict:
+        end = self.finished_at or datetime.now(timezone.utc)
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'total': self.total,
+            'completed': len(self.results),
+            'failed': self.failed,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': None if self.finished_at is None else self.finished_at.isoformat(),
+            'elapsed_seconds': (end - self.created_at).total_seconds(),
+        }
+
+    def chunks(self, lanes: int) -> List[List[Tuple[int, dict]]]:
+        size = self.instances_per_chunk or max(1, min(MAX_CHUNK, math.ceil(self.total / (lanes * CHUNKS_PER_LANE))))
+        instances = list(enumerate(self.configs))
+        return [instances[start:start + size] for start in range(0, len(instances), size)]
+
+    async def run(self, executor, scheduler: Optional[Scheduler] = None) -> None:
+        """Solve every instance, one chunk per scheduler turn on up to ``scheduler.slots`` lanes."""
+        self.status = 'running'
+        lanes = scheduler.slots if scheduler is not None else 1
+        pending = asyncio.Queue()
+        for chunk in self.chunks(lanes):
+            pending.put_nowait(chunk)
+        lanes = min(lanes, pending.qsize())
+        lane_ids = [f"{self.job_id}/lane-{lane}" for lane in range(lanes)]
+        if scheduler is not None:
+            for lane_id in lane_ids:
+                scheduler.register(lane_id, self.priority)
+        try:
+            await asyncio.gather(*(self._run_lane(lane_id, pending, executor, scheduler) for lane_id in lane_ids))
+        finally:
+            if scheduler is not None:
+                for lane_id in lane_ids:
+                    scheduler.unregister(lane_id)
+            # instances left over when the server shut down are not run
+            self.status = 'completed' if len(self.results) == self.total else 'cancelled'
+            self.finished_at = datetime.now(timezone.utc)
+            self._notify()
+        logger.info(f"Batch {self.job_id} {self.status}: {self.total} instances, {self.failed} failed")
+
+    async def _run_lane(self, lane_id: str, pending: asyncio.Queue, executor, scheduler: Optional[Scheduler]) -> None:
+        loop = asyncio.get_running_loop()
+        while not pending.empty():
+            chunk = pending.get_nowait()
+            async with scheduled(scheduler, lane_id):
+                try:
+                    if executor is not None:
+                        results = await loop.run_in_executor(executor, _solve_chunk, self.job_id, chunk)
+                    else:
+                        results = _solve_chunk(self.job_id, chunk)
+                except Exception as e:
+                    # e.g. a worker process died; the rest of the job carries on
+                    results = [{'index': index, 'status': 'failed', 'error': str(e)} for index, _ in chunk]
+            self._add_results(results)
+            # let result streams and other tasks run between chunks
+            await asyncio.sleep(0)
+
+    async def stream(self, offset: int = 0) -> AsyncIterator[dict]:
+        """Results in completion order from ``offset``, following the job until it finishes."""
+        while True:
+            changed = self._changed
+            batch = self.results[offset:]
+            for result in batch:
+                yield result
+            offset += len(batch)
+            if not batch:
+                if self.finished:
+                    return
+                await changed.wait()
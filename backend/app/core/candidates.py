@@ -0,0 +1,122 @@
+"""Sparse candidate-edge representation for large TSP instances.
+
+A dense distance matrix takes O(n^2) memory, which is 80 GB at 100k cities.
+In large-instance mode the optimizer keeps only the coordinates and every
+city's k nearest neighbours, found through the spatial grid index, and
+computes distances when they are needed:
+
+    tour lengths    chunked vectorized sums over coordinates
+    local search    ``CoordinateDistances`` rows in place of matrix rows
+    crossover       EAX on the parents' edges, see eax.py
+    mutation        2-opt moves that add a candidate edge
+
+so memory stays O(n * k) and a generation costs about O(n) per individual.
+"""
+import math
+from typing import List, Optional
+
+import numpy as np
+
+from .spatial import GridIndex
+
+# dense distance matrices are only built up to this many cities
+DENSE_LIMIT = 2000
+
+# tour lengths are summed over at most this many cities at a time
+_CHUNK_CITIES = 1 << 20
+
+
+class _CoordinateRow:
+    __slots__ = ('xy', 'x', 'y')
+
+    def __init__(self, xy: List[List[float]], city: int):
+        self.xy = xy
+        self.x, self.y = xy[city]
+
+    def __getitem__(self, other: int) -> float:
+        x, y = self.xy[other]
+        return math.hypot(x - self.x, y - self.y)
+
+
+class CoordinateDistances:
+    """``distances[a][b]`` computed from coordinates, a stand-in for a dense list of rows."""
+
+    def __init__(self, cities: np.ndarray):
+        self.xy: List[List[float]] = np.asarray(cities, dtype=np.float64).tolist()
+
+    def __len__(self) -> int:
+        return len(self.xy)
+
+    def __getitem__(self, city: int) -> _CoordinateRow:
+        return _CoordinateRow(self.xy, city)
+
+    def __getstate__(self) -> dict:
+        # an array pickles far faster than n small lists
+        return {'cities': np.array(self.xy)}
+
+    def __setstate__(self, state: dict) -> None:
+        self.xy = state['cities'].tolist()
+
+
+class CandidateGraph:
+    """The k nearest neighbours of every city, nearest first, with on-demand distances."""
+
+    def __init__(self, cities: np.ndarray, k: int = 10, index: Optional[GridIndex] = None):
+        self.cities = np.asarray(cities, dtype=np.float64)
+        self.index = index if index is not None else GridIndex(self.cities)
+        self.neighbors = self.index.knn(k)
+        self.distances = CoordinateDistances(self.cities)
+        self._neighbor_lists: Optional[List[List[int]]] = None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # the index is only needed while seeding; list caches are rebuilt on demand
+        state['index'] = None
+        state['_neighbor_lists'] = None
+        return state
+
+    @property
+    def k(self) -> int:
+        return self.neighbors.shape[1]
+
+    @property
+    def neighbor_lists(self) -> List[List[int]]:
+        """Candidate lists as plain Python lists, for the per-city move loops."""
+        if self._neighbor_lists is None:
+            self._neighbor_lists = self.neighbors.tolist()
+        return self._neighbor_lists
+
+    def distance(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Elementwise distances between the cities in ``a`` and ``b``."""
+        return np.linalg.norm(self.cities[a] - self.cities[b], axis=-1)
+
+    def route_lengths(self, routes: np.ndarray) -> np.ndarray:
+        """Total closed-tour length for every route in a (n_routes, dimension) array."""
+        lengths = np.empty(len(routes))
+        rows = max(1, _CHUNK_CITIES // max(1, routes.shape[1]))
+        for start in range(0, len(routes), rows):
+            xy = self.cities[routes[start:start + rows]]
+            lengths[start:start + rows] = np.linalg.norm(xy - np.roll(xy, -1, axis=1), axis=2).sum(axis=1)
+        return lengths
+
+    def two_opt_mutation(self, route: np.ndarray, rng: np.random.Generator) -> float:
+        """Reverse the segment that makes a random city adjacent to one of its candidates, in place.
+
+        Returns the change in tour length.
+        """
+        n = len(route)
+        i = int(rng.integers(n))
+        city = route[i]
+        other = self.neighbors[city, rng.integers(self.k)]
+        j = int(np.flatnonzero(route == other)[0])
+        if i < j:
+            # reversing route[i+1..j] puts `other` right after `city`
+            a, b, c, e = city, route[i + 1], other, route[(j + 1) % n]
+            route[i + 1:j + 1] = route[i + 1:j + 1][::-1].copy()
+        else:
+            # reversing route[j..i-1] puts `other` right before `city`
+            a, b, c, e = route[j - 1], other, route[i - 1], city
+            route[j:i] = route[j:i][::-1].copy()
+        # edges a-b and c-e became a-c and b-e
+        d = self.distances
+        return d[a][c] + d[b][e] - d[a][b] - d[c][e]
@@ -0,0 +1,92 @@
+"""Periodic on-disk checkpoints of evolution state.
+
+A checkpoint is a single ``.npz`` file with the task's request config (JSON
+text) and whatever arrays the optimizer's ``checkpoint_arrays`` returns:
+population, generation, best solution and fitness, fitness history, and the
+random generator state. Loading a checkpoint rebuilds the optimizer from the
+config and continues the run bit for bit where it stopped. Files are written
+to a temporary name and renamed into place, so a crash mid-write never leaves
+a truncated checkpoint behind.
+"""
+import asyncio
+import json
+import logging
+import os
+import uuid
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_path(directory: str, task_id: str) -> str:
+    return os.path.join(directory, f'{task_id}.npz')
+
+
+def is_checkpoint_file(name: str) -> bool:
+    """Whether a file name is one ``Checkpointer`` writes: ``<uuid>.npz`` or its ``.tmp`` sibling."""
+    if name.endswith('.tmp'):
+        name = name[:-len('.tmp')]
+    if not name.endswith('.npz'):
+        return False
+    try:
+        uuid.UUID(name[:-len('.npz')])
+    except ValueError:
+        return False
+    return True
+
+
+def write_checkpoint(path: str, config: dict, arrays: Dict[str, np.ndarray]) -> None:
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as handle:
+        np.savez_compressed(handle, __version__=np.array(CHECKPOINT_VERSION),
+                            __config__=np.array(json.dumps(config)), **arrays)
+    os.replace(temporary, path)
+
+
+def read_checkpoint(path: str) -> Tuple[dict, Dict[str, np.ndarray]]:
+    with np.load(path, allow_pickle=False) as data:
+        version = int(data['__version__'])
+        if version != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {version} in {path}")
+        config = json.loads(str(data['__config__']))
+        arrays = {key: data[key] for key in data.files if not key.startswith('__')}
+    return config, arrays
+
+
+class Checkpointer:
+    """Writes an optimizer's checkpoint every ``interval`` generations, off the event loop."""
+
+    def __init__(self, path: str, config: dict, interval: int = 50):
+        self.path = path
+        self.config = config
+        self.interval = interval
+        self.saved_generation: Optional[int] = None
+
+    async def maybe_save(self, optimizer) -> None:
+        if optimizer.generation - (self.saved_generation or 0) >= self.interval:
+            await self.save(optimizer)
+
+    async def save(self, optimizer) -> None:
+        if optimizer.generation == self.saved_generation:
+            return
+        # copy now: the population buffers are reused by the next generation
+        arrays = optimizer.checkpoint_arrays()
+        self.saved_generation = optimizer.generation
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, write_checkpoint, self.path, self.config, arrays)
+        except OSError as e:
+            # a full or read-only disk should not stop the run itself
+            logger.warning(f"Checkpoint to {self.path} failed: {e}")
+            return
+        logger.debug(f"Checkpointed generation {optimizer.generation} to {self.path}")
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,168 @@
+"""Edge assembly crossover (EAX) for large TSP instances.
+
+Order crossover copies positions, so on large tours it mostly breaks good
+edges. EAX works on edges instead. It follows one AB-cycle, a cycle that
+alternates between edges only parent A has and edges only parent B has.
+Swapping that cycle's A edges for its B edges gives a set of subtours. These
+are merged back into one tour by the cheapest 2-opt style reconnection found
+among the candidate edges. The child keeps every edge of A outside the cycle.
+
+Only the cities on the AB-cycle and the merge points are visited one at a
+time; the remaining work is vectorized or a single pass over the tour.
+"""
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+from .candidates import CandidateGraph
+
+
+def _adjacency(tour: np.ndarray) -> np.ndarray:
+    """(n, 2) array of every city's predecessor and successor in ``tour``."""
+    adjacency = np.empty((len(tour), 2), dtype=np.int64)
+    adjacency[tour, 0] = np.roll(tour, 1)
+    adjacency[tour, 1] = np.roll(tour, -1)
+    return adjacency
+
+
+def _ab_cycle(start: int, adjacency_a: np.ndarray, adjacency_b: np.ndarray,
+              rng: np.random.Generator) -> List[Tuple[int, int, int]]:
+    """Edges (u, v, parent) of one AB-cycle through ``start``, parent 0 for A and 1 for B.
+
+    Every city has as many A-only edges as B-only edges, so the alternating
+    walk can always continue until it closes on a city it left by the other
+    parent's edge.
+    """
+    adjacencies = (adjacency_a, adjacency_b)
+    used = set()
+    path = [start]
+    # parent of the edge leaving path[i]
+    leaving: List[int] = []
+    visits = {start: [0]}
+    city, parent = start, 0
+    while True:
+        own = adjacencies[parent][city].tolist()
+        shared = adjacencies[1 - parent][city].tolist()
+        options = [other for other in own
+                   if other not in shared and (min(city, other), max(city, other), parent) not in used]
+        following = options[int(rng.integers(len(options)))] if len(options) > 1 else options[0]
+        used.add((min(city, following), max(city, following), parent))
+        leaving.append(parent)
+        path.append(following)
+        for i in reversed(visits.get(following, [])):
+            if leaving[i] != parent:
+                return [(path[j], path[j + 1], leaving[j]) for j in range(i, len(path) - 1)]
+        visits.setdefault(following, []).append(len(path) - 1)
+        city, parent = following, 1 - parent
+
+
+def _replace(links: List[int], old: int, new: int) -> None:
+    links[links.index(old)] = new
+
+
+def eax_crossover(parent_a: np.ndarray, parent_b: np.ndarray, graph: CandidateGraph,
+                  rng: np.random.Generator) -> Tuple[np.ndarray, float]:
+    """A child of ``parent_a`` that takes the B edges of one random AB-cycle.
+
+    Returns the child and its tour length minus that of ``parent_a``.
+    """
+    adjacency_a = _adjacency(parent_a)
+    adjacency_b = _adjacency(parent_b)
+    # cities with an edge of A that B lacks
+    a_only = ((adjacency_a[:, :, np.newaxis] != adjacency_b[:, np.newaxis, :]).all(axis=2)).any(axis=1)
+    starts = np.flatnonzero(a_only)
+    if starts.size == 0:
+        return parent_a.copy(), 0.0
+
+    cycle = _ab_cycle(int(rng.choice(starts)), adjacency_a, adjacency_b, rng)
+    xy = graph.distances.xy
+    delta = 0.0
+    links = adjacency_a.tolist()
+    for u, v, parent in cycle:
+        (ux, uy), (vx, vy) = xy[u], xy[v]
+        delta += math.hypot(ux - vx, uy - vy) * (1 if parent else -1)
+        if parent == 0:
+            _replace(links[u], v, -1)
+            _replace(links[v], u, -1)
+    for u, v, parent in cycle:
+        if parent == 1:
+            _replace(links[u], -1, v)
+            _replace(links[v], -1, u)
+
+    n = len(parent_a)
+    component = [-1] * n
+    members: List[List[int]] = []
+    for start in range(n):
+        if component[start] >= 0:
+            continue
+        label = len(members)
+        cities = []
+        previous, city = -1, start
+        while component[city] < 0:
+            component[city] = label
+            cities.append(city)
+            first, second = links[city]
+            previous, city = city, (second if first == previous else first)
+        members.append(cities)
+
+    neighbors = graph.neighbor_lists
+    alive = len(members)
+    while alive > 1:
+        smallest = min((cities for cities in members if cities), key=len)
+        label = component[smallest[0]]
+        best = None
+        for u in smallest:
+            options = [w for w in neighbors[u] if component[w] != label]
+            if options:
+                best = _best_reconnection(u, options, xy, links, best)
+        if best is None:
+            # every candidate of the subtour lies inside it, search all cities instead
+            outside = np.flatnonzero(np.array(component) != label)
+            for u in smallest:
+                gaps = np.linalg.norm(graph.cities[outside] - graph.cities[u], axis=1)
+                best = _best_reconnection(u, [int(outside[np.argmin(gaps)])], xy, links, best)
+        cost, u, u_next, w, w_next = best
+        delta += cost
+        # drop u-u_next and w-w_next, add u-w and u_next-w_next
+        _replace(links[u], u_next, w)
+        _replace(links[u_next], u, w_next)
+        _replace(links[w], w_next, u)
+        _replace(links[w_next], w, u_next)
+        target = component[w]
+        for city in smallest:
+            component[city] = target
+        members[target].extend(smallest)
+        members[label] = []
+        alive -= 1
+
+    child = [0] * n
+    previous, city = -1, 0
+    for position in range(n):
+        child[position] = city
+        first, second = links[city]
+        previous, city = city, (second if first == previous else first)
+    return np.array(child, dtype=parent_a.dtype), delta
+
+
+def _best_reconnection(u: int, options: List[int], xy: List[List[float]], links: List[List[int]], best):
+    """Cheapest way to join the subtour of ``u`` to one of ``options`` by exchanging one edge of each.
+
+    ``best`` is the cheapest (cost, u, u_next, w, w_next) found so far, or None.
+    """
+    ux, uy = xy[u]
+    ends = []
+    for u_next in links[u]:
+        x, y = xy[u_next]
+        ends.append((u_next, x, y, math.hypot(x - ux, y - uy)))
+    for w in options:
+        wx, wy = xy[w]
+        d_uw = math.hypot(wx - ux, wy - uy)
+        for w_next in links[w]:
+            x, y = xy[w_next]
+            d_w = math.hypot(x - wx, y - wy)
+            for u_next, nx, ny, d_u in ends:
+                cost = d_uw + math.hypot(x - nx, y - ny) - d_u - d_w
+                if best is None or cost < best[0]:
+                    best = (cost, u, u_next, w, w_next)
+    return best
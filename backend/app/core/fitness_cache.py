@@ -0,0 +1,71 @@
+"""Per-task fitness memoization keyed by a hash of each genome's bytes."""
+import hashlib
+from collections import OrderedDict
+from typing import List, Tuple
+
+import numpy as np
+
+
+def canonical_routes(routes: np.ndarray) -> np.ndarray:
+    """Rotate and orient closed tours so equivalent tours compare equal.
+
+    Every tour is rotated to start at city 0 and then reversed (keeping city 0
+    first) when that makes its second city smaller than its last one.
+    """
+    n_rows, dimension = routes.shape
+    start = np.argmax(routes == 0, axis=1)
+    offsets = (start[:, np.newaxis] + np.arange(dimension)) % dimension
+    canonical = np.take_along_axis(routes, offsets, axis=1)
+    if dimension > 2:
+        reverse = canonical[:, 1] > canonical[:, -1]
+        canonical[reverse, 1:] = canonical[reverse, :0:-1]
+    return canonical
+
+
+class FitnessCache:
+    """Bounded LRU map from genome hash to fitness, with hit/miss counters."""
+
+    def __init__(self, max_size: int = 4096, canonicalize_routes: bool = False):
+        self.max_size = max_size
+        self.canonicalize_routes = canonicalize_routes
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[bytes, float]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self, population: np.ndarray) -> List[bytes]:
+        genomes = canonical_routes(population) if self.canonicalize_routes else population
+        genomes = np.ascontiguousarray(genomes)
+        return [hashlib.blake2b(genome.tobytes(), digest_size=16).digest() for genome in genomes]
+
+    def lookup(self, keys: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+        """Cached fitness per key (NaN where missing) and the boolean mask of misses."""
+        fitness = np.full(len(keys), np.nan)
+        for i, key in enumerate(keys):
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                fitness[i] = value
+        missing = np.isnan(fitness)
+        n_missing = int(missing.sum())
+        self.misses += n_missing
+        self.hits += len(keys) - n_missing
+        return fitness, missing
+
+    def store(self, keys: List[bytes], fitness: np.ndarray) -> None:
+        for key, value in zip(keys, fitness.tolist()):
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
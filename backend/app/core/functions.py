@@ -0,0 +1,126 @@
+"""Real-valued function optimization.
+
+Genomes are rows of a float32 or float64 matrix. Every objective scores the
+whole population in one vectorized call, so high-dimensional problems run at
+NumPy speed. Objectives are minimized. Configured through
+``parameters['function']``::
+
+    {'objective': 'rastrigin', 'bounds': [-5.12, 5.12], 'dtype': 'float32',
+     'crossover': 'sbx', 'eta_c': 15, 'mutation': 'polynomial', 'eta_m': 20}
+
+Further objectives can be added with ``register_objective``.
+"""
+from typing import Callable, Dict, NamedTuple, Tuple
+
+import numpy as np
+
+from .operators import blend_crossover, gaussian_mutation, polynomial_mutation, sbx_crossover
+
+CROSSOVERS = ('sbx', 'blend')
+MUTATIONS = ('polynomial', 'gaussian')
+DTYPES = ('float32', 'float64')
+
+
+class Objective(NamedTuple):
+    function: Callable[[np.ndarray], np.ndarray]
+    bounds: Tuple[float, float]
+
+
+OBJECTIVES: Dict[str, Objective] = {}
+
+
+def register_objective(name: str, bounds: Tuple[float, float]):
+    """Decorator adding a function from a (n, dimension) array to n values to minimize."""
+    if not isinstance(name, str) or not name:
+        raise ValueError("Objective name must be a non-empty string")
+    if name in OBJECTIVES:
+        raise ValueError(f"Objective '{name}' is already registered")
+    try:
+        low, high = (float(bound) for bound in bounds)
+    except (TypeError, ValueError):
+        raise ValueError(f"Bounds of objective '{name}' must be a (low, high) pair of numbers") from None
+    if not low < high:
+        raise ValueError(f"Bounds of objective '{name}' must have low < high")
+
+    def register(function: Callable[[np.ndarray], np.ndarray]) -> Callable[[np.ndarray], np.ndarray]:
+        if not callable(function):
+            raise ValueError(f"Objective '{name}' must be callable")
+        OBJECTIVES[name] = Objective(function, (low, high))
+        return function
+    return register
+
+
+@register_objective('sphere', (-5.12, 5.12))
+def sphere(x: np.ndarray) -> np.ndarray:
+    return np.sum(x * x, axis=1)
+
+
+@register_objective('rastrigin', (-5.12, 5.12))
+def rastrigin(x: np.ndarray) -> np.ndarray:
+    return 10 * x.shape[1] + np.sum(x * x - 10 * np.cos(2 * np.pi * x), axis=1)
+
+
+@register_objective('rosenbrock', (-2.048, 2.048))
+def rosenbrock(x: np.ndarray) -> np.ndarray:
+    head, tail = x[:, :-1], x[:, 1:]
+    return np.sum(100 * (tail - head * head) ** 2 + (1 - head) ** 2, axis=1)
+
+
+@register_objective('ackley', (-32.768, 32.768))
+def ackley(x: np.ndarray) -> np.ndarray:
+    return (-20 * np.exp(-0.2 * np.sqrt(np.mean(x * x, axis=1)))
+            - np.exp(np.mean(np.cos(2 * np.pi * x), axis=1)) + 20 + np.e)
+
+
+@register_objective('griewank', (-600.0, 600.0))
+def griewank(x: np.ndarray) -> np.ndarray:
+    scale = np.sqrt(np.arange(1, x.shape[1] + 1, dtype=x.dtype))
+    return 1 + np.sum(x * x, axis=1) / 4000 - np.prod(np.cos(x / scale), axis=1)
+
+
+@register_objective('schwefel', (-500.0, 500.0))
+def schwefel(x: np.ndarray) -> np.ndarray:
+    return 418.9829 * x.shape[1] - np.sum(x * np.sin(np.sqrt(np.abs(x))), axis=1)
+
+
+class FunctionProblem:
+    """Objective, bounds and real-valued operators of one function-optimization task."""
+
+    def __init__(self, config: dict):
+        name = config.get('objective', 'sphere')
+        if name not in OBJECTIVES:
+            raise ValueError(f"Unknown objective '{name}', expected one of {sorted(OBJECTIVES)}")
+        self.objective = OBJECTIVES[name]
+        self.low, self.high = config.get('bounds', self.objective.bounds)
+        self.dtype = np.dtype(config.get('dtype', 'float64'))
+        self.crossover_operator = config.get('crossover', 'sbx')
+        self.mutation_operator = config.get('mutation', 'polynomial')
+        self.alpha = config.get('alpha', 0.5)
+        self.eta_c = config.get('eta_c', 15.0)
+        self.eta_m = config.get('eta_m', 20.0)
+        # Gaussian step as a fraction of the search range
+        self.sigma = config.get('sigma', 0.1)
+        # per-gene mutation probability inside a mutated individual, 1 / dimension by default
+        self.gene_rate = config.get('gene_rate')
+
+    def initialize(self, rng: np.random.Generator, size: int, dimension: int) -> np.ndarray:
+        return rng.uniform(self.low, self.high, size=(size, dimension)).astype(self.dtype)
+
+    def evaluate(self, genes: np.ndarray) -> np.ndarray:
+        """Objective value of every row, as float64."""
+        return self.objective.function(genes).astype(np.float64, copy=False)
+
+    def crossover(self, parents1: np.ndarray, parents2: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        if self.crossover_operator == 'blend':
+            children = blend_crossover(parents1, parents2, rng, self.alpha)
+        else:
+            children = sbx_crossover(parents1, parents2, rng, self.eta_c)
+        return np.clip(children, self.low, self.high)
+
+    def mutate(self, genes: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        rate = self.gene_rate if self.gene_rate is not None else 1 / genes.shape[1]
+        if self.mutation_operator == 'gaussian':
+            mutated = gaussian_mutation(genes, rng, self.sigma * (self.high - self.low), rate)
+        else:
+            mutated = polynomial_mutation(genes, rng, self.low, self.high, self.eta_m, rate)
+        return np.clip(mutated, self.low, self.high)
@@ -0,0 +1,149 @@
+"""Headless server-side scoring for the game playing agent.
+
+By default GPA fitness comes from the browser, which plays every action
+sequence out in the three.js platformer and sends back ``FITNESS_RESULTS``.
+With ``parameters['gpa_evaluator'] = {'mode': 'simulator'}`` the server plays
+the sequences itself, so a run needs no client and can use the process pool
+like TSP. The simulation follows the rules of ``PlatformerGame.tsx``:
+
+    - gravity, jump force and move speed per frame at a fixed frame rate
+    - the floor at y = -3 and walls at x = +-9
+    - landing only while falling, on the same platforms
+    - a jump key counts on the floor or on top of a platform, but the
+      player only lifts off from a platform
+    - a run ends on the golden platform, when its actions run out, or
+      when the next action is 'pause'
+    - score (y + 4) * 10, plus 100 for a win and 10 per distinct action;
+      an unknown action, or 'pause' as the very first action, scores -1000
+
+It differs from the browser where the browser depends on its frame timing:
+every frame is exactly ``1 / fps`` seconds, and each action lasts its own
+duration. Every individual of a population advances in lockstep, one NumPy
+pass per frame, and each finishes independently.
+"""
+import numpy as np
+
+from . import wire
+
+GRAVITY = 0.5
+JUMP_FORCE = 40.0
+MOVE_SPEED = 5.0
+FLOOR_Y = -3.0
+BOUND_X = 9.0
+WIN_BONUS = 100.0
+VARIETY_BONUS = 10.0
+INVALID_SCORE = -1000.0
+
+# x, y, width, height of every platform; the first one wins the game
+PLATFORMS = np.array([
+    [1, 8, 3, 1],
+    [0, -2, 5, 1],
+    [-3, 5, 2, 1],
+    [-5, 0, 3, 1],
+    [5, 0, 3, 1],
+    [0, 2, 2, 1],
+    [-7, 3, 2, 1],
+    [7, 3, 2, 1],
+], dtype=np.float64)
+
+LEFT, RIGHT, JUMP, PAUSE = (wire.ACTIONS.index(action) for action in ('left', 'right', 'jump', 'pause'))
+
+
+class PlatformerSimulator:
+    """Scores a whole GPA population in one batched simulation."""
+
+    def __init__(self, fps: float = 60.0):
+        self.dt = 1.0 / fps
+
+    def score(self, individuals: np.ndarray) -> np.ndarray:
+        """Fitness of every (action, duration) sequence in a (n, steps) structured array."""
+        n, steps = individuals.shape
+        codes = np.full((n, steps), -1, dtype=np.int64)
+        for code, action in enumerate(wire.ACTIONS):
+            codes[individuals['action'] == action] = code
+        ends = np.cumsum(individuals['duration'].astype(np.float64), axis=1)
+        variety = VARIETY_BONUS * sum((codes == code).any(axis=1) for code in range(-1, len(wire.ACTIONS)))
+
+        scores = np.full(n, INVALID_SCORE)
+        rows = np.arange(n)
+        x = np.zeros(n)
+        y = np.zeros(n)
+        vy = np.zeros(n)
+        airborne = np.ones(n, dtype=bool)
+        held = np.zeros((n, 3), dtype=bool)  # left, right and a pending jump
+        step = np.zeros(n, dtype=np.int64)
+        active = (codes >= 0).all(axis=1) & (codes[:, 0] != PAUSE)
+        self._press(np.flatnonzero(active), codes[active, 0], x, y, held)
+
+        px, py, half_width, half_height = PLATFORMS[:, 0], PLATFORMS[:, 1], PLATFORMS[:, 2] / 2, PLATFORMS[:, 3] / 2
+        frames = int(np.ceil(ends[:, -1].max() / self.dt)) + 2 if n else 0
+        for frame in range(1, frames + 1):
+            if not active.any():
+                break
+            # advance the action timeline first, like onTimeUpdate
+            due = np.flatnonzero(active & (frame * self.dt > ends[rows, step]))
+            if due.size:
+                last = step[due] == steps - 1
+                out_of_moves = due[last]
+                scores[out_of_moves] = (y[out_of_moves] + 4) * 10 + variety[out_of_moves]
+                active[out_of_moves] = False
+                moving = due[~last]
+                self._release(moving, codes[moving, step[moving]], held)
+                step[moving] += 1
+                following = codes[moving, step[moving]]
+                paused = moving[following == PAUSE]
+                scores[paused] = (y[paused] + 4) * 10 + variety[paused]
+                active[paused] = False
+                self._press(moving[following != PAUSE], following[following != PAUSE], x, y, held)
+
+            # physics for the individuals still playing
+            falling = vy <= 0
+            new_vy = vy - GRAVITY * airborne
+            vx = MOVE_SPEED * (held[:, 1].astype(np.float64) - held[:, 0])
+            jumps = held[:, 2] & ~airborne & active
+            new_vy[jumps] = JUMP_FORCE
+            held[jumps, 2] = False
+            new_x = np.clip(x + vx * self.dt, -BOUND_X, BOUND_X)
+            new_y = y + new_vy * self.dt
+            below = new_y < FLOOR_Y
+            new_y[below] = FLOOR_Y
+            new_vy[below] = 0.0
+
+            # unclamped x for landing, like the browser, which clamps after collisions
+            landing_x = x + vx * self.dt
+            hits = ((np.abs(landing_x[:, np.newaxis] - px) <= half_width)
+                    & (np.abs(new_y[:, np.newaxis] - 0.5 - py) <= half_height)
+                    & falling[:, np.newaxis])
+            landed = hits.any(axis=1)
+            platform = hits.argmax(axis=1)
+            new_y[landed] = py[platform[landed]] + half_height[platform[landed]] + 0.5
+            new_vy[landed] = 0.0
+
+            x = np.where(active, new_x, x)
+            y = np.where(active, new_y, y)
+            vy = np.where(active, new_vy, vy)
+            # the floor does not count as ground here, only platforms do
+            airborne = np.where(active, ~landed, airborne)
+
+            won = np.flatnonzero(active & landed & (platform == 0))
+            scores[won] = (y[won] + 4) * 10 + WIN_BONUS + variety[won]
+            active[won] = False
+
+        # sequences still playing at the last frame end where they are
+        scores[active] = (y[active] + 4) * 10 + variety[active]
+        return scores
+
+    @staticmethod
+    def _press(rows: np.ndarray, codes: np.ndarray, x: np.ndarray, y: np.ndarray, held: np.ndarray) -> None:
+        held[rows[codes == LEFT], 0] = True
+        held[rows[codes == RIGHT], 1] = True
+        jumping = rows[codes == JUMP]
+        # the jump key only registers on the floor or on top of a platform
+        on_platform = ((np.abs(x[jumping, np.newaxis] - PLATFORMS[:, 0]) < PLATFORMS[:, 2] / 2)
+                       & (np.abs(y[jumping, np.newaxis] - 0.5 - (PLATFORMS[:, 1] + 0.5)) < 0.1)).any(axis=1)
+        held[jumping[(y[jumping] <= FLOOR_Y) | on_platform], 2] = True
+
+    @staticmethod
+    def _release(rows: np.ndarray, codes: np.ndarray, held: np.ndarray) -> None:
+        held[rows[codes == LEFT], 0] = False
+        held[rows[codes == RIGHT], 1] = False
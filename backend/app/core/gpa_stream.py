@@ -0,0 +1,118 @@
+"""Streaming GPA evaluation: batches of individuals correlated by request ID.
+
+Server to client, one message per batch::
+
+    {"type": "EVALUATE_BATCH", "taskId": ..., "generation": 3,
+     "requestId": "<task>:3:0", "offset": 0, "population": [[{action, duration}, ...], ...]}
+
+Client to server, either a whole batch or one individual at a time::
+
+    {"type": "FITNESS_RESULTS", "taskId": ..., "requestId": ..., "scores": [...]}
+    {"type": "FITNESS_RESULT", "taskId": ..., "requestId": ..., "index": 2, "score": 41.5}
+
+``index`` is relative to the batch. Individuals still unscored when their
+batch times out get the penalty fitness, so one straggler never fails the
+whole generation.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingEvaluation:
+    """Tracks one generation's GPA evaluation while its batches are in flight."""
+
+    def __init__(self, task_id: str, generation: int, n_individuals: int, batch_size: int = 10,
+                 max_in_flight: int = 4, timeout: float = 30.0, penalty: float = -1000.0):
+        self.task_id = task_id
+        self.generation = generation
+        self.batch_size = max(1, batch_size)
+        self.max_in_flight = max(1, max_in_flight)
+        self.timeout = timeout
+        self.penalty = penalty
+        self.scores = np.full(n_individuals, np.nan)
+        # individuals whose score is the timeout penalty rather than a real result
+        self.penalized = np.zeros(n_individuals, dtype=bool)
+        self.timed_out = 0
+        self._batches: Dict[str, Tuple[int, int]] = {}
+        self._progress = asyncio.Event()
+        self._error: Optional[BaseException] = None
+
+    def request_id(self, batch_index: int) -> str:
+        return f"{self.task_id}:{self.generation}:{batch_index}"
+
+    def set_scores(self, request_id: str, scores: Optional[List[float]] = None,
+                   index: Optional[int] = None, score: Optional[float] = None) -> bool:
+        """Record results for a batch, or for one individual when ``index`` is given."""
+        if request_id not in self._batches:
+            logger.warning(f"Task {self.task_id}: Ignoring results for unknown or expired request {request_id}.")
+            return False
+        start, stop = self._batches[request_id]
+        if index is not None:
+            if not 0 <= index < stop - start:
+                logger.warning(f"Task {self.task_id}: Result index {index} out of range for request {request_id}.")
+                return False
+            self.scores[start + index] = score
+        else:
+            if scores is None or len(scores) != stop - start:
+                logger.warning(f"Task {self.task_id}: Expected {stop - start} scores for request {request_id}.")
+                return False
+            self.scores[start:stop] = scores
+        self._progress.set()
+        return True
+
+    def fail(self, error: BaseException) -> None:
+        """Abort the evaluation, e.g. when the client connection is lost."""
+        self._error = error
+        self._progress.set()
+
+    async def run(self, n_individuals: int, send_batch: Callable[[str, int, int], Awaitable[None]]) -> np.ndarray:
+        """Send batches through ``send_batch(request_id, start, stop)`` and collect their scores."""
+        loop = asyncio.get_running_loop()
+        queue = deque(range(0, n_individuals, self.batch_size))
+        in_flight: Dict[str, float] = {}
+        batch_index = 0
+
+        while queue or in_flight:
+            while queue and len(in_flight) < self.max_in_flight:
+                start = queue.popleft()
+                stop = min(start + self.batch_size, n_individuals)
+                request_id = self.request_id(batch_index)
+                batch_index += 1
+                self._batches[request_id] = (start, stop)
+                in_flight[request_id] = loop.time() + self.timeout
+                await send_batch(request_id, start, stop)
+
+            wait = max(0.0, min(in_flight.values()) - loop.time())
+            try:
+                await asyncio.wait_for(self._progress.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+            self._progress.clear()
+            if self._error is not None:
+                raise self._error
+
+            now = loop.time()
+            for request_id, deadline in list(in_flight.items()):
+                start, stop = self._batches[request_id]
+                missing = np.isnan(self.scores[start:stop])
+                if not missing.any():
+                    del in_flight[request_id]
+                elif now >= deadline:
+                    self.scores[start:stop][missing] = self.penalty
+                    self.penalized[start:stop] = missing
+                    self.timed_out += int(missing.sum())
+                    logger.warning(f"Task {self.task_id}: {int(missing.sum())} individuals of request "
+                                   f"{request_id} timed out and were penalized.")
+                    del in_flight[request_id]
+                else:
+                    continue
+                # late results for a finished batch are ignored
+                del self._batches[request_id]
+
+        return self.scores
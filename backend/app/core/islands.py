@@ -0,0 +1,249 @@
+import numpy as np
+from typing import Dict, List, Optional
+import asyncio
+import json
+import logging
+import time
+
+from .checkpoint import Checkpointer
+from .metrics import TaskMetrics
+from .results import TaskResults
+from .optimizer import MINIMIZED_PROBLEMS, GeneticOptimizer
+from .scheduler import Scheduler, scheduled
+from .stopping import StoppingCriteria
+from .throttle import UpdatePublisher
+
+logger = logging.getLogger(__name__)
+
+TOPOLOGIES = ('ring', 'fully_connected')
+
+
+class IslandModel:
+    """Island-model GA: several GeneticOptimizers evolving side by side.
+
+    Every island is a full population of ``population_size`` individuals with
+    its own random stream. Islands run ``migration_interval`` generations at a
+    time (in separate worker processes when an executor is given), then the
+    top ``migration_size`` individuals of each island replace the worst
+    individuals of its neighbours. Configured through
+    ``parameters['islands']``::
+
+        {'count': 4, 'migration_interval': 10, 'migration_size': 2, 'topology': 'ring'}
+    """
+
+    # islands never wait on a browser, GPA is not supported
+    needs_client = False
+
+    def __init__(self, config: dict):
+        island_config = dict((config.get('parameters') or {}).get('islands') or {})
+        self.problem_type = config.get('problem_type', 'tsp')
+        self.minimize = self.problem_type in MINIMIZED_PROBLEMS
+        if self.problem_type == 'GPA':
+            raise ValueError("Island model is not supported for GPA, which is evaluated by the frontend")
+
+        self.count = island_config.get('count', 4)
+        self.migration_interval = island_config.get('migration_interval', 10)
+        self.migration_size = island_config.get('migration_size', 2)
+        self.topology = island_config.get('topology', 'ring')
+        if self.topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown island topology '{self.topology}', expected one of {TOPOLOGIES}")
+        if self.migration_interval < 1:
+            raise ValueError("Island migration_interval must be at least 1")
+        if self.migration_size < 0:
+            raise ValueError("Island migration_size must not be negative")
+
+        self.max_generations = config.get('max_generations', 100)
+        self.task_id = config.get('task_id', -1)
+        # island phase timings are folded in here after every epoch
+        self.metrics = TaskMetrics()
+        # set by the TaskManager when checkpoints are enabled
+        self.checkpointer: Optional[Checkpointer] = None
+        updates_config = (config.get('parameters') or {}).get('updates') or {}
+        self.update_mode = updates_config.get('mode', 'throttled')
+        self.update_rate = updates_config.get('max_rate', 10.0)
+        # stop criteria apply to the merged updates, checked once per epoch
+        stopping_config = (config.get('parameters') or {}).get('stopping')
+        self.stopping: Optional[StoppingCriteria] = None
+        if stopping_config is not None:
+            self.stopping = StoppingCriteria(stopping_config, minimize=self.minimize)
+        self.stop_reason: Optional[str] = None
+
+        # independent, reproducible random streams per island
+        seeds = np.random.SeedSequence(config.get('seed')).spawn(self.count)
+        self.islands: List[GeneticOptimizer] = []
+        for seed in seeds:
+            island_config_copy = dict(config)
+            island_config_copy['seed'] = seed
+            island_config_copy['parameters'] = {key: value for key, value in (config.get('parameters') or {}).items()
+                                                if key != 'stopping'}
+            self.islands.append(GeneticOptimizer(island_config_copy))
+
+        logger.info(f"IslandModel initialized with {self.count} islands ({self.topology} topology)")
+
+    @property
+    def generation(self) -> int:
+        return self.islands[0].generation
+
+    @property
+    def best_fitness(self) -> float:
+        return max(island.best_fitness for island in self.islands)
+
+    @property
+    def best_solution(self) -> Optional[np.ndarray]:
+        return max(self.islands, key=lambda island: island.best_fitness).best_solution
+
+    @property
+    def finished(self) -> bool:
+        return self.stop_reason is not None or self.generation >= self.max_generations
+
+    def warm_start(self, elites: np.ndarray) -> None:
+        # spread the elites so every island starts from some of them
+        for index, island in enumerate(self.islands):
+            island.warm_start(elites[index::self.count])
+
+    def elites(self, count: int) -> np.ndarray:
+        ranked = sorted(self.islands, key=lambda island: island.best_fitness, reverse=True)
+        per_island = -(-count // self.count)
+        return np.concatenate([island.elites(per_island) for island in ranked])[:count]
+
+    def checkpoint_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {}
+        for index, island in enumerate(self.islands):
+            arrays.update(island.checkpoint_arrays(prefix=f'island{index}_'))
+        if self.stopping is not None:
+            arrays['stopping_state'] = np.array(json.dumps(self.stopping.state()))
+        return arrays
+
+    def restore_arrays(self, arrays: Dict[str, np.ndarray]) -> None:
+        for index, island in enumerate(self.islands):
+            island.restore_arrays(arrays, prefix=f'island{index}_')
+        if self.stopping is not None and 'stopping_state' in arrays:
+            self.stopping.load(json.loads(str(arrays['stopping_state'])))
+
+    def _check_stopping(self, merged: List[dict], seconds: float) -> None:
+        """Apply the stop criteria to an epoch's merged updates; a stop takes effect after the epoch."""
+        reason = None
+        if self.stopping is not None:
+            for update_data in merged:
+                reason = reason or self.stopping.observe(update_data['best_fitness'], update_data['population_diversity'],
+                                                         seconds / len(merged))
+            if reason == 'stagnation':
+                action = self.stopping.escape()
+                if action is not None:
+                    logger.info(f"Task {self.task_id}: islands stagnated at generation {self.generation}, {action}")
+                    for island in self.islands:
+                        island._diversify(action, self.stopping.hypermutation_rounds)
+                    reason = None
+        if reason is None and self.generation >= self.max_generations:
+            reason = 'max_generations'
+        if reason is not None:
+            self.stop_reason = reason
+            merged[-1]['stop_reason'] = reason
+
+    def _neighbours(self, index: int) -> List[int]:
+        if self.topology == 'ring':
+            return [(index - 1) % self.count] if self.count > 1 else []
+        return [other for other in range(self.count) if other != index]
+
+    def _migrate(self) -> None:
+        """Replace each island's worst individuals with its neighbours' best."""
+        fitness = [island._compute_fitness() for island in self.islands]
+        best = [np.argsort(island_fitness)[::-1][:self.migration_size] for island_fitness in fitness]
+        emigrants = [island.population[top].copy() for island, top in zip(self.islands, best)]
+        emigrant_fitness = [island_fitness[top] for island_fitness, top in zip(fitness, best)]
+
+        for index, island in enumerate(self.islands):
+            neighbours = self._neighbours(index)
+            if not neighbours:
+                continue
+            immigrants = np.concatenate([emigrants[other] for other in neighbours])
+            # never let migrants take over more than half of an island
+            immigrants = immigrants[:island.population_size // 2]
+            worst = np.argsort(fitness[index])[:len(immigrants)]
+            island.population[worst] = immigrants
+            if island.tour_lengths is not None:
+                # migrants bring their tour lengths along
+                immigrant_fitness = np.concatenate([emigrant_fitness[other] for other in neighbours])
+                island.tour_lengths[worst] = -immigrant_fitness[:len(immigrants)]
+
+    def _merge_updates(self, task_id: str, island_updates: List[List[dict]]) -> List[dict]:
+        """Combine the per-island updates of each generation into one update."""
+        # TSP and function optimization report values to minimize
+        pick_best = min if self.minimize else max
+        merged = []
+        for generation_updates in zip(*island_updates):
+            best = pick_best(generation_updates, key=lambda update: update['best_fitness'])
+            merged.append({
+                'task_id': task_id,
+                'generation': best['generation'],
+                'best_fitness': best['best_fitness'],
+                'best_solution': best['best_solution'],
+                'average_fitness': float(np.mean([update['average_fitness'] for update in generation_updates])),
+                'population_diversity': float(np.mean([update['population_diversity'] for update in generation_updates])),
+                'islands': self.count,
+                'status': 'running'
+            })
+        return merged
+
+    async def _run_epoch(self, task_id: str, n_generations: int, executor, scheduler: Optional[Scheduler] = None) -> List[List[dict]]:
+        # in the pool every island occupies a worker, so the epoch costs one slot per island
+        async with scheduled(scheduler, task_id, cost=self.count if executor is not None else 1):
+            if executor is None:
+                island_updates = [[island.step(task_id) for _ in range(n_generations)] for island in self.islands]
+            else:
+                results = await asyncio.gather(*(
+                    island.run_in_worker(task_id, n_generations, executor) for island in self.islands
+                ))
+                island_updates = []
+                for island, (state, updates) in zip(self.islands, results):
+                    island.set_state(state)
+                    island_updates.append(updates)
+
+        for island in self.islands:
+            self.metrics.merge(island.metrics)
+            island.metrics = TaskMetrics()
+        return island_updates
+
+    async def evolve(self, task_id: str, update_callback, close_callback, wait_for_frontend_callback, websocket=None, executor=None,
+                     scheduler: Optional[Scheduler] = None, results: Optional[TaskResults] = None) -> None:
+        """Same contract as GeneticOptimizer.evolve, with one merged update per generation."""
+        if results is not None:
+            publisher = results
+        else:
+            publisher = UpdatePublisher(update_callback, mode=self.update_mode, max_rate=self.update_rate, metrics=self.metrics)
+        try:
+            pending = None
+            while not self.finished or pending is not None:
+                merged = []
+                if pending is not None:
+                    merged = self._merge_updates(task_id, await pending)
+                    self._check_stopping(merged, time.perf_counter() - epoch_start)
+                    if not self.finished:
+                        self._migrate()
+
+                # start the next epoch before streaming the last one
+                pending = None
+                if not self.finished:
+                    n_generations = min(self.migration_interval, self.max_generations - self.generation)
+                    epoch_start = time.perf_counter()
+                    pending = asyncio.ensure_future(self._run_epoch(task_id, n_generations, executor, scheduler))
+
+                for update_data in merged:
+                    publisher.publish(update_data)
+                if merged and self.checkpointer is not None:
+                    await self.checkpointer.maybe_save(self)
+                if pending is not None and executor is None:
+                    # let the update sender run before the next in-loop epoch
+                    await asyncio.sleep(0)
+            await publisher.close()
+            await close_callback()
+        except Exception as e:
+            logger.error(f"Error in island generation {self.generation}: {str(e)}")
+            if pending is not None:
+                # an epoch in flight would overwrite the islands of a resumed run
+                pending.cancel()
+            if self.checkpointer is not None:
+                await self.checkpointer.save(self)
+            raise
+
+        logger.info(f"Island evolution completed for task {task_id}: {self.stop_reason}")
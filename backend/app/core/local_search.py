@@ -0,0 +1,176 @@
+"""2-opt and Or-opt tour improvement for the memetic TSP stage.
+
+Moves are scored by delta distance only, in O(1) per candidate, and
+candidates come from each city's k nearest neighbours, so whole tours are
+never rescored. Plain Python lists are used inside the move loops because
+indexing them is much cheaper than indexing NumPy arrays one element at a
+time. Distances are read through one memoryview per matrix row, which is
+as cheap as a list but shares the matrix's memory instead of copying it.
+"""
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .candidates import CandidateGraph
+
+# improvements smaller than this are treated as float noise
+EPSILON = 1e-9
+
+
+def matrix_rows(distance_matrix: np.ndarray) -> List[memoryview]:
+    """``rows[a][b]`` access to a dense matrix, returning Python floats without copying it."""
+    return [memoryview(row) for row in np.ascontiguousarray(distance_matrix, dtype=np.float64)]
+
+
+def nearest_neighbors(distance_matrix: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k closest other cities for every city, nearest first."""
+    k = min(k, distance_matrix.shape[0] - 1)
+    order = np.argsort(distance_matrix, axis=1, kind='stable')
+    # drop each city itself, which is always at distance zero
+    order = order[order != np.arange(distance_matrix.shape[0])[:, np.newaxis]]
+    return order.reshape(distance_matrix.shape[0], -1)[:, :k]
+
+
+class LocalSearch:
+    """Improves single tours under a wall-clock budget."""
+
+    def __init__(self, distance_matrix: Optional[np.ndarray], neighbors: int = 8, max_segment: int = 3,
+                 two_opt: bool = True, or_opt: bool = True, candidates: Optional[CandidateGraph] = None):
+        self.distance_matrix = distance_matrix
+        if candidates is not None:
+            # large instances have no matrix; rows compute distances from coordinates
+            self.distances = candidates.distances
+            self.neighbors: List[List[int]] = candidates.neighbors[:, :neighbors].tolist()
+        else:
+            self.distances = matrix_rows(distance_matrix)
+            self.neighbors = nearest_neighbors(distance_matrix, neighbors).tolist()
+        self.max_segment = max_segment
+        self.use_two_opt = two_opt
+        self.use_or_opt = or_opt
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        if self.distance_matrix is not None:
+            # memoryviews do not pickle; they are rebuilt over the matrix on the other side
+            del state['distances']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        if self.distance_matrix is not None:
+            self.distances = matrix_rows(self.distance_matrix)
+
+    def improve(self, tour: np.ndarray, deadline: float) -> Tuple[np.ndarray, float]:
+        """Apply 2-opt and Or-opt moves until no move improves or the deadline passes.
+
+        Returns the improved tour and the change in its length, the sum of the
+        applied move deltas, so the caller need not rescore it.
+        """
+        route = tour.tolist()
+        if len(route) < 5:
+            return tour, 0.0
+        total = 0.0
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            gain = 0.0
+            if self.use_two_opt:
+                gain += self._two_opt_pass(route, deadline)
+            if self.use_or_opt:
+                gain += self._or_opt_pass(route, deadline)
+            improved = gain < 0
+            total += gain
+        return np.array(route, dtype=tour.dtype), total
+
+    def _two_opt_pass(self, route: List[int], deadline: float) -> float:
+        d = self.distances
+        n = len(route)
+        position = [0] * n
+        for index, city in enumerate(route):
+            position[city] = index
+
+        total = 0.0
+        for i in range(n):
+            if time.perf_counter() >= deadline:
+                break
+            a = route[i]
+            b = route[(i + 1) % n]
+            d_ab = d[a][b]
+            for c in self.neighbors[a]:
+                d_ac = d[a][c]
+                # neighbours are sorted, so no later c can shorten edge a-b
+                if d_ac >= d_ab:
+                    break
+                j = position[c]
+                e = route[(j + 1) % n]
+                if c == b or e == a:
+                    continue
+                delta = d_ac + d[b][e] - d_ab - d[c][e]
+                if delta < -EPSILON:
+                    # replace edges a-b and c-e with a-c and b-e by reversing b..c
+                    if i < j:
+                        route[i + 1:j + 1] = route[i + 1:j + 1][::-1]
+                    else:
+                        route[j + 1:i + 1] = route[j + 1:i + 1][::-1]
+                    for index in range(n):
+                        position[route[index]] = index
+                    total += delta
+                    # route[i] may now be another city, whose neighbours are a different list
+                    break
+        return total
+
+    def _or_opt_pass(self, route: List[int], deadline: float) -> float:
+        d = self.distances
+        n = len(route)
+        position = [0] * n
+        for index, city in enumerate(route):
+            position[city] = index
+
+        total = 0.0
+        for length in range(1, self.max_segment + 1):
+            i = 0
+            while i < n:
+                if time.perf_counter() >= deadline:
+                    return total
+                # segment route[i:i + length], wrapping is skipped for simplicity
+                if i + length > n:
+                    break
+                first = route[i]
+                last = route[i + length - 1]
+                prev = route[i - 1]
+                nxt = route[(i + length) % n]
+                if nxt == first or prev == last:
+                    i += 1
+                    continue
+                removal_gain = d[prev][first] + d[last][nxt] - d[prev][nxt]
+                segment = set(route[i:i + length])
+
+                best_move = None
+                best_delta = -EPSILON
+                for end, other_end in ((first, last), (last, first)):
+                    for c in self.neighbors[end]:
+                        if c in segment:
+                            continue
+                        # insert between c and its successor, with `end` next to c
+                        c_next = route[(position[c] + 1) % n]
+                        if c_next in segment:
+                            continue
+                        delta = d[c][end] + d[other_end][c_next] - d[c][c_next] - removal_gain
+                        if delta < best_delta:
+                            best_delta = delta
+                            best_move = (c, end == last)
+
+                if best_move is not None:
+                    c, reverse = best_move
+                    moved = route[i:i + length]
+                    if reverse:
+                        moved.reverse()
+                    del route[i:i + length]
+                    insert_at = route.index(c) + 1
+                    route[insert_at:insert_at] = moved
+                    for index, city in enumerate(route):
+                        position[city] = index
+                    total += best_delta
+                else:
+                    i += 1
+        return total
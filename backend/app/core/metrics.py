@@ -0,0 +1,153 @@
+"""Lightweight per-task metrics rendered in the Prometheus text format.
+
+No client library is needed: histograms are fixed-bucket counters that are
+cheap to update on the hot path, pickle with the optimizer into worker
+processes, and merge back into the parent process.
+"""
+import asyncio
+import bisect
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# seconds, from sub-millisecond kernels up to slow browser round trips
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PHASES = ('evaluate', 'select', 'crossover', 'mutate', 'local_search', 'send', 'queue_wait')
+
+
+class Histogram:
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: 'Histogram') -> None:
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        separator = ',' if labels else ''
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {self.count}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {self.sum}')
+        lines.append(f'{name}_count{suffix} {self.count}')
+        return lines
+
+
+class TaskMetrics:
+    """Counters and phase histograms for one optimization task."""
+
+    def __init__(self):
+        self.generation = Histogram()
+        self.phases: Dict[str, Histogram] = {phase: Histogram() for phase in PHASES}
+        self.generations = 0
+        # distinct updates that reached at least one client, however many are watching
+        self.updates_sent = 0
+        self._last_sent_generation = -1
+        # deliveries and coalesced updates summed over every viewer
+        self.viewer_updates_sent = 0
+        self.updates_coalesced = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.rescored = 0
+        self.delta_scored = 0
+
+    def observe_phase(self, phase: str, seconds: float) -> None:
+        self.phases[phase].observe(seconds)
+
+    def observe_generation(self, seconds: float) -> None:
+        self.generation.observe(seconds)
+        self.generations += 1
+
+    def observe_send(self, generation: int) -> None:
+        """Count a delivery to one viewer; the task's update counts once, for the first viewer."""
+        self.viewer_updates_sent += 1
+        if generation > self._last_sent_generation:
+            self._last_sent_generation = generation
+            self.updates_sent += 1
+
+    def merge(self, other: 'TaskMetrics') -> None:
+        self.generation.merge(other.generation)
+        for phase, histogram in other.phases.items():
+            self.phases[phase].merge(histogram)
+        self.generations += other.generations
+        self.updates_sent += other.updates_sent
+        self._last_sent_generation = max(self._last_sent_generation, other._last_sent_generation)
+        self.viewer_updates_sent += other.viewer_updates_sent
+        self.updates_coalesced += other.updates_coalesced
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+        self.rescored += other.rescored
+        self.delta_scored += other.delta_scored
+
+
+def _help(name: str, kind: str, text: str) -> List[str]:
+    return [f'# HELP {name} {text}', f'# TYPE {name} {kind}']
+
+
+def render_prometheus(tasks: Iterable[Tuple[str, TaskMetrics]], gauges: Dict[str, float],
+                      loop_lag: Optional[Histogram] = None, counters: Optional[Dict[str, float]] = None) -> str:
+    """Render every task's metrics plus the server-wide gauges and counters."""
+    tasks = list(tasks)
+    lines: List[str] = []
+
+    for name, value in gauges.items():
+        lines += _help(name, 'gauge', name.replace('_', ' '))
+        lines.append(f'{name} {value}')
+
+    for name, value in (counters or {}).items():
+        lines += _help(name, 'counter', name.replace('_', ' '))
+        lines.append(f'{name} {value}')
+
+    if loop_lag is not None:
+        lines += _help('ga_event_loop_lag_seconds', 'histogram', 'Delay of the event loop behind its schedule')
+        lines += loop_lag.render('ga_event_loop_lag_seconds', '')
+
+    task_counters = (
+        ('ga_generations_total', 'Generations completed', 'generations'),
+        ('ga_updates_sent_total', 'Updates delivered to at least one client', 'updates_sent'),
+        ('ga_viewer_updates_sent_total', 'Updates delivered, summed over every viewer', 'viewer_updates_sent'),
+        ('ga_updates_coalesced_total', 'Updates replaced or filtered before sending, summed over every viewer',
+         'updates_coalesced'),
+        ('ga_fitness_cache_hits_total', 'Fitness cache hits', 'cache_hits'),
+        ('ga_fitness_cache_misses_total', 'Fitness cache misses', 'cache_misses'),
+        ('ga_fitness_rescored_total', 'TSP tours scored from scratch', 'rescored'),
+        ('ga_fitness_delta_scored_total', 'TSP tours scored from their parent length and edit', 'delta_scored'),
+    )
+    for name, text, attribute in task_counters:
+        lines += _help(name, 'counter', text)
+        for task_id, metrics in tasks:
+            lines.append(f'{name}{{task_id="{task_id}"}} {getattr(metrics, attribute)}')
+
+    lines += _help('ga_generation_seconds', 'histogram', 'Wall time per generation')
+    for task_id, metrics in tasks:
+        lines += metrics.generation.render('ga_generation_seconds', f'task_id="{task_id}"')
+
+    lines += _help('ga_phase_seconds', 'histogram', 'Wall time per generation phase; send is websocket send latency, queue_wait time waiting for a scheduler slot')
+    for task_id, metrics in tasks:
+        for phase, histogram in metrics.phases.items():
+            lines += histogram.render('ga_phase_seconds', f'task_id="{task_id}",phase="{phase}"')
+
+    return '\n'.join(lines) + '\n'
+
+
+async def monitor_event_loop_lag(histogram: Histogram, interval: float = 0.5) -> None:
+    """Record how late the loop wakes up from a fixed sleep, forever."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        histogram.observe(max(0.0, loop.time() - start - interval))
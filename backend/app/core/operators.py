@@ -0,0 +1,86 @@
+"""Batched genetic operators.
+
+Every function here works on a whole generation at once: parents are
+(population_size, dimension) arrays and each row is one individual.
+"""
+import numpy as np
+
+
+def random_cut_points(rng: np.random.Generator, n_rows: int, dimension: int) -> np.ndarray:
+    """Draw two distinct sorted cut points per row, shape (n_rows, 2)."""
+    first = rng.integers(0, dimension, size=n_rows)
+    # offset in [1, dimension) guarantees the second point differs from the first
+    second = (first + rng.integers(1, dimension, size=n_rows)) % dimension
+    return np.sort(np.stack([first, second], axis=1), axis=1)
+
+
+def segment_mask(cut_points: np.ndarray, dimension: int) -> np.ndarray:
+    """Boolean mask that is True inside [point1, point2) for every row."""
+    positions = np.arange(dimension)
+    return (positions >= cut_points[:, :1]) & (positions < cut_points[:, 1:])
+
+
+def order_crossover(parents1: np.ndarray, parents2: np.ndarray, cut_points: np.ndarray) -> np.ndarray:
+    """Order crossover (OX) for permutation genomes.
+
+    Each child keeps parent1's genes inside its [point1, point2) segment and
+    fills the remaining positions, left to right, with parent2's genes in the
+    order they appear in parent2, skipping genes already in the segment.
+    """
+    n_rows, dimension = parents1.shape
+    rows = np.arange(n_rows)[:, np.newaxis]
+    in_segment = segment_mask(cut_points, dimension)
+
+    # position of every gene inside parent1, so membership in the copied
+    # segment can be looked up per gene of parent2
+    gene_position = np.empty_like(parents1)
+    gene_position[rows, parents1] = np.arange(dimension, dtype=parents1.dtype)
+    from_parent2 = ~in_segment[rows, gene_position[rows, parents2]]
+
+    # stable sorts move the kept parent2 genes and the free child positions to
+    # the front of each row while preserving their order
+    fill_genes = np.take_along_axis(parents2, np.argsort(~from_parent2, axis=1, kind='stable'), axis=1)
+    fill_positions = np.argsort(in_segment, axis=1, kind='stable')
+    n_free = dimension - in_segment.sum(axis=1)
+    valid = np.arange(dimension) < n_free[:, np.newaxis]
+
+    offspring = parents1.copy()
+    offspring[np.broadcast_to(rows, valid.shape)[valid], fill_positions[valid]] = fill_genes[valid]
+    return offspring
+
+
+def two_point_crossover(parents1: np.ndarray, parents2: np.ndarray, cut_points: np.ndarray) -> np.ndarray:
+    """Copy parent1 inside [point1, point2) and parent2 everywhere else."""
+    in_segment = segment_mask(cut_points, parents1.shape[1])
+    return np.where(in_segment, parents1, parents2)
+
+
+def blend_crossover(parents1: np.ndarray, parents2: np.ndarray, rng: np.random.Generator,
+                    alpha: float = 0.5) -> np.ndarray:
+    """BLX-alpha: every gene uniform on its parents' interval widened by ``alpha`` on both sides."""
+    weights = rng.uniform(-alpha, 1 + alpha, size=parents1.shape).astype(parents1.dtype, copy=False)
+    return parents1 + weights * (parents2 - parents1)
+
+
+def sbx_crossover(parents1: np.ndarray, parents2: np.ndarray, rng: np.random.Generator,
+                  eta: float = 15.0) -> np.ndarray:
+    """Simulated binary crossover; larger ``eta`` keeps children closer to parent1."""
+    u = rng.random(parents1.shape)
+    beta = np.where(u <= 0.5, (2 * u) ** (1 / (eta + 1)), (1 / (2 * (1 - u))) ** (1 / (eta + 1)))
+    beta = beta.astype(parents1.dtype, copy=False)
+    return 0.5 * ((1 + beta) * parents1 + (1 - beta) * parents2)
+
+
+def gaussian_mutation(genes: np.ndarray, rng: np.random.Generator, sigma: float, rate: float) -> np.ndarray:
+    """Add N(0, sigma) noise to each gene with probability ``rate``."""
+    noise = rng.normal(0, sigma, size=genes.shape) * (rng.random(genes.shape) < rate)
+    return genes + noise.astype(genes.dtype, copy=False)
+
+
+def polynomial_mutation(genes: np.ndarray, rng: np.random.Generator, low: float, high: float,
+                        eta: float = 20.0, rate: float = 0.1) -> np.ndarray:
+    """Polynomial mutation of each gene with probability ``rate``, scaled to the ``[low, high]`` range."""
+    u = rng.random(genes.shape)
+    delta = np.where(u < 0.5, (2 * u) ** (1 / (eta + 1)) - 1, 1 - (2 * (1 - u)) ** (1 / (eta + 1)))
+    delta *= (high - low) * (rng.random(genes.shape) < rate)
+    return genes + delta.astype(genes.dtype, copy=False)
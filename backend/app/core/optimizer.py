@@ -1,30 +1,117 @@
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import asyncio
+import json
 import logging
+import time
+import uuid
+from collections import OrderedDict
+
+from .candidates import DENSE_LIMIT, CandidateGraph
+from .checkpoint import Checkpointer
+from .eax import eax_crossover
+from .fitness_cache import FitnessCache
+from .functions import FunctionProblem
+from .gpa_simulator import PlatformerSimulator
+from .gpa_stream import StreamingEvaluation
+from .local_search import LocalSearch
+from .metrics import TaskMetrics
+from .results import TaskResults
+from .scheduler import Scheduler, scheduled
+from .seeding import SEEDING_METHODS, seed_tours
+from .stopping import StoppingCriteria
+from .throttle import UpdatePublisher
+from . import wire
+from .operators import order_crossover, random_cut_points, two_point_crossover
 
 logger = logging.getLogger(__name__)
 
+# per-generation progress is logged at debug level, one generation in this many
+LOG_EVERY = 50
+
+# optimizers a pool worker keeps between chunks, enough for the largest island model
+WORKER_CACHE_SIZE = 64
+
+def route_dtype(dimension: int) -> np.dtype:
+    """Smallest integer type that can hold every city index of a tour."""
+    return np.dtype(np.int16) if dimension <= np.iinfo(np.int16).max else np.dtype(np.int32)
+
 '''PROBLEM TYPES'''
 # TSP - Traveling salesman problem
 # GPA - Game playing agent
-# Only other option for problem is function optimization
+# function_optimization - real-valued objective, see functions.py
+
+# problem types that report a value to minimize, a tour length or an objective
+# value; fitness itself is always maximized, as the negated value
+MINIMIZED_PROBLEMS = ('tsp', 'function_optimization')
 
 class GeneticOptimizer:
-    def __init__(self, config: dict):
-        self.population_size = min(100, config.get('population_size', 50))
+    def __init__(self, config: dict, buffers: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        self.population_size = config.get('population_size', 50)
         self.mutation_rate = config.get('mutation_rate', 0.1)
         self.crossover_rate = config.get('crossover_rate', 0.8)
         self.problem_type = config.get('problem_type', 'tsp')
         self.dimension = config.get('dimension', 20)
         self.generation = 0
+        # identifies this optimizer's copy in the pool workers, see _run_generations
+        self.worker_key = uuid.uuid4().hex
+        # single random generator per task so a seeded run is reproducible
+        self.rng = np.random.default_rng(config.get('seed'))
+        self.minimize = self.problem_type in MINIMIZED_PROBLEMS
+        self.function: Optional[FunctionProblem] = None
+        if self.problem_type == 'function_optimization':
+            self.function = FunctionProblem((config.get('parameters') or {}).get('function') or {})
         self.population = self._initialize_population()
+        self._allocate_buffers(buffers)
         self.best_solution = None
         self.best_fitness = float('-inf')
+        # best fitness after every generation, kept in checkpoints
+        self.fitness_history: List[float] = []
         self.max_generations = config.get('max_generations', 100)
+        # optional early stopping, see stopping.py
+        stopping_config = (config.get('parameters') or {}).get('stopping')
+        self.stopping: Optional[StoppingCriteria] = None
+        if stopping_config is not None:
+            self.stopping = StoppingCriteria(stopping_config, minimize=self.minimize)
+        # why the run ended, set with its final update
+        self.stop_reason: Optional[str] = None
         self.task_id = config.get('task_id', -1)
+        # generations computed per round trip when running in a process pool
+        self.generations_per_chunk = config.get('generations_per_chunk', 10)
 
         self._gpa_fitness_values_store: Dict[str, asyncio.Future] = {}
+        self.metrics = TaskMetrics()
+        # set by the TaskManager when checkpoints are enabled
+        self.checkpointer: Optional[Checkpointer] = None
+        # GPA scoring on the server instead of in the browser, see gpa_simulator.py
+        evaluator_config = (config.get('parameters') or {}).get('gpa_evaluator') or {}
+        self.gpa_simulator: Optional[PlatformerSimulator] = None
+        if self.problem_type == 'GPA' and evaluator_config.get('mode', 'client') == 'simulator':
+            self.gpa_simulator = PlatformerSimulator(fps=evaluator_config.get('fps', 60.0))
+        # opt-in batched GPA protocol, see gpa_stream.py
+        self.gpa_stream_config = (config.get('parameters') or {}).get('gpa_stream')
+        self._gpa_stream: Optional[StreamingEvaluation] = None
+        # 'binary' when the client negotiated wire.SUBPROTOCOL
+        self.wire_format = 'json'
+        # how updates reach the client, see throttle.py; a client can
+        # override the rate with ?fps= when it connects
+        updates_config = (config.get('parameters') or {}).get('updates') or {}
+        self.update_mode = updates_config.get('mode', 'throttled')
+        self.update_rate = updates_config.get('max_rate', 10.0)
+
+        # memoized fitness per genome; 0 disables the cache. It is on by default
+        # only for GPA, where a miss costs a browser round trip; vectorized TSP
+        # scoring is cheaper than hashing the genomes
+        cache_size = config.get('fitness_cache_size', 4096 if self.problem_type == 'GPA' else 0)
+        self.fitness_cache = None
+        if cache_size > 0:
+            # TSP tours are equal under rotation and reversal
+            self.fitness_cache = FitnessCache(cache_size, canonicalize_routes=self.problem_type == 'tsp')
+        # without a cache, TSP offspring inherit their parent's tour length and
+        # the length change of the edits applied to them; NaN rows are rescored
+        self.tour_lengths: Optional[np.ndarray] = None
+        if self.problem_type == 'tsp' and self.fitness_cache is None:
+            self.tour_lengths = np.full(self.population_size, np.nan)
 
         if self.problem_type == 'tsp':
             # Generate dummy cities if not provided
@@ -34,6 +121,36 @@ class GeneticOptimizer:
                 self.cities = np.array(config.get('parameters', {}).get('cities', 
                     [[i, i] for i in range(self.dimension)]))
             logger.info(f"Cities array shape: {self.cities.shape}")
+            # large instances keep k-nearest-neighbour candidate edges instead
+            # of the O(n^2) distance matrix, see candidates.py
+            # an empty object enables a feature with its defaults, like in the blocks below
+            large_instance_config = (config.get('parameters') or {}).get('large_instance')
+            self.candidates: Optional[CandidateGraph] = None
+            if large_instance_config is not None or self.dimension > DENSE_LIMIT:
+                start = time.perf_counter()
+                self.candidates = CandidateGraph(self.cities, (large_instance_config or {}).get('neighbors', 10))
+                self.distance_matrix = None
+                logger.info(f"Built candidate graph in {time.perf_counter() - start:.3f}s")
+            else:
+                self.distance_matrix = self._build_distance_matrix()
+            seeding_config = (config.get('parameters') or {}).get('seeding')
+            if seeding_config is not None:
+                self._seed_population(seeding_config)
+
+        # optional memetic stage: 2-opt / Or-opt on the elite every generation
+        self.local_search = None
+        local_search_config = (config.get('parameters') or {}).get('local_search')
+        if local_search_config is not None and self.problem_type == 'tsp':
+            self.local_search_elite = local_search_config.get('elite', 2)
+            self.local_search_budget = local_search_config.get('time_budget', 0.01)
+            self.local_search = LocalSearch(
+                self.distance_matrix,
+                candidates=self.candidates,
+                neighbors=local_search_config.get('neighbors', 8),
+                max_segment=local_search_config.get('max_segment', 3),
+                two_opt=local_search_config.get('two_opt', True),
+                or_opt=local_search_config.get('or_opt', True),
+            )
         elif self.problem_type == 'GPA':
             # Move dimensions are always the same for now
             # self.moves = np.array([[i, i] for i in range(self.dimension)])
@@ -49,252 +166,382 @@ class GeneticOptimizer:
         population: np.ndarray
         # For TSP create permutations of city indices
         if (self.problem_type == 'tsp'):
-            population = np.zeros((self.population_size, self.dimension))
-            for i in range(self.population_size):
-                population[i] = np.random.permutation(self.dimension)
+            population = np.tile(np.arange(self.dimension, dtype=route_dtype(self.dimension)), (self.population_size, 1))
+            population = self.rng.permuted(population, axis=1)
         elif (self.problem_type == 'GPA'):
             # Game Playing Agent
             population = self.create_game_population(self.population_size)
+        else:
+            population = self.function.initialize(self.rng, self.population_size, self.dimension)
         return population
 
+    def _seed_population(self, seeding_config: dict) -> None:
+        """Replace part of the random TSP population with heuristic tours, see seeding.py."""
+        count = min(self.population_size, max(1, round(seeding_config.get('fraction', 0.2) * self.population_size)))
+        start = time.perf_counter()
+        tours = seed_tours(self.cities, count, self.rng,
+                           methods=tuple(seeding_config.get('methods', SEEDING_METHODS)),
+                           noise=seeding_config.get('noise', 0.1),
+                           neighbors=seeding_config.get('neighbors', 8),
+                           index=None if self.candidates is None else self.candidates.index)
+        # the rest stays random for diversity
+        self.population[:count] = tours
+        logger.info(f"Seeded {count} tours in {time.perf_counter() - start:.3f}s")
+
+    def warm_start(self, elites: np.ndarray) -> None:
+        """Replace the start of the population with individuals of an earlier identical run."""
+        count = min(len(elites), self.population_size)
+        self.population[:count] = elites[:count]
+        if self.tour_lengths is not None:
+            self.tour_lengths[:count] = np.nan
+
+    def elites(self, count: int) -> np.ndarray:
+        """The best solution so far followed by the fittest individuals of the current population."""
+        fitness = self._compute_fitness()
+        rows = self.population[np.argsort(fitness)[::-1][:count]]
+        if self.best_solution is None:
+            return rows.copy()
+        return np.concatenate([self.best_solution[np.newaxis], rows[:count - 1]])
+
+    def _allocate_buffers(self, buffers: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> None:
+        """Preallocate the parent and offspring arrays reused by every generation.
+
+        ``buffers`` is the (parents, offspring) pair of a finished run, taken
+        over instead when it fits this population.
+        """
+        if buffers is not None:
+            parents, offspring = buffers
+            if offspring.shape == self.population.shape and offspring.dtype == self.population.dtype:
+                self._parents, self._offspring = parents, offspring
+                return
+        self._parents = np.empty((2,) + self.population.shape, dtype=self.population.dtype)
+        self._offspring = np.empty_like(self.population)
+
     # create a randomized population for the game playing agent
     # takes the form of [['left', .4]['right', 1]['jump', .7]['pause', 1.5]]
     def create_game_population(self, population_size):
         action_duration_dtype = np.dtype([('action', 'U5'), ('duration', 'f8')])
         population = np.empty((self.population_size, self.dimension), dtype=action_duration_dtype)
         possible_actions = np.array(['left', 'right', 'jump'])# 'pause'])
-        for i in range(self.population_size):
-            actions = np.random.choice(possible_actions, size=self.dimension)
-            durations = np.random.uniform(0.25, 2.0, size=self.dimension)
-            population[i]['action'] = actions
-            population[i]['duration'] = durations
+        population['action'] = self.rng.choice(possible_actions, size=(self.population_size, self.dimension))
+        population['duration'] = self.rng.uniform(0.25, 2.0, size=(self.population_size, self.dimension))
 
         return population
     
+    def _build_distance_matrix(self) -> np.ndarray:
+        """Precompute the pairwise Euclidean distances between all cities."""
+        cities = self.cities.astype(float)
+        deltas = cities[:, np.newaxis, :] - cities[np.newaxis, :, :]
+        return np.sqrt(np.sum(deltas ** 2, axis=-1))
+
     def _calculate_distance(self, city1_idx: int, city2_idx: int) -> float:
         """Calculate Euclidean distance between two cities."""
-        city1 = self.cities[city1_idx]
-        city2 = self.cities[city2_idx]
-        return np.sqrt(np.sum((city1 - city2) ** 2))
+        return self.distance_matrix[city1_idx, city2_idx]
+
+    def _distances(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Elementwise distances between the cities in ``a`` and ``b``."""
+        if self.candidates is not None:
+            return self.candidates.distance(a, b)
+        return self.distance_matrix[a, b]
+
+    def _edge_lengths(self, routes: np.ndarray, rows: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """Lengths of the edges leaving positions ``edges[i]`` of ``routes[rows[i]]``."""
+        rows = rows[:, np.newaxis]
+        return self._distances(routes[rows, edges], routes[rows, (edges + 1) % self.dimension])
+
+    def _route_lengths(self, routes: np.ndarray) -> np.ndarray:
+        """Total closed-tour length for every route in a (n_routes, dimension) array."""
+        if self.candidates is not None:
+            return self.candidates.route_lengths(routes)
+        next_cities = np.roll(routes, -1, axis=1)
+        return self.distance_matrix[routes, next_cities].sum(axis=1)
     
+    @property
+    def needs_client(self) -> bool:
+        """Whether fitness comes from a connected browser, so the run waits for one."""
+        return self.problem_type == 'GPA' and self.gpa_simulator is None
+
     async def _evaluate_population(self,wait_for_frontend_callback, websocket) -> np.ndarray:
-        if self.problem_type == "GPA":
-            task_id = self.task_id
-            logger.debug(f"Task {task_id}: Evaluating GPA population via WebSocket.")
-            if websocket is None:
-                logger.error(f"Task {task_id}: WebSocket not available for GPA evaluation.")
-                raise ValueError("WebSocket connection is not available for GPA evaluation.")
-
-            population_data_for_frontend = []
-            for i in range(self.population_size):
-                individual_sequence = []
-                for step in range(self.dimension): # self.dimension is sequence_length for GPA
-                    action = self.population[i, step]['action']
-                    duration = self.population[i, step]['duration']
-                    individual_sequence.append({'action': action, 'duration': round(duration, 3)})
-                population_data_for_frontend.append(individual_sequence)
-            
-            payload = {
-                "type": "EVALUATE_POPULATION",
-                "population": population_data_for_frontend,
-                "generation": self.generation,
-                "taskId":task_id
-            }
-            
-            logger.info(f"Sending population to frontend for evaluation (generation {self.generation}).")
-            await websocket.send_json(payload) # send data of new population back to frontend
-
-            # Prepare a Future to wait for the fitness results for this specific task and generation
-            # The WebSocket message handler (elsewhere in your server) will set the result of this Future.
-            # This is a simplified mechanism. A more robust system might use a dedicated message queue or event bus.
-            fitness_future = asyncio.get_event_loop().create_future()
-            # Store this future so the WebSocket message handler can find it
-            # A key combining task_id and generation might be better for concurrent requests
-            self._gpa_fitness_values_store[task_id] = fitness_future 
-                                                    # In a real app, you'd have a more robust way to correlate
-                                                    # requests and responses, perhaps using unique message IDs.
-
-            try:
-                # Wait for the fitness scores from the frontend (with a timeout)
-                logger.info(f"Task {task_id}: Waiting for fitness results from frontend...")
-
-                # TODO:  this seems like a bad way to await the front end, or at least redundant
-                await wait_for_frontend_callback()
-                fitness_values_list = await asyncio.wait_for(fitness_future, timeout=120.0) # 2 minutes timeout
-                logger.debug(f"Task {task_id}: Received fitness values via Future: {fitness_values_list}")
-            except asyncio.TimeoutError:
-                logger.error(f"Task {task_id}: Timeout waiting for fitness results from frontend.")
-                # Handle timeout: e.g., assign very low fitness, or stop the task
-                raise TimeoutError(f"Task {task_id}: Frontend fitness evaluation timed out.")
-            finally:
-                self._gpa_fitness_values_store.pop(task_id, None) # Clean up
-
-            fitness = np.array(fitness_values_list, dtype=float)
-            if fitness.shape[0] != self.population_size:
-                logger.error(f"Task {task_id}: Fitness values count ({fitness.shape[0]}) mismatch population size ({self.population_size}).")
-                raise ValueError("Mismatch between received fitness values and population size.")
+        if self.needs_client:
+            # only individuals the cache has not seen are sent to the frontend
+            keys, fitness, to_score = self._cache_lookup()
+            if to_score.size:
+                scores, valid = await self._evaluate_gpa(self.population[to_score], wait_for_frontend_callback, websocket)
+                fitness = self._cache_fill(keys, fitness, to_score, scores, cacheable=valid)
             return fitness
 
+        return self._compute_fitness()
 
+    def _gpa_population_payload(self, individuals: np.ndarray) -> List[List[dict]]:
+        population_data_for_frontend = []
+        for i in range(len(individuals)):
+            individual_sequence = []
+            for step in range(self.dimension): # self.dimension is sequence_length for GPA
+                action = individuals[i, step]['action']
+                duration = individuals[i, step]['duration']
+                individual_sequence.append({'action': action, 'duration': round(duration, 3)})
+            population_data_for_frontend.append(individual_sequence)
+        return population_data_for_frontend
 
+    async def _send_population(self, websocket, message_type: str, individuals: np.ndarray,
+                               request_id: Optional[str] = None, offset: int = 0) -> None:
+        if self.wire_format == 'binary':
+            await websocket.send_bytes(wire.encode_population(
+                self.task_id, self.generation, individuals, offset=offset, request_id=request_id or ''))
+            return
 
-        fitness = np.zeros(self.population_size)
+        payload = {
+            "type": message_type,
+            "population": self._gpa_population_payload(individuals),
+            "generation": self.generation,
+            "taskId": self.task_id
+        }
+        if request_id is not None:
+            payload["requestId"] = request_id
+            payload["offset"] = offset
+        await websocket.send_json(payload)
 
-        for i in range(self.population_size):
-            # calculations for distance and routes don't make much sense at the moment
-            # should be something like sqrt(x^2 + y^2) where x is x distance between cities and likewise for y
-            if self.problem_type == 'tsp':
-                # For TSP, calculate total distance (negative as we maximize fitness)
-                route = self.population[i].astype(int)
-                distance = 0
-                for j in range(self.dimension):
-                    city1_idx = route[j]
-                    city2_idx = route[(j + 1) % self.dimension]
-                    distance += self._calculate_distance(city1_idx, city2_idx)
-                fitness[i] = -distance  # Negative because we maximize fitness
-            else:
-                # function optimization uses a test function 
-                x = self.population[i]
-                fitness[i] = -np.sum(x**2)
+    async def _evaluate_gpa(self, individuals: np.ndarray, wait_for_frontend_callback, websocket) -> Tuple[np.ndarray, np.ndarray]:
+        """Have the frontend play out each action sequence.
+
+        Returns the scores and a mask of the ones that are real results (not timeout penalties).
+        """
+        task_id = self.task_id
+        logger.debug(f"Task {task_id}: Evaluating GPA population via WebSocket.")
+        if websocket is None:
+            logger.error(f"Task {task_id}: WebSocket not available for GPA evaluation.")
+            raise ValueError("WebSocket connection is not available for GPA evaluation.")
+
+        if self.gpa_stream_config:
+            return await self._evaluate_gpa_streaming(individuals, wait_for_frontend_callback, websocket)
+
+        logger.debug(f"Sending population to frontend for evaluation (generation {self.generation}).")
+        await self._send_population(websocket, "EVALUATE_POPULATION", individuals) # send data of new population back to frontend
+
+        # Prepare a Future to wait for the fitness results for this specific task and generation
+        # The WebSocket message handler (elsewhere in your server) will set the result of this Future.
+        # This is a simplified mechanism. A more robust system might use a dedicated message queue or event bus.
+        fitness_future = asyncio.get_event_loop().create_future()
+        # Store this future so the WebSocket message handler can find it
+        # A key combining task_id and generation might be better for concurrent requests
+        self._gpa_fitness_values_store[task_id] = fitness_future 
+                                                # In a real app, you'd have a more robust way to correlate
+                                                # requests and responses, perhaps using unique message IDs.
+
+        try:
+            # Wait for the fitness scores from the frontend (with a timeout)
+            logger.debug(f"Task {task_id}: Waiting for fitness results from frontend...")
+
+            # TODO:  this seems like a bad way to await the front end, or at least redundant
+            await wait_for_frontend_callback()
+            fitness_values_list = await asyncio.wait_for(fitness_future, timeout=120.0) # 2 minutes timeout
+            logger.debug(f"Task {task_id}: Received fitness values via Future: {fitness_values_list}")
+        except asyncio.TimeoutError:
+            logger.error(f"Task {task_id}: Timeout waiting for fitness results from frontend.")
+            # Handle timeout: e.g., assign very low fitness, or stop the task
+            raise TimeoutError(f"Task {task_id}: Frontend fitness evaluation timed out.")
+        finally:
+            self._gpa_fitness_values_store.pop(task_id, None) # Clean up
+
+        fitness = np.array(fitness_values_list, dtype=float)
+        if fitness.shape[0] != len(individuals):
+            logger.error(f"Task {task_id}: Fitness values count ({fitness.shape[0]}) mismatch population size ({len(individuals)}).")
+            raise ValueError("Mismatch between received fitness values and population size.")
+        return fitness, np.ones(len(fitness), dtype=bool)
+
+    def _compute_fitness(self) -> np.ndarray:
+        """Score the population for the problem types that are evaluated on the server."""
+        if self.tour_lengths is not None:
+            stale = np.flatnonzero(np.isnan(self.tour_lengths))
+            if stale.size:
+                self.tour_lengths[stale] = self._route_lengths(self.population[stale])
+            self.metrics.rescored += stale.size
+            self.metrics.delta_scored += self.population_size - stale.size
+            return -self.tour_lengths
+        if self.fitness_cache is None:
+            return self._score(self.population)
+        keys, fitness, to_score = self._cache_lookup()
+        if to_score.size:
+            fitness = self._cache_fill(keys, fitness, to_score, self._score(self.population[to_score]))
         return fitness
+
+    def _score(self, individuals: np.ndarray) -> np.ndarray:
+        if self.problem_type == 'tsp':
+            # For TSP, use the total route distance (negative as we maximize fitness)
+            return -self._route_lengths(individuals)
+        if self.problem_type == 'GPA':
+            return self.gpa_simulator.score(individuals)
+
+        # function optimization minimizes its objective
+        return -self.function.evaluate(individuals)
     
+    def _cache_lookup(self) -> Tuple[Optional[List[bytes]], np.ndarray, np.ndarray]:
+        """Cache keys, known fitness (NaN where unknown) and the rows that still need scoring.
+
+        Identical genomes within a generation are scored once.
+        """
+        if self.fitness_cache is None:
+            return None, np.full(self.population_size, np.nan), np.arange(self.population_size)
+        keys = self.fitness_cache.keys(self.population)
+        fitness, missing = self.fitness_cache.lookup(keys)
+        n_missing = int(missing.sum())
+        self.metrics.cache_misses += n_missing
+        self.metrics.cache_hits += len(keys) - n_missing
+        first_seen: Dict[bytes, int] = {}
+        for i in np.flatnonzero(missing):
+            first_seen.setdefault(keys[i], i)
+        return keys, fitness, np.fromiter(first_seen.values(), dtype=int, count=len(first_seen))
+
+    def _cache_fill(self, keys: Optional[List[bytes]], fitness: np.ndarray, to_score: np.ndarray,
+                    scores: np.ndarray, cacheable: Optional[np.ndarray] = None) -> np.ndarray:
+        fitness[to_score] = scores
+        if keys is None:
+            return fitness
+        scored_keys = [keys[i] for i in to_score]
+        if cacheable is None:
+            self.fitness_cache.store(scored_keys, scores)
+        else:
+            self.fitness_cache.store([key for key, ok in zip(scored_keys, cacheable) if ok], scores[cacheable])
+        duplicates = np.flatnonzero(np.isnan(fitness))
+        if duplicates.size:
+            by_key = dict(zip(scored_keys, scores.tolist()))
+            fitness[duplicates] = [by_key[keys[i]] for i in duplicates]
+        return fitness
+
+    async def _evaluate_gpa_streaming(self, individuals: np.ndarray, wait_for_frontend_callback, websocket) -> Tuple[np.ndarray, np.ndarray]:
+        """Stream the individuals in request-ID-correlated batches and collect scores as they arrive."""
+        task_id = self.task_id
+        stream = StreamingEvaluation(task_id, self.generation, len(individuals), **self.gpa_stream_config)
+
+        async def send_batch(request_id: str, start: int, stop: int) -> None:
+            await self._send_population(websocket, "EVALUATE_BATCH", individuals[start:stop],
+                                        request_id=request_id, offset=start)
+
+        async def receive_results() -> None:
+            # results arrive through set_gpa_fitness_results while this keeps reading
+            while True:
+                await wait_for_frontend_callback()
+
+        def on_receiver_done(receiver: asyncio.Future) -> None:
+            if not receiver.cancelled() and receiver.exception() is not None:
+                stream.fail(receiver.exception())
+
+        self._gpa_stream = stream
+        receiver = asyncio.ensure_future(receive_results())
+        receiver.add_done_callback(on_receiver_done)
+        try:
+            scores = await stream.run(len(individuals), send_batch)
+        finally:
+            self._gpa_stream = None
+            receiver.cancel()
+        if stream.timed_out:
+            logger.warning(f"Task {task_id}: {stream.timed_out} individuals penalized in generation {self.generation}.")
+        return scores, ~stream.penalized
+
     # Called when fitness results are received from the frontend.
-    def set_gpa_fitness_results(self, fitness_scores: List[float]):
+    def set_gpa_fitness_results(self, fitness_scores: Optional[List[float]], request_id: Optional[str] = None,
+                                index: Optional[int] = None, score: Optional[float] = None):
         task_id = self.task_id
+        if request_id is not None:
+            if self._gpa_stream is None:
+                logger.warning(f"Task {task_id}: Received results for request {request_id}, but no streaming evaluation is running. Ignoring.")
+            else:
+                self._gpa_stream.set_scores(request_id, fitness_scores, index=index, score=score)
+            return
         if task_id in self._gpa_fitness_values_store:
             future = self._gpa_fitness_values_store[task_id]
             if not future.done():
                 future.set_result(fitness_scores)
-                logger.info(f"Task {task_id}: Fitness results set for future.")
+                logger.debug(f"Task {task_id}: Fitness results set for future.")
             else:
                 logger.warning(f"Task {task_id}: Received fitness results, but future was already done.")
         else:
             logger.warning(f"Task {task_id}: Received fitness results, but no pending future found. Ignoring.")
 
     def _select_parents(self, fitness: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
-        # select parents using tournament selection
+        # select parents using tournament selection, one tournament per row
+        # for both parents at once
         tournament_size = 5
-        parent1_idx = np.zeros(self.population_size, dtype=int)
-        parent2_idx = np.zeros(self.population_size, dtype=int)
-
-        for i in range(self.population_size):
-            #tournament for parent one
-            canidates = np.random.choice(self.population_size, tournament_size)
-            #canidates = list(range(self.population_size))
-            parent1_idx[i] = canidates[np.argmax(fitness[canidates])]
-            #logger.info(self.population[parent1_idx[i]] )
-
-            #tournament for parent two
-            canidates = np.random.choice(self.population_size, tournament_size)
-            #canidates = list(range(self.population_size))
-            parent2_idx[i] = canidates[np.argmax(fitness[canidates])]
-        # same = True
-        
-        # test_lst = self.population[parent1_idx][0]
-        # for lst in self.population[parent1_idx]:
-        #     fail = False
-        #     for k in range(len(lst)):
-        #         if (test_lst[k] != lst[k]):
-        #             same = False
-        #             logger.info(f"mismatch: {test_lst} != {lst}")
-        #             break
-        #     if fail:
-        #         break
-        # if same:
-        #     logger.info("all match")
-        logger.info(f"self.population[parent1_idx].shape {self.population[parent1_idx].shape}")
-        return self.population[parent1_idx], self.population[parent2_idx]
+        candidates = self.rng.integers(0, self.population_size, size=(2, self.population_size, tournament_size))
+        winners = np.argmax(fitness[candidates], axis=-1)
+        parent_idx = np.take_along_axis(candidates, winners[..., np.newaxis], axis=-1)[..., 0]
+        np.take(self.population, parent_idx[0], axis=0, out=self._parents[0])
+        np.take(self.population, parent_idx[1], axis=0, out=self._parents[1])
+        if self.tour_lengths is not None:
+            # offspring start as copies of their first parent
+            self._offspring_lengths = self.tour_lengths[parent_idx[0]]
+        return self._parents[0], self._parents[1]
 
     def _crossover(self, parents1: np.ndarray, parents2: np.ndarray) -> np.ndarray:
         """Perform crossover between parents."""
-        offspring = np.full((self.population_size, self.dimension), -1)
-        if self.problem_type == "GPA":
-            dt = np.dtype([('action', '<U5'), ('duration', '<f8')])
-            offspring = np.empty((self.population_size, self.dimension), dtype=dt)
-        logger.info(f"crossover rate: {self.crossover_rate}")
-        for i in range(self.population_size):
-            if np.random.random() < self.crossover_rate:
-                if self.problem_type == 'tsp' or self.problem_type == 'GPA':
-                    # Order crossover for TSP
-                    # Select two random crossover points
-                    point1, point2 = sorted(np.random.choice(self.dimension, 2, replace=False))
-                    # Ensure parents are array-like before converting to list
-                    elem_type = int if self.problem_type == 'tsp' else np.dtype([('action', '<U5'), ('duration', '<f8')])
-                    p1 = np.asarray(parents1[i], dtype=elem_type)
-                    p2 = np.asarray(parents2[i], dtype=elem_type)
-                    
-                    # Convert to lists
-                    parent1: list = p1.tolist()
-                    parent2: list = p2.tolist()
-                    
-                    # Initialize offspring
-                    action_duration_dtype = np.dtype([('action', 'U5'), ('duration', 'f8')])
-                
-                    offspring_route = [-1] * self.dimension
-                    if self.problem_type == 'GPA':
-                        offspring_route = np.empty((self.dimension,), dtype=action_duration_dtype)
-                        for j in range(len(offspring_route)):
-                            offspring_route[j]['action'] = "none"
-                            offspring_route[j]['duration'] = -1
-                        offspring_route = list(offspring_route)
-                    
-                    # Copy segment from parent1
-                    offspring_route[point1:point2] = parent1[point1:point2]
-                    
-                    # Create remaining elements in order from parent2
-                    # Only include values that aren't already in the offspring
-                    remaining = []
-                    if self.problem_type == 'tsp':
-                        for gene in parent2:
-                            if gene not in offspring_route[point1:point2]:
-                                remaining.append(gene)
-                    # we don't care about duplicate moves in the game playing agent            
-                    elif self.problem_type == "GPA":
-                        if point1 > 0:
-                            remaining = parent2[:point1]
-                        if point2 < self.dimension:
-                            remaining.extend(parent2[point2:])
-
-                    # Fill in the rest of the offspring
-                    if point1 > 0:
-                        offspring_route[:point1] = remaining[:point1]
-                    if point2 < self.dimension:
-                        offspring_route[point2:] = remaining[point1:]
-                    if self.problem_type == "GPA":
-                        for elem in offspring_route:
-                            if elem[0] == "":
-                                logger.error("empty action in GPA")
-                                raise Exception("empty element in GPA")
-                    
-                    # Convert back to numpy array
-                    offspring[i] = np.array(offspring_route, dtype=elem_type)
-                else:
-                    # Blend crossover for function optimization
-                    alpha = np.random.random()
-                    offspring[i] = alpha * parents1[i] + (1 - alpha) * parents2[i]
-            else:
-                offspring[i] = parents1[i]
+        logger.debug(f"crossover rate: {self.crossover_rate}")
+        crossed = self.rng.random(self.population_size) < self.crossover_rate
+        offspring = self._offspring
+        np.copyto(offspring, parents1)
+        if not crossed.any():
+            return offspring
+
+        if self.problem_type == 'tsp' and self.candidates is not None:
+            # edge assembly crossover keeps edges, which matters more than positions on large tours
+            for i in np.flatnonzero(crossed):
+                offspring[i], delta = eax_crossover(parents1[i], parents2[i], self.candidates, self.rng)
+                if self.tour_lengths is not None:
+                    self._offspring_lengths[i] += delta
+        elif self.problem_type == 'tsp':
+            # Order crossover for TSP
+            cut_points = random_cut_points(self.rng, int(crossed.sum()), self.dimension)
+            offspring[crossed] = order_crossover(parents1[crossed], parents2[crossed], cut_points)
+            if self.tour_lengths is not None:
+                # a copied segment changes too many edges to track
+                self._offspring_lengths[crossed] = np.nan
+        elif self.problem_type == 'GPA':
+            # we don't care about duplicate moves in the game playing agent,
+            # so the segment is simply swapped in at the same positions
+            cut_points = random_cut_points(self.rng, int(crossed.sum()), self.dimension)
+            offspring[crossed] = two_point_crossover(parents1[crossed], parents2[crossed], cut_points)
+        else:
+            # SBX or blend crossover for function optimization
+            offspring[crossed] = self.function.crossover(parents1[crossed], parents2[crossed], self.rng)
 
         return offspring
     
     def _mutate(self, offspring: np.ndarray) -> np.ndarray:
-        for i in range(self.population_size):
-            if np.random.random() < self.mutation_rate:
-                if self.problem_type == 'tsp':
-                    # Randomly select and swap
-                    idx1, idx2 = np.random.choice(self.dimension, 2, replace=False)
-                    offspring[i, [idx1, idx2]] = offspring[i, [idx2, idx1]]
-                elif self.problem_type == "GPA":
-                    possible_actions = np.array(['left', 'right', 'jump', 'pause'])
-                    choice = np.random.choice(possible_actions, size=1)
-                    duration = np.random.uniform(0.25, 2.0, size=1)
-                    offspring[i]['action'] = choice[0]
-                    offspring[i]['duration'] = duration[0]
-                else:
-                    # Gaussian mutation for function optimization 
-                    mutation = np.random.normal(0, 0.1, self.dimension)
-                    offspring[i] += mutation
-                    offspring[i] = np.clip(offspring[i], 0, 1)
+        mutated = np.flatnonzero(self.rng.random(self.population_size) < self.mutation_rate)
+        if mutated.size == 0:
+            return offspring
+
+        if self.problem_type == 'tsp' and self.candidates is not None:
+            # a random swap breaks four edges of a good tour, a 2-opt move onto
+            # a candidate edge only two
+            for i in mutated:
+                delta = self.candidates.two_opt_mutation(offspring[i], self.rng)
+                if self.tour_lengths is not None:
+                    self._offspring_lengths[i] += delta
+        elif self.problem_type == 'tsp':
+            # Randomly select and swap two distinct positions per mutated row
+            idx1 = self.rng.integers(0, self.dimension, size=mutated.size)
+            idx2 = (idx1 + self.rng.integers(1, self.dimension, size=mutated.size)) % self.dimension
+            if self.tour_lengths is not None:
+                # a swap only changes the edges around the two positions; edge k
+                # joins positions k and k + 1
+                edges = np.stack([idx1 - 1, idx1, idx2 - 1, idx2], axis=1) % self.dimension
+                # count shared edges once when the positions are adjacent
+                distinct = np.ones(edges.shape, dtype=bool)
+                distinct[:, 2:] = (edges[:, 2:] != edges[:, :1]) & (edges[:, 2:] != edges[:, 1:2])
+                before = self._edge_lengths(offspring, mutated, edges)
+            offspring[mutated, idx1], offspring[mutated, idx2] = offspring[mutated, idx2], offspring[mutated, idx1]
+            if self.tour_lengths is not None:
+                after = self._edge_lengths(offspring, mutated, edges)
+                self._offspring_lengths[mutated] += ((after - before) * distinct).sum(axis=1)
+        elif self.problem_type == "GPA":
+            possible_actions = np.array(['left', 'right', 'jump', 'pause'])
+            choices = self.rng.choice(possible_actions, size=mutated.size)
+            durations = self.rng.uniform(0.25, 2.0, size=mutated.size)
+            offspring['action'][mutated] = choices[:, np.newaxis]
+            offspring['duration'][mutated] = durations[:, np.newaxis]
+        else:
+            # polynomial or Gaussian mutation for function optimization
+            offspring[mutated] = self.function.mutate(offspring[mutated], self.rng)
         return offspring
 
     def _update_best_solution(self, fitness: np.ndarray) -> None:
@@ -302,61 +549,327 @@ class GeneticOptimizer:
         if fitness[best_idx] > self.best_fitness:
             self.best_fitness = fitness[best_idx]
             self.best_solution = self.population[best_idx].copy()
+        self.fitness_history.append(float(self.best_fitness))
+
+    def _apply_local_search(self, elites: np.ndarray, elite_lengths: np.ndarray) -> None:
+        """Improve the previous generation's elite and carry it into the new population."""
+        deadline = time.perf_counter() + self.local_search_budget
+        for i, tour in enumerate(elites):
+            if time.perf_counter() >= deadline:
+                break
+            self.population[i], delta = self.local_search.improve(tour, deadline)
+            if self.tour_lengths is not None:
+                # the summed move deltas keep the length current without a rescore
+                self.tour_lengths[i] = elite_lengths[i] + delta
 
     def _create_next_generation(self, fitness: np.ndarray) -> None:
+        elites = None
+        if self.local_search is not None:
+            ranked = np.argsort(fitness)[::-1][:self.local_search_elite]
+            elites = self.population[ranked].copy()
+            # TSP fitness is the negated tour length
+            elite_lengths = -fitness[ranked]
+
         # use selection, mutation, and crossover to create next generation
+        start = time.perf_counter()
         parents1, parents2 = self._select_parents(fitness)
+        selected = time.perf_counter()
         offspring = self._crossover(parents1, parents2)
-        self.population = self._mutate(offspring)         
+        crossed = time.perf_counter()
+        # offspring live in the spare buffer, so swap it with the current
+        # population instead of allocating a new one each generation
+        self._offspring = self.population
+        self.population = self._mutate(offspring)
+        if self.tour_lengths is not None:
+            self.tour_lengths = self._offspring_lengths
+        mutated = time.perf_counter()
+        self.metrics.observe_phase('select', selected - start)
+        self.metrics.observe_phase('crossover', crossed - selected)
+        self.metrics.observe_phase('mutate', mutated - crossed)
+
+        if elites is not None:
+            self._apply_local_search(elites, elite_lengths)
+            self.metrics.observe_phase('local_search', time.perf_counter() - mutated)
+
+    @property
+    def finished(self) -> bool:
+        return self.stop_reason is not None or self.generation >= self.max_generations
+
+    def _check_stopping(self, update_data: dict, seconds: float) -> None:
+        """Apply the stop criteria after a generation; the final update gets the ``stop_reason``."""
+        reason = None
+        if self.stopping is not None:
+            reason = self.stopping.observe(update_data['best_fitness'], update_data['population_diversity'], seconds)
+            if reason == 'stagnation':
+                action = self.stopping.escape()
+                if action is not None:
+                    logger.info(f"Task {self.task_id}: stagnated at generation {self.generation}, {action}")
+                    self._diversify(action, self.stopping.hypermutation_rounds)
+                    reason = None
+        if reason is None and self.generation >= self.max_generations:
+            reason = 'max_generations'
+        if reason is not None:
+            self.stop_reason = reason
+            update_data['stop_reason'] = reason
+
+    def _diversify(self, action: str, rounds: int = 5) -> None:
+        """Escape stagnation with a fresh or heavily mutated population that keeps the best individual."""
+        if action == 'restart':
+            self.population = self._initialize_population()
+            if self.tour_lengths is not None:
+                self.tour_lengths = np.full(self.population_size, np.nan)
+        else:
+            if self.tour_lengths is not None:
+                # mutation deltas go straight into the current lengths
+                self._offspring_lengths = self.tour_lengths
+            rate, self.mutation_rate = self.mutation_rate, 1.0
+            for _ in range(rounds):
+                self.population = self._mutate(self.population)
+            self.mutation_rate = rate
+        if self.best_solution is not None:
+            self.population[0] = self.best_solution
+            if self.tour_lengths is not None:
+                self.tour_lengths[0] = -self.best_fitness
+
+    def _log_generation(self) -> None:
+        if self.generation % LOG_EVERY == 0 and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Task {self.task_id}: generation {self.generation} complete. Best fitness: {self.best_fitness}")
+
+    def _build_update(self, task_id: str, fitness_values: np.ndarray) -> dict:
+        # Calculate additional metrics
+        avg_fitness = float(np.mean(fitness_values))
+        diversity = float(np.std(fitness_values))
+
+        if self.minimize:
+            # fitness is the negated tour length or objective value, report the value itself
+            best_fitness = -float(self.best_fitness)
+            avg_fitness = -avg_fitness
+        else:
+            best_fitness = float(self.best_fitness)
+
+        return {
+            'task_id': task_id,
+            'generation': self.generation,
+            'best_fitness': best_fitness,
+            # left as an array; senders convert it for their wire format
+            'best_solution': self.best_solution,
+            'average_fitness': avg_fitness,
+            'population_diversity': diversity,
+            'status': 'running'
+        }
 
+    def step(self, task_id: str) -> dict:
+        """Run one generation synchronously. Not available for GPA scored by the frontend."""
+        start = time.perf_counter()
+        fitness_values = self._compute_fitness()
+        self.metrics.observe_phase('evaluate', time.perf_counter() - start)
+        self._update_best_solution(fitness_values)
+        self._create_next_generation(fitness_values)
+        update_data = self._build_update(task_id, fitness_values)
+        self._log_generation()
+        self.generation += 1
+        seconds = time.perf_counter() - start
+        self._check_stopping(update_data, seconds)
+        self.metrics.observe_generation(seconds)
+        return update_data
 
-    async def evolve(self, task_id: str, update_callback, close_callback,wait_for_frontend_callback, websocket=None) -> None:
+    def get_state(self) -> dict:
+        """The evolving part of the optimizer; configuration is not included."""
+        return {
+            'population': self.population,
+            'generation': self.generation,
+            'best_solution': self.best_solution,
+            'best_fitness': self.best_fitness,
+            'fitness_history': self.fitness_history,
+            'tour_lengths': self.tour_lengths,
+            'stopping': self.stopping,
+            'stop_reason': self.stop_reason,
+            'rng': self.rng,
+            'fitness_cache': self.fitness_cache,
+            'metrics': self.metrics,
+        }
+
+    def set_state(self, state: dict) -> None:
+        for key, value in state.items():
+            if key == 'metrics':
+                # workers report only what they measured, add it to ours
+                self.metrics.merge(value)
+            else:
+                setattr(self, key, value)
+        if self._offspring.shape != self.population.shape or self._offspring.dtype != self.population.dtype:
+            self._allocate_buffers()
+
+    def checkpoint_arrays(self, prefix: str = '') -> Dict[str, np.ndarray]:
+        """Copy of the state needed to resume the run, see checkpoint.py."""
+        arrays = {
+            'population': self.population.copy(),
+            'generation': np.array(self.generation),
+            'best_fitness': np.array(self.best_fitness, dtype=np.float64),
+            'fitness_history': np.array(self.fitness_history, dtype=np.float64),
+            'rng_state': np.array(json.dumps(self.rng.bit_generator.state)),
+        }
+        if self.best_solution is not None:
+            arrays['best_solution'] = self.best_solution.copy()
+        if self.tour_lengths is not None:
+            arrays['tour_lengths'] = self.tour_lengths.copy()
+        if self.stopping is not None:
+            arrays['stopping_state'] = np.array(json.dumps(self.stopping.state()))
+        return {prefix + key: value for key, value in arrays.items()}
+
+    def restore_arrays(self, arrays: Dict[str, np.ndarray], prefix: str = '') -> None:
+        self.population = arrays[prefix + 'population']
+        self.generation = int(arrays[prefix + 'generation'])
+        self.best_fitness = float(arrays[prefix + 'best_fitness'])
+        self.best_solution = arrays.get(prefix + 'best_solution')
+        self.fitness_history = arrays[prefix + 'fitness_history'].tolist()
+        self.rng.bit_generator.state = json.loads(str(arrays[prefix + 'rng_state']))
+        if self.tour_lengths is not None:
+            # resumed runs keep the incrementally updated lengths, so they stay bit for bit identical
+            self.tour_lengths = arrays.get(prefix + 'tour_lengths', np.full(self.population_size, np.nan))
+        if self.stopping is not None and prefix + 'stopping_state' in arrays:
+            self.stopping.load(json.loads(str(arrays[prefix + 'stopping_state'])))
+        self._allocate_buffers()
+
+    def __getstate__(self) -> dict:
+        # pending futures belong to the event loop and cannot cross into a worker process
+        state = self.__dict__.copy()
+        state['_gpa_fitness_values_store'] = {}
+        state['checkpointer'] = None
+        # scratch buffers are rebuilt on the other side instead of pickled
+        del state['_parents'], state['_offspring']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._allocate_buffers()
+
+    async def run_in_worker(self, task_id: str, n_generations: int, executor) -> Tuple[dict, List[dict]]:
+        """Advance ``n_generations`` in the pool and return the new state and updates.
+
+        Only the evolving state goes with each chunk. The problem data, e.g.
+        the distance matrix, is sent once to each worker that has no copy yet.
+        """
+        loop = asyncio.get_running_loop()
+        state = self.get_state()
+        # the worker reports what it measured; ours stay here
+        del state['metrics']
+        result = await loop.run_in_executor(executor, _run_generations, self.worker_key, task_id, n_generations, state)
+        if result is None:
+            result = await loop.run_in_executor(executor, _run_generations, self.worker_key, task_id, n_generations,
+                                                state, self)
+        return result
+
+    async def _run_chunk(self, task_id: str, n_generations: int, executor, scheduler: Optional[Scheduler]):
+        async with scheduled(scheduler, task_id):
+            return await self.run_in_worker(task_id, n_generations, executor)
+
+    async def _evolve_in_executor(self, task_id: str, publisher, executor, scheduler: Optional[Scheduler] = None) -> None:
+        pending = None
+        try:
+            while not self.finished or pending is not None:
+                if pending is not None:
+                    state, updates = await pending
+                    self.set_state(state)
+                else:
+                    updates = []
+
+                # submit the next chunk before streaming the last one, so the
+                # worker keeps computing while updates go out
+                pending = None
+                if not self.finished:
+                    n_generations = min(self.generations_per_chunk, self.max_generations - self.generation)
+                    pending = asyncio.ensure_future(self._run_chunk(task_id, n_generations, executor, scheduler))
+
+                for update_data in updates:
+                    publisher.publish(update_data)
+                if self.checkpointer is not None:
+                    await self.checkpointer.maybe_save(self)
+        finally:
+            # a chunk still in flight after a failure must not outlive the run
+            if pending is not None:
+                pending.cancel()
+
+    async def evolve(self, task_id: str, update_callback, close_callback,wait_for_frontend_callback, websocket=None, executor=None,
+                     scheduler: Optional[Scheduler] = None, results: Optional[TaskResults] = None) -> None:
+        """Run the optimization back to back, streaming updates through an UpdatePublisher.
+
+        When an executor is given, generations are computed there in chunks of
+        ``generations_per_chunk`` so the event loop stays free. GPA scored by
+        the frontend always runs in-loop because its fitness comes over the
+        websocket. With a scheduler, every chunk is one turn on a scheduler
+        slot. Those GPA generations are not scheduled: they mostly wait on the
+        browser. Simulated GPA runs like any other problem.
+        With ``results``, every update goes into that shared history instead
+        of through ``update_callback``; subscribers throttle on their own.
+        """
+        if results is not None:
+            publisher = results
+        else:
+            publisher = UpdatePublisher(update_callback, mode=self.update_mode, max_rate=self.update_rate, metrics=self.metrics)
+        if self.needs_client:
+            scheduler = None
         try:
-                while self.generation < self.max_generations:
-                    # Process generation
-                    fitness_values = await self._evaluate_population(wait_for_frontend_callback,websocket)
-                    logger.info(fitness_values)
-                    self._update_best_solution(fitness_values)               
-                    self._create_next_generation(fitness_values)
-                    
-                    # Calculate additional metrics
-                    avg_fitness = np.mean(fitness_values)
-                    diversity = np.std(fitness_values)
-                    
-                    # Send update
-                    if self.problem_type == 'tsp':
-                        update_data = {
-                            'task_id': task_id,
-                            'generation': self.generation,
-                            'best_fitness': -float(self.best_fitness),
-                            #'current_fitness': 14,
-                            'best_solution': self.best_solution.tolist(),
-                            'average_fitness': -avg_fitness,
-                            'population_diversity': diversity,
-                            'status': 'running'
-                        }
-                    else:
-                        update_data = {
-                            'task_id': task_id,
-                            'generation': self.generation,
-                            'best_fitness': float(self.best_fitness),
-                            #'current_fitness': 14,
-                            'best_solution': self.best_solution.tolist(),
-                            'average_fitness': avg_fitness,
-                            'population_diversity': diversity,
-                            'status': 'running'
-                        }
-                    
-                    logger.info(f"Generation {self.generation} complete. Best fitness: {self.best_fitness}")
-                    #if self.problem_type == "tsp":
-                    await update_callback(update_data)
-                    
-                    # Control evolution speed
-                    await asyncio.sleep(.1)
-                    self.generation += 1   
+                if executor is not None and not self.needs_client:
+                    await self._evolve_in_executor(task_id, publisher, executor, scheduler)
+                while not self.finished:
+                    chunk_end = min(self.generation + self.generations_per_chunk, self.max_generations)
+                    async with scheduled(scheduler, task_id):
+                        while self.generation < chunk_end and self.stop_reason is None:
+                            # Process generation
+                            start = time.perf_counter()
+                            fitness_values = await self._evaluate_population(wait_for_frontend_callback,websocket)
+                            self.metrics.observe_phase('evaluate', time.perf_counter() - start)
+                            self._update_best_solution(fitness_values)
+                            self._create_next_generation(fitness_values)
+
+                            # Send update
+                            update_data = self._build_update(task_id, fitness_values)
+
+                            self._log_generation()
+                            self.generation += 1
+                            seconds = time.perf_counter() - start
+                            self._check_stopping(update_data, seconds)
+                            publisher.publish(update_data)
+                            self.metrics.observe_generation(seconds)
+                            # let the update sender and other tasks run between generations
+                            await asyncio.sleep(0)
+                    if self.checkpointer is not None:
+                        await self.checkpointer.maybe_save(self)
+                await publisher.close()
                 await close_callback()
         except Exception as e:
             logger.error(f"Error in generation {self.generation}: {str(e)}")
+            if self.checkpointer is not None:
+                # keep the latest generation for a client that reconnects
+                await self.checkpointer.save(self)
             raise
                 
-        logger.info(f"Evolution completed for task {task_id}")
\ No newline at end of file
+        logger.info(f"Evolution completed for task {task_id}: {self.stop_reason}")
+
+
+# this worker process's copies of the optimizers it has run, by worker_key
+_worker_optimizers: 'OrderedDict[str, GeneticOptimizer]' = OrderedDict()
+
+
+def _run_generations(worker_key: str, task_id: str, n_generations: int, state: dict,
+                     optimizer: Optional[GeneticOptimizer] = None) -> Optional[Tuple[dict, List[dict]]]:
+    """Process-pool entry point: advance this worker's copy of an optimizer and return its new state and updates.
+
+    Returns None when the worker has no copy yet and none was sent along.
+    """
+    if optimizer is None:
+        optimizer = _worker_optimizers.get(worker_key)
+        if optimizer is None:
+            return None
+    _worker_optimizers[worker_key] = optimizer
+    _worker_optimizers.move_to_end(worker_key)
+    while len(_worker_optimizers) > WORKER_CACHE_SIZE:
+        _worker_optimizers.popitem(last=False)
+    optimizer.set_state(state)
+    optimizer.metrics = TaskMetrics()
+    updates = []
+    while len(updates) < n_generations and not optimizer.finished:
+        updates.append(optimizer.step(task_id))
+    if optimizer.finished:
+        del _worker_optimizers[worker_key]
+    return optimizer.get_state(), updates
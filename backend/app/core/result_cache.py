@@ -0,0 +1,196 @@
+"""Content-addressed cache of finished optimization results.
+
+Identical requests, e.g. the same ``cities`` resubmitted with the same
+parameters, hash to the same key: a SHA-256 of the request config with its
+keys sorted, leaving out the settings that only change how a run is
+delivered. Coordinates are hashed as float64, so ``[1, 2]`` and ``[1.0, 2.0]``
+are the same city. Per request (``cache``):
+
+    reuse       an identical running task is shared, a finished one is
+                returned at once with its best solution (the default)
+    warm_start  an identical running task is shared, a finished one seeds a
+                new run's population with its cached elites
+    off         every request runs from scratch and nothing is cached
+
+Entries expire after ``ttl`` seconds and the least recently used are evicted
+beyond ``max_entries``. With a ``directory`` every entry is also written to
+``<key>.npz`` there, so the cache survives restarts. Runs scored by a browser
+are never cached.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from .metrics import TaskMetrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+CACHE_MODES = ('reuse', 'warm_start', 'off')
+
+# individuals kept per entry for warm starts
+CACHED_ELITES = 8
+
+# config keys that change how a run is delivered, not what it computes
+_DELIVERY_KEYS = ('task_id', 'priority', 'cache', 'checkpoint_interval', 'result_history', 'generations_per_chunk')
+_DELIVERY_PARAMETERS = ('updates',)
+
+
+def cacheable(config: dict) -> bool:
+    """Whether a run computes its result on the server, so identical requests get identical work."""
+    if config.get('problem_type') != 'GPA':
+        return True
+    return ((config.get('parameters') or {}).get('gpa_evaluator') or {}).get('mode') == 'simulator'
+
+
+def request_key(config: dict) -> str:
+    """Canonical hash of a request config."""
+    parameters = {key: value for key, value in (config.get('parameters') or {}).items()
+                  if key not in _DELIVERY_PARAMETERS}
+    cities = parameters.pop('cities', None)
+    canonical = {key: value for key, value in config.items() if key not in _DELIVERY_KEYS}
+    canonical['parameters'] = parameters
+    digest = hashlib.sha256(json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=str).encode())
+    if cities is not None:
+        cities = np.ascontiguousarray(cities, dtype='<f8')
+        digest.update(str(cities.shape).encode())
+        digest.update(cities.tobytes())
+    return digest.hexdigest()
+
+
+class CachedResult(NamedTuple):
+    # the run's final update, best_solution as an array
+    update: dict
+    elites: np.ndarray
+    created: float
+
+
+class CachedRun:
+    """Stands in for the optimizer of a task served from the cache, so a hit builds nothing."""
+
+    needs_client = False
+
+    def __init__(self, config: dict, entry: CachedResult):
+        updates_config = (config.get('parameters') or {}).get('updates') or {}
+        self.update_mode = updates_config.get('mode', 'throttled')
+        self.update_rate = updates_config.get('max_rate', 10.0)
+        self.generation = entry.update['generation'] + 1
+        self.stop_reason = entry.update.get('stop_reason')
+        self.metrics = TaskMetrics()
+        self.checkpointer = None
+
+
+def _write_entry(path: str, entry: CachedResult) -> None:
+    update = {key: value for key, value in entry.update.items() if key != 'best_solution'}
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as handle:
+        np.savez_compressed(handle, __version__=np.array(CACHE_VERSION), __update__=np.array(json.dumps(update)),
+                            __created__=np.array(entry.created), best_solution=entry.update['best_solution'],
+                            elites=entry.elites)
+    os.replace(temporary, path)
+
+
+def _read_entry(path: str) -> CachedResult:
+    with np.load(path, allow_pickle=False) as data:
+        version = int(data['__version__'])
+        if version != CACHE_VERSION:
+            raise ValueError(f"Unsupported cache entry version {version} in {path}")
+        update = json.loads(str(data['__update__']))
+        update['best_solution'] = data['best_solution']
+        return CachedResult(update, data['elites'], float(data['__created__']))
+
+
+class ResultCache:
+    """Finished results by request key, in memory and optionally on disk."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 86400.0, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._entries: 'OrderedDict[str, CachedResult]' = OrderedDict()
+        # request outcomes, exported as metrics
+        self.hits = 0
+        self.misses = 0
+        self.attached = 0
+        self.warm_starts = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.npz')
+
+    async def get(self, key: str) -> Optional[CachedResult]:
+        entry = self._entries.get(key)
+        if entry is None and self.directory and os.path.exists(self._path(key)):
+            loop = asyncio.get_running_loop()
+            try:
+                entry = await loop.run_in_executor(None, _read_entry, self._path(key))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read cache entry {key}: {e}")
+                return None
+        if entry is not None and time.time() - entry.created > self.ttl:
+            self._entries.pop(key, None)
+            self._remove_file(key)
+            entry = None
+        if entry is None:
+            return None
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._evict()
+        return entry
+
+    async def put(self, key: str, update: dict, elites: np.ndarray, minimize: bool) -> None:
+        """Store a finished run unless the entry already holds a better one."""
+        current = self._entries.get(key)
+        if current is not None:
+            best, new = current.update['best_fitness'], update['best_fitness']
+            if (best < new) if minimize else (best > new):
+                return
+        # the update's task id belongs to the run that produced it
+        update = {field: value for field, value in update.items() if field != 'task_id'}
+        entry = CachedResult(update, elites, time.time())
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._evict()
+        if self.directory:
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self._store, key, entry)
+            except OSError as e:
+                # a full or read-only disk only costs the persistence
+                logger.warning(f"Could not write cache entry {key}: {e}")
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _store(self, key: str, entry: CachedResult) -> None:
+        _write_entry(self._path(key), entry)
+        # the directory is bounded like memory: expired entries first, then the oldest
+        now = time.time()
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.npz')]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for rank, path in enumerate(paths):
+            if rank >= self.max_entries or now - os.path.getmtime(path) > self.ttl:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _remove_file(self, key: str) -> None:
+        if self.directory:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,72 @@
+"""Per-task history of generation updates, shared by every subscriber.
+
+A task's run appends one update per generation to its ``TaskResults``, a
+ring buffer of the last ``maxlen`` generations. Any number of websocket or
+REST clients read from it: they can join late, replay from a generation
+offset, and follow live updates, all from one computation. ``TaskResults``
+has the same ``publish``/``close`` interface as ``UpdatePublisher``, so an
+optimizer can write to it directly.
+"""
+import asyncio
+import itertools
+from collections import deque
+from typing import AsyncIterator, Deque, List, Optional
+
+
+class TaskResults:
+
+    def __init__(self, maxlen: int = 1000):
+        self.updates: Deque[dict] = deque(maxlen=maxlen)
+        self.finished = False
+        self.error: Optional[str] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        # waiters hold the old event; the next change needs a fresh one
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    @property
+    def latest(self) -> Optional[dict]:
+        return self.updates[-1] if self.updates else None
+
+    def publish(self, update_data: dict) -> None:
+        self.updates.append(update_data)
+        self._notify()
+
+    async def close(self) -> None:
+        self.finished = True
+        self._notify()
+
+    def fail(self, error: str) -> None:
+        self.error = error
+        self.finished = True
+        self._notify()
+
+    def reopen(self) -> None:
+        """Accept updates again when an interrupted run is resumed."""
+        self.error = None
+        self.finished = False
+
+    def since(self, generation: int, limit: Optional[int] = None) -> List[dict]:
+        """Buffered updates from ``generation`` on; older generations have been dropped."""
+        if not self.updates:
+            return []
+        offset = max(0, generation - self.updates[0]['generation'])
+        stop = None if limit is None else offset + limit
+        return list(itertools.islice(self.updates, offset, stop))
+
+    async def subscribe(self, from_generation: int = 0) -> AsyncIterator[dict]:
+        """Replay from ``from_generation``, then follow the run until it finishes."""
+        next_generation = from_generation
+        while True:
+            changed = self._changed
+            batch = self.since(next_generation)
+            for update_data in batch:
+                yield update_data
+            if batch:
+                next_generation = batch[-1]['generation'] + 1
+            elif self.finished:
+                return
+            else:
+                await changed.wait()
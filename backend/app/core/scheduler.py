@@ -0,0 +1,136 @@
+"""Priority scheduler that time-slices optimization tasks over a fixed number of slots.
+
+Tasks never hold the CPU for a whole run. Every chunk of generations (one
+``generations_per_chunk`` chunk, or one island epoch) is a *turn*. A task
+needs a slot for each turn and hands the slot back when the turn ends.
+Waiting turns are granted by priority, higher first, and FIFO within a
+priority. A task that wants another turn queues again behind everyone
+already waiting, so equal-priority tasks round-robin, and a small job waits
+at most one turn of a large one instead of its whole run.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .metrics import TaskMetrics
+
+
+class Scheduler:
+
+    def __init__(self, slots: Optional[int] = None):
+        self.slots = max(1, slots or os.cpu_count() or 1)
+        self.free = self.slots
+        # (-priority, sequence, task_id, cost, future)
+        self._queue: List[Tuple[int, int, str, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._priorities: Dict[str, int] = {}
+        self._metrics: Dict[str, TaskMetrics] = {}
+        # slots held by each task currently in a turn
+        self.running: Dict[str, int] = {}
+        # moving average of turn length, used for start-time estimates
+        self.turn_seconds = 0.1
+
+    def register(self, task_id: str, priority: int = 0, metrics: Optional[TaskMetrics] = None) -> None:
+        self._priorities[task_id] = priority
+        if metrics is not None:
+            self._metrics[task_id] = metrics
+
+    def unregister(self, task_id: str) -> None:
+        self._priorities.pop(task_id, None)
+        self._metrics.pop(task_id, None)
+        for entry in self._queue:
+            if entry[2] == task_id and not entry[4].done():
+                entry[4].cancel()
+        self._dispatch()
+
+    def _waiting(self) -> List[Tuple[int, int, str, int, asyncio.Future]]:
+        return sorted(entry for entry in self._queue if not entry[4].done())
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiting())
+
+    def position(self, task_id: str) -> Optional[int]:
+        """Number of turns queued ahead of the task, or None if it is not waiting."""
+        for position, entry in enumerate(self._waiting()):
+            if entry[2] == task_id:
+                return position
+        return None
+
+    def estimate(self, priority: int = 0) -> Tuple[int, float]:
+        """Queue position and seconds until a new turn at ``priority`` would start."""
+        waiting = self._waiting()
+        if not waiting and self.free > 0:
+            return 0, 0.0
+        ahead = sum(1 for entry in waiting if -entry[0] >= priority)
+        return ahead, self.estimated_wait(ahead)
+
+    def estimated_wait(self, position: int) -> float:
+        # every running turn frees its slot within about one turn length
+        return (position // self.slots + 1) * self.turn_seconds
+
+    @asynccontextmanager
+    async def turn(self, task_id: str, cost: int = 1) -> AsyncIterator[None]:
+        """Hold ``cost`` slots for one chunk of work, waiting for them if necessary."""
+        cost = min(max(1, cost), self.slots)
+        waited = time.perf_counter()
+        await self._acquire(task_id, cost)
+        start = time.perf_counter()
+        metrics = self._metrics.get(task_id)
+        if metrics is not None:
+            metrics.observe_phase('queue_wait', start - waited)
+        try:
+            yield
+        finally:
+            self.running.pop(task_id, None)
+            self.free += cost
+            self.turn_seconds = 0.8 * self.turn_seconds + 0.2 * (time.perf_counter() - start)
+            self._dispatch()
+
+    async def _acquire(self, task_id: str, cost: int) -> None:
+        if not self._waiting() and self.free >= cost:
+            self._grant(task_id, cost)
+            return
+        future = asyncio.get_running_loop().create_future()
+        priority = self._priorities.get(task_id, 0)
+        heapq.heappush(self._queue, (-priority, next(self._sequence), task_id, cost, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # granted just before the cancellation arrived
+                self.running.pop(task_id, None)
+                self.free += cost
+            self._dispatch()
+            raise
+
+    def _grant(self, task_id: str, cost: int) -> None:
+        self.free -= cost
+        self.running[task_id] = cost
+
+    def _dispatch(self) -> None:
+        # strictly in order: the head waits for enough free slots, nobody overtakes it
+        while self._queue:
+            _, _, task_id, cost, future = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            if cost > self.free:
+                return
+            heapq.heappop(self._queue)
+            self._grant(task_id, cost)
+            future.set_result(None)
+
+
+@asynccontextmanager
+async def scheduled(scheduler: Optional[Scheduler], task_id: str, cost: int = 1) -> AsyncIterator[None]:
+    """``scheduler.turn`` when a scheduler is given, otherwise run straight away."""
+    if scheduler is None:
+        yield
+    else:
+        async with scheduler.turn(task_id, cost):
+            yield
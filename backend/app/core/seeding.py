@@ -0,0 +1,147 @@
+"""Heuristic TSP tours for seeding part of the initial population.
+
+Random permutations start orders of magnitude above a decent tour. With
+``parameters['seeding']`` a fraction of the population starts from cheap
+constructive tours instead, built on a spatial index rather than the
+distance matrix:
+
+    nearest_neighbor  randomized nearest neighbour over k-NN candidate lists
+    greedy            greedy edge matching on noisy k-NN candidate edges
+    space_filling     Hilbert-curve order of randomly rotated coordinates
+
+Every heuristic takes the task's generator, so seeded runs stay
+reproducible, and adds ``noise`` so seeded tours differ from each other.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from .spatial import GridIndex, hilbert_order
+
+SEEDING_METHODS = ('nearest_neighbor', 'greedy', 'space_filling')
+
+
+def nearest_neighbor_tour(index: GridIndex, neighbors: np.ndarray, rng: np.random.Generator,
+                          noise: float = 0.1) -> np.ndarray:
+    """Walk to the nearest unvisited city, now and then to the second nearest."""
+    n = len(index.points)
+    index.reset()
+    visited = [False] * n
+    candidates = neighbors.tolist()
+    city = int(rng.integers(n))
+    tour = [city]
+    visited[city] = True
+    index.remove(city)
+    detours = (rng.random(n) < noise).tolist()
+    for step in range(1, n):
+        options = [other for other in candidates[city] if not visited[other]]
+        if options:
+            # candidate lists are sorted by distance
+            next_city = options[1] if detours[step] and len(options) > 1 else options[0]
+        else:
+            # every candidate is taken, ask the grid for the nearest city left
+            next_city = index.nearest(index.points[city])
+        city = next_city
+        tour.append(city)
+        visited[city] = True
+        index.remove(city)
+    return np.array(tour)
+
+
+def greedy_edge_tour(index: GridIndex, neighbors: np.ndarray, rng: np.random.Generator,
+                     noise: float = 0.1) -> np.ndarray:
+    """Add the shortest candidate edges that keep every city at degree two without closing a cycle.
+
+    The resulting paths are joined end to end, nearest free endpoint first.
+    """
+    n = len(index.points)
+    k = neighbors.shape[1]
+    a = np.repeat(np.arange(n), k)
+    b = neighbors.ravel()
+    keep = a < b
+    a, b = a[keep], b[keep]
+    lengths = np.linalg.norm(index.points[a] - index.points[b], axis=1)
+    lengths *= 1 + noise * rng.random(len(lengths))
+    order = np.argsort(lengths, kind='stable')
+
+    degree = [0] * n
+    parent = list(range(n))
+    links: List[List[int]] = [[] for _ in range(n)]
+
+    def find(city: int) -> int:
+        while parent[city] != city:
+            parent[city] = parent[parent[city]]
+            city = parent[city]
+        return city
+
+    for u, v in zip(a[order].tolist(), b[order].tolist()):
+        if degree[u] < 2 and degree[v] < 2:
+            root_u, root_v = find(u), find(v)
+            if root_u != root_v:
+                parent[root_u] = root_v
+                degree[u] += 1
+                degree[v] += 1
+                links[u].append(v)
+                links[v].append(u)
+
+    # walk the paths, each from one endpoint; isolated cities are paths of one
+    seen = [False] * n
+    fragments = []
+    for start in range(n):
+        if seen[start] or degree[start] == 2:
+            continue
+        path, previous, city = [], -1, start
+        while city >= 0:
+            path.append(city)
+            seen[city] = True
+            following = [other for other in links[city] if other != previous]
+            previous, city = city, (following[0] if following else -1)
+        fragments.append(path)
+
+    # chain fragments greedily by the nearest free endpoint
+    points = index.points
+    heads = np.array([fragment[0] for fragment in fragments])
+    tails = np.array([fragment[-1] for fragment in fragments])
+    remaining = np.ones(len(fragments), dtype=bool)
+    current = int(rng.integers(len(fragments)))
+    tour: List[int] = list(fragments[current])
+    remaining[current] = False
+    for _ in range(len(fragments) - 1):
+        end = points[tour[-1]]
+        head_distance = np.where(remaining, np.linalg.norm(points[heads] - end, axis=1), np.inf)
+        tail_distance = np.where(remaining, np.linalg.norm(points[tails] - end, axis=1), np.inf)
+        nearest_head, nearest_tail = int(np.argmin(head_distance)), int(np.argmin(tail_distance))
+        if head_distance[nearest_head] <= tail_distance[nearest_tail]:
+            tour.extend(fragments[nearest_head])
+            remaining[nearest_head] = False
+        else:
+            tour.extend(reversed(fragments[nearest_tail]))
+            remaining[nearest_tail] = False
+    return np.array(tour)
+
+
+def space_filling_tour(points: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Hilbert-curve order of the cities under a random rotation, closed into a tour."""
+    angle = rng.uniform(0, 2 * np.pi)
+    rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    return hilbert_order(points @ rotation)
+
+
+def seed_tours(cities: np.ndarray, count: int, rng: np.random.Generator, methods=SEEDING_METHODS,
+               noise: float = 0.1, neighbors: int = 8, index: Optional[GridIndex] = None) -> np.ndarray:
+    """``count`` heuristic tours, cycling through ``methods``."""
+    unknown = set(methods) - set(SEEDING_METHODS)
+    if unknown:
+        raise ValueError(f"Unknown seeding methods {sorted(unknown)}, expected some of {SEEDING_METHODS}")
+    index = index if index is not None else GridIndex(cities)
+    candidates = index.knn(neighbors) if {'nearest_neighbor', 'greedy'} & set(methods) else None
+    tours = []
+    for i in range(count):
+        method = methods[i % len(methods)]
+        if method == 'nearest_neighbor':
+            tours.append(nearest_neighbor_tour(index, candidates, rng, noise))
+        elif method == 'greedy':
+            tours.append(greedy_edge_tour(index, candidates, rng, noise))
+        else:
+            tours.append(space_filling_tour(index.points, rng))
+    return np.array(tours).reshape(count, len(cities))
@@ -0,0 +1,155 @@
+"""Uniform-grid spatial index over 2D city coordinates.
+
+SciPy is not a dependency, so nearest-neighbour queries go through a simple
+bucket grid with about ``per_cell`` cities per cell. Queries scan square
+rings of cells around the query point. They stop once no unscanned cell can
+hold anything closer than the best candidates found, so results are exact.
+"""
+import math
+from typing import List, Optional
+
+import numpy as np
+
+
+class GridIndex:
+
+    def __init__(self, points: np.ndarray, per_cell: float = 2.0):
+        self.points = np.asarray(points, dtype=np.float64)
+        n = len(self.points)
+        self.low = self.points.min(axis=0)
+        width, height = self.points.max(axis=0) - self.low
+        area = width * height
+        if area > 0:
+            self.cell_size = math.sqrt(area * per_cell / n)
+        else:
+            # all cities on a line (or on one spot)
+            self.cell_size = max(width, height) * per_cell / n or 1.0
+        self.nx = int(width // self.cell_size) + 1
+        self.ny = int(height // self.cell_size) + 1
+
+        cells = self._cells_of(self.points)
+        self.cell_of = cells[:, 0] * self.ny + cells[:, 1]
+        # points sorted by cell; cell c holds order[starts[c]:starts[c + 1]]
+        self.order = np.argsort(self.cell_of, kind='stable')
+        self.starts = np.searchsorted(self.cell_of[self.order], np.arange(self.nx * self.ny + 1))
+        # per-cell members as lists, for the incremental queries that remove points
+        self._members: Optional[List[List[int]]] = None
+        self._xy: List[List[float]] = self.points.tolist()
+
+    def _cells_of(self, points: np.ndarray) -> np.ndarray:
+        cells = ((points - self.low) // self.cell_size).astype(np.int64)
+        return np.minimum(np.maximum(cells, 0), [self.nx - 1, self.ny - 1])
+
+    def _ring(self, cx: int, cy: int, r: int) -> List[int]:
+        """Cells at Chebyshev distance exactly ``r`` from (cx, cy), clipped to the grid."""
+        if r == 0:
+            return [cx * self.ny + cy]
+        cells = []
+        x0, x1, y0, y1 = cx - r, cx + r, cy - r, cy + r
+        for x in range(max(x0, 0), min(x1, self.nx - 1) + 1):
+            if y0 >= 0:
+                cells.append(x * self.ny + y0)
+            if y1 < self.ny:
+                cells.append(x * self.ny + y1)
+        for y in range(max(y0 + 1, 0), min(y1 - 1, self.ny - 1) + 1):
+            if x0 >= 0:
+                cells.append(x0 * self.ny + y)
+            if x1 < self.nx:
+                cells.append(x1 * self.ny + y)
+        return cells
+
+    def _cell_points(self, cells: List[int]) -> np.ndarray:
+        if not cells:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.order[self.starts[c]:self.starts[c + 1]] for c in cells])
+
+    def knn(self, k: int) -> np.ndarray:
+        """Indices of the k nearest other points of every point, nearest first."""
+        n = len(self.points)
+        k = min(k, n - 1)
+        result = np.empty((n, k), dtype=np.int64)
+        max_ring = max(self.nx, self.ny)
+        for cell in np.unique(self.cell_of):
+            members = self.order[self.starts[cell]:self.starts[cell + 1]]
+            cx, cy = divmod(int(cell), self.ny)
+            candidates: List[int] = []
+            r = 0
+            # grow until every member has k candidates besides itself...
+            while True:
+                candidates.extend(self._ring(cx, cy, r))
+                points = self._cell_points(candidates)
+                if len(points) > k or r >= max_ring:
+                    break
+                r += 1
+            distances = np.linalg.norm(self.points[members][:, np.newaxis] - self.points[points], axis=2)
+            distances[points[np.newaxis, :] == members[:, np.newaxis]] = np.inf
+            # ...then far enough that nothing closer than the k-th candidate is missed
+            reach = np.partition(distances, k - 1, axis=1)[:, k - 1].max()
+            needed = min(int(math.ceil(reach / self.cell_size)), max_ring)
+            if needed > r:
+                for ring in range(r + 1, needed + 1):
+                    candidates.extend(self._ring(cx, cy, ring))
+                points = self._cell_points(candidates)
+                distances = np.linalg.norm(self.points[members][:, np.newaxis] - self.points[points], axis=2)
+                distances[points[np.newaxis, :] == members[:, np.newaxis]] = np.inf
+            nearest = np.argsort(distances, axis=1, kind='stable')[:, :k]
+            result[members] = points[nearest]
+        return result
+
+    def _live_members(self) -> List[List[int]]:
+        if self._members is None:
+            self._members = [self.order[self.starts[c]:self.starts[c + 1]].tolist() for c in range(self.nx * self.ny)]
+        return self._members
+
+    def reset(self) -> None:
+        """Put every removed point back."""
+        self._members = None
+
+    def remove(self, index: int) -> None:
+        """Take a point out of later ``nearest`` queries."""
+        self._live_members()[self.cell_of[index]].remove(index)
+
+    def nearest(self, point: np.ndarray) -> int:
+        """Closest point to ``point`` that has not been removed, or -1 if none is left."""
+        members = self._live_members()
+        cx, cy = self._cells_of(np.asarray(point, dtype=np.float64)[np.newaxis])[0]
+        best, best_distance = -1, math.inf
+        x, y = float(point[0]), float(point[1])
+        xy = self._xy
+        max_ring = max(self.nx, self.ny)
+        r = 0
+        while r <= max_ring:
+            # a ring at distance r holds nothing closer than (r - 1) cells
+            if best >= 0 and (r - 1) * self.cell_size > best_distance:
+                break
+            for cell in self._ring(int(cx), int(cy), r):
+                for candidate in members[cell]:
+                    px, py = xy[candidate]
+                    distance = math.hypot(px - x, py - y)
+                    if distance < best_distance:
+                        best, best_distance = candidate, distance
+            r += 1
+        return best
+
+
+def hilbert_order(points: np.ndarray, order: int = 16) -> np.ndarray:
+    """Indices of ``points`` sorted along a Hilbert curve over their bounding box."""
+    low = points.min(axis=0)
+    span = (points.max(axis=0) - low).max() or 1.0
+    side = 1 << order
+    xy = np.minimum(((points - low) / span * side).astype(np.int64), side - 1)
+    x, y = xy[:, 0].copy(), xy[:, 1].copy()
+    d = np.zeros(len(points), dtype=np.int64)
+    s = side >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # rotate the quadrant so the curve stays continuous
+        flip = ~ry & rx
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        swap = ~ry
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s >>= 1
+    return np.argsort(d, kind='stable')
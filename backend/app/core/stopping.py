@@ -0,0 +1,87 @@
+"""Early stopping for runs that have stopped making progress.
+
+Without stop criteria a run always lasts ``max_generations``. Configured
+through ``parameters['stopping']``, a run also ends when
+
+    target_fitness  the best fitness reaches this value (a tour length for TSP)
+    stagnation      the best fitness has not improved by more than
+                    ``min_improvement`` for this many generations
+    min_diversity   the population's fitness spread falls to this value
+    time_limit      the generations have taken this many seconds of computation
+
+Instead of stopping on stagnation a run can ``restart`` from a fresh
+population or ``hypermutate`` the current one, keeping its best individual,
+up to ``max_restarts`` times::
+
+    {'stagnation': 50, 'on_stagnation': 'restart', 'max_restarts': 3, 'time_limit': 60}
+
+The final update of every run carries a ``stop_reason``, one of
+``STOP_REASONS``.
+"""
+from typing import Optional
+
+STOP_REASONS = ('max_generations', 'target_reached', 'stagnation', 'converged', 'time_limit')
+
+STAGNATION_ACTIONS = ('stop', 'restart', 'hypermutate')
+
+
+class StoppingCriteria:
+    """Tracks progress across generations; ``minimize`` when smaller reported fitness is better."""
+
+    def __init__(self, config: dict, minimize: bool = False):
+        self.stagnation: Optional[int] = config.get('stagnation')
+        self.min_improvement = config.get('min_improvement', 0.0)
+        self.target_fitness: Optional[float] = config.get('target_fitness')
+        self.min_diversity: Optional[float] = config.get('min_diversity')
+        self.time_limit: Optional[float] = config.get('time_limit')
+        self.on_stagnation = config.get('on_stagnation', 'stop')
+        if self.on_stagnation not in STAGNATION_ACTIONS:
+            raise ValueError(f"Unknown stagnation action '{self.on_stagnation}', expected one of {STAGNATION_ACTIONS}")
+        self.max_restarts = config.get('max_restarts', 3)
+        # mutation passes over the whole population per hypermutation
+        self.hypermutation_rounds = config.get('hypermutation_rounds', 5)
+        self.minimize = minimize
+
+        # progress so far, kept in checkpoints
+        self.best: Optional[float] = None
+        self.stagnant = 0
+        self.restarts = 0
+        self.elapsed = 0.0
+
+    def observe(self, best_fitness: float, diversity: float, seconds: float) -> Optional[str]:
+        """Record one generation and return the reason to stop, if any."""
+        self.elapsed += seconds
+        gain = None if self.best is None else (self.best - best_fitness if self.minimize else best_fitness - self.best)
+        if gain is None or gain > self.min_improvement:
+            self.best = best_fitness
+            self.stagnant = 0
+        else:
+            self.stagnant += 1
+
+        if self.target_fitness is not None:
+            if (best_fitness <= self.target_fitness) if self.minimize else (best_fitness >= self.target_fitness):
+                return 'target_reached'
+        if self.min_diversity is not None and diversity <= self.min_diversity:
+            return 'converged'
+        if self.time_limit is not None and self.elapsed >= self.time_limit:
+            return 'time_limit'
+        if self.stagnation is not None and self.stagnant >= self.stagnation:
+            return 'stagnation'
+        return None
+
+    def escape(self) -> Optional[str]:
+        """The action to take on stagnation, or None when the run should stop instead."""
+        if self.on_stagnation == 'stop' or self.restarts >= self.max_restarts:
+            return None
+        self.restarts += 1
+        self.stagnant = 0
+        return self.on_stagnation
+
+    def state(self) -> dict:
+        return {'best': self.best, 'stagnant': self.stagnant, 'restarts': self.restarts, 'elapsed': self.elapsed}
+
+    def load(self, state: dict) -> None:
+        self.best = state['best']
+        self.stagnant = state['stagnant']
+        self.restarts = state['restarts']
+        self.elapsed = state['elapsed']
@@ -1,40 +1,327 @@
-from typing import Dict
-from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
 import asyncio
+import logging
+import os
+import time
 import uuid
+from .batch import BatchJob
+from .checkpoint import Checkpointer, checkpoint_path, is_checkpoint_file, read_checkpoint
+from .islands import IslandModel
+from .metrics import Histogram, render_prometheus
 from .optimizer import GeneticOptimizer
+from .result_cache import CACHED_ELITES, CachedResult, CachedRun, ResultCache, cacheable, request_key
+from .results import TaskResults
+from .scheduler import Scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def build_optimizer(config: dict) -> Union[GeneticOptimizer, IslandModel]:
+    """Optimizer for a request config. At large sizes this takes seconds, so it runs off the event loop."""
+    if (config.get('parameters') or {}).get('islands') is not None:
+        return IslandModel(config)
+    return GeneticOptimizer(config)
+
 
 class TaskManager:
 
-    def __init__(self):
-        self.active_tasks: Dict[str, GeneticOptimizer] = {}
-        self.task_results: Dict[str, list] = {}
+    def __init__(self, max_workers: Optional[int] = None, slots: Optional[int] = None,
+                 checkpoint_dir: Optional[str] = None, result_cache_size: int = 256,
+                 result_cache_ttl: float = 86400.0, result_cache_dir: Optional[str] = None):
+        self.active_tasks: Dict[str, Union[GeneticOptimizer, IslandModel]] = {}
+        self.task_results: Dict[str, TaskResults] = {}
         self.task_metadata: Dict[str, dict] = {}
-        self.max_tasks = 10
+        # background evolve() runs, independent of any client connection
+        self._runs: Dict[str, asyncio.Task] = {}
+        # beyond the scheduler's slots tasks queue for turns, this only bounds memory
+        self.max_tasks = 100
+        # batch jobs, see batch.py; they do not count against max_tasks
+        self.batch_jobs: Dict[str, BatchJob] = {}
+        self._batch_runs: Dict[str, asyncio.Task] = {}
+        self.max_batch_jobs = 10
         self._cleanup_lock = asyncio.Lock()
-    
-    async def create_task(self, config: dict) -> str:
+        # worker processes for CPU-bound generations; None means one per core,
+        # 0 keeps every optimization on the event loop
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # size of the pool once it is started
+        self.executor_workers = 0
+        # execution slots default to the pool size, i.e. one per core
+        self.scheduler = Scheduler(slots or max_workers)
+        # filled by metrics.monitor_event_loop_lag while the app runs
+        self.loop_lag = Histogram()
+        # where running tasks are checkpointed so a dropped client can resume; None disables
+        self.checkpoint_dir = checkpoint_dir
+        if checkpoint_dir:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+        # finished results of identical requests, see result_cache.py; size 0 disables it
+        self.result_cache: Optional[ResultCache] = None
+        if result_cache_size > 0:
+            self.result_cache = ResultCache(result_cache_size, result_cache_ttl, result_cache_dir)
+        # request key -> the task computing or holding its result
+        self._tasks_by_key: Dict[str, str] = {}
+        # tasks whose optimizer is still being built, resolved once they are added
+        self._building: Dict[str, asyncio.Future] = {}
+
+    @property
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers == 0:
+            return None
+        if self._executor is None:
+            self.executor_workers = self.max_workers or os.cpu_count() or 1
+            self._executor = ProcessPoolExecutor(max_workers=self.executor_workers)
+        return self._executor
+
+    async def shutdown(self) -> None:
+        """Stop every run, checkpointing it first so a restart can resume it."""
+        runs = list(self._runs.values()) + list(self._batch_runs.values())
+        for run in runs:
+            run.cancel()
+        await asyncio.gather(*runs, return_exceptions=True)
+        for task_id, optimizer in self.active_tasks.items():
+            if optimizer.checkpointer is not None and self.task_metadata[task_id]['status'] != 'completed':
+                await optimizer.checkpointer.save(optimizer)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.executor_workers = 0
+
+    async def create_task(self, config: dict) -> Tuple[str, Optional[str]]:
+        """Start a task, or share an identical one; returns its id and the cache outcome.
+
+        The outcome is None for a fresh run, 'attached' for a running task,
+        'hit' for a finished result and 'warm_start' for a run seeded from one.
+        """
         async with self._cleanup_lock:
             # clean up completed tasks
             await self._cleanup_old_tasks()
 
-            if len(self.active_tasks) >= self.max_tasks:
-                raise ValueError("Maximum concurrent tasks reached")
-            
-            task_id = str(uuid.uuid4())
-            config['task_id'] = task_id
-            optimizer = GeneticOptimizer(config)
-
-            self.active_tasks[task_id] = optimizer
-            self.task_results[task_id] = []
-            self.task_metadata[task_id] = {
-                'created_at': datetime.now(timezone.utc),
-                'status': 'initialized',
-                'config': config
-            }
-
-            return task_id
-        
+            entry = existing = building = outcome = None
+            mode = config.get('cache') or 'reuse'
+            key = self._cache_key(config)
+            if key is not None:
+                existing = self._tasks_by_key.get(key)
+                if existing is not None:
+                    building = self._building.get(existing)
+                    status = None if building is not None else self.task_metadata[existing]['status']
+                    if building is not None or status in ('initialized', 'running'):
+                        self.result_cache.attached += 1
+                        outcome = 'attached'
+                    elif status == 'completed' and mode == 'reuse':
+                        self.result_cache.hits += 1
+                        return existing, 'hit'
+                    else:
+                        if status != 'completed':
+                            # an interrupted run may never resume; new requests get a run of their own
+                            del self._tasks_by_key[key]
+                        existing = None
+                if existing is None:
+                    entry = await self.result_cache.get(key)
+                    if entry is None:
+                        self.result_cache.misses += 1
+                    elif mode == 'reuse':
+                        self.result_cache.hits += 1
+                        return await self._add_cached_task(config, key, entry), 'hit'
+
+            if building is None and existing is None:
+                # tasks still being built count too, or a burst of requests could overshoot
+                if len(self.active_tasks) + len(self._building) >= self.max_tasks:
+                    raise ValueError("Maximum concurrent tasks reached")
+                task_id = str(uuid.uuid4())
+                config['task_id'] = task_id
+                self._building[task_id] = asyncio.get_running_loop().create_future()
+                if key is not None:
+                    # identical requests attach to this task while it is being built
+                    self._tasks_by_key[key] = task_id
+
+        if building is not None:
+            await asyncio.shield(building)
+        if existing is not None:
+            return existing, outcome
+
+        # construction includes distance matrices, spatial indexes and seeding,
+        # so it runs in the pool like generations do, outside the lock
+        built = self._building[task_id]
+        try:
+            loop = asyncio.get_running_loop()
+            optimizer = await loop.run_in_executor(self.executor, build_optimizer, config)
+        except BaseException as e:
+            del self._building[task_id]
+            if key is not None and self._tasks_by_key.get(key) == task_id:
+                del self._tasks_by_key[key]
+            built.set_exception(e)
+            # marks the exception retrieved when no identical request attached
+            built.exception()
+            raise
+
+        async with self._cleanup_lock:
+            del self._building[task_id]
+            self._add_task(task_id, config, optimizer)
+            built.set_result(task_id)
+            if key is not None:
+                self.task_metadata[task_id]['cache_key'] = key
+            if entry is not None:
+                self.result_cache.warm_starts += 1
+                optimizer.warm_start(entry.elites)
+                outcome = 'warm_start'
+            # GPA fitness from a browser starts when the evaluating client connects
+            if not optimizer.needs_client:
+                self.start_task(task_id)
+            return task_id, outcome
+
+    async def create_batch(self, configs: List[dict], priority: int = 0,
+                           instances_per_chunk: Optional[int] = None) -> str:
+        """Start solving a batch of instances in the background and return its job id."""
+        async with self._cleanup_lock:
+            self._cleanup_old_batches()
+            if sum(1 for job in self.batch_jobs.values() if not job.finished) >= self.max_batch_jobs:
+                raise ValueError("Maximum concurrent batch jobs reached")
+            job_id = str(uuid.uuid4())
+            job = BatchJob(job_id, configs, priority, instances_per_chunk)
+            self.batch_jobs[job_id] = job
+            self._batch_runs[job_id] = asyncio.ensure_future(self._run_batch(job))
+            return job_id
+
+    async def _run_batch(self, job: BatchJob) -> None:
+        try:
+            await job.run(self.executor, self.scheduler)
+        finally:
+            self._batch_runs.pop(job.job_id, None)
+
+    def _cleanup_old_batches(self) -> None:
+        current_time = datetime.now(timezone.utc)
+        for job_id, job in list(self.batch_jobs.items()):
+            # finished jobs stay pollable for an hour, like tasks
+            if job.finished and (current_time - job.finished_at).total_seconds() > 3600:
+                del self.batch_jobs[job_id]
+
+    def _cache_key(self, config: dict) -> Optional[str]:
+        """The request's result cache key, or None when its result is not cached."""
+        if self.result_cache is None or config.get('cache') == 'off' or not cacheable(config):
+            return None
+        return request_key(config)
+
+    async def _add_cached_task(self, config: dict, key: str, entry: CachedResult) -> str:
+        """A completed task whose whole history is the cached final update."""
+        if len(self.active_tasks) + len(self._building) >= self.max_tasks:
+            raise ValueError("Maximum concurrent tasks reached")
+        task_id = str(uuid.uuid4())
+        config['task_id'] = task_id
+        self._add_task(task_id, config, CachedRun(config, entry), status='completed')
+        self.task_results[task_id].publish(dict(entry.update, task_id=task_id))
+        await self.task_results[task_id].close()
+        self.task_metadata[task_id].update(stop_reason=entry.update.get('stop_reason'), cached=True, cache_key=key)
+        self._tasks_by_key[key] = task_id
+        return task_id
+
+    def _add_task(self, task_id: str, config: dict, optimizer: Union[GeneticOptimizer, IslandModel],
+                  status: str = 'initialized') -> None:
+        priority = config.get('priority') or 0
+        self.scheduler.register(task_id, priority, optimizer.metrics)
+        if self.checkpoint_dir:
+            optimizer.checkpointer = Checkpointer(checkpoint_path(self.checkpoint_dir, task_id), config,
+                                                  config.get('checkpoint_interval') or 50)
+
+        self.active_tasks[task_id] = optimizer
+        self.task_results[task_id] = TaskResults(config.get('result_history') or 1000)
+        self.task_metadata[task_id] = {
+            'created_at': datetime.now(timezone.utc),
+            'status': status,
+            'priority': priority,
+            'config': config,
+            'metrics': optimizer.metrics
+        }
+
+    async def restore_task(self, task_id: str) -> Optional[Union[GeneticOptimizer, IslandModel]]:
+        """Load a task that is no longer in memory (e.g. after a restart) from its checkpoint."""
+        if not self.checkpoint_dir:
+            return None
+        try:
+            # task ids are uuids; anything else must not reach the filesystem
+            uuid.UUID(task_id)
+        except ValueError:
+            return None
+        path = checkpoint_path(self.checkpoint_dir, task_id)
+        if not os.path.exists(path):
+            return None
+
+        async with self._cleanup_lock:
+            if task_id in self.active_tasks:
+                return self.active_tasks[task_id]
+            loop = asyncio.get_running_loop()
+            config, arrays = await loop.run_in_executor(None, read_checkpoint, path)
+            optimizer = await loop.run_in_executor(self.executor, build_optimizer, config)
+            optimizer.restore_arrays(arrays)
+            self._add_task(task_id, config, optimizer, status='interrupted')
+            key = self._cache_key(config)
+            if key is not None:
+                self._tasks_by_key.setdefault(key, task_id)
+                self.task_metadata[task_id]['cache_key'] = key
+            optimizer.checkpointer.saved_generation = optimizer.generation
+            return optimizer
+
+    async def resume_checkpoints(self) -> None:
+        """Restore checkpointed tasks after a restart; runs that need no browser continue right away."""
+        if not self.checkpoint_dir:
+            return
+        for name in os.listdir(self.checkpoint_dir):
+            if not name.endswith('.npz'):
+                continue
+            task_id = name[:-len('.npz')]
+            try:
+                optimizer = await self.restore_task(task_id)
+            except Exception as e:
+                logger.warning(f"Could not restore checkpoint {name}: {e}")
+                continue
+            if optimizer is not None and not optimizer.needs_client:
+                self.start_task(task_id)
+
+    def start_task(self, task_id: str, wait_for_frontend=None, websocket=None) -> bool:
+        """Run the task in the background unless it is already running or finished.
+
+        GPA runs scored by a browser need the evaluating client's ``wait_for_frontend``
+        callback and websocket.
+        """
+        run = self._runs.get(task_id)
+        if run is not None and not run.done():
+            return False
+        if self.task_metadata[task_id]['status'] == 'completed':
+            return False
+        self.task_results[task_id].reopen()
+        self.task_metadata[task_id]['status'] = 'running'
+        self._runs[task_id] = asyncio.ensure_future(self._run_task(task_id, wait_for_frontend, websocket))
+        return True
+
+    async def _run_task(self, task_id: str, wait_for_frontend, websocket) -> None:
+        optimizer = self.active_tasks[task_id]
+        metadata = self.task_metadata[task_id]
+        results = self.task_results[task_id]
+
+        async def close_callback():
+            metadata['status'] = 'completed'
+            metadata['stop_reason'] = optimizer.stop_reason
+            if metadata.get('cache_key') is not None and results.latest is not None:
+                await self.result_cache.put(metadata['cache_key'], results.latest,
+                                            optimizer.elites(CACHED_ELITES), optimizer.minimize)
+            if optimizer.checkpointer is not None:
+                optimizer.checkpointer.remove()
+
+        try:
+            await optimizer.evolve(task_id, None, close_callback, wait_for_frontend, websocket=websocket,
+                                   executor=self.executor, scheduler=self.scheduler, results=results)
+        except Exception as e:
+            logger.info(f"Task {task_id} interrupted: {e}")
+            self.interrupt_task(task_id)
+            results.fail(str(e))
+
+    def interrupt_task(self, task_id: str) -> None:
+        """Keep a task whose run failed, with its checkpoint, so it can be resumed."""
+        metadata = self.task_metadata.get(task_id)
+        if metadata is not None:
+            metadata['status'] = 'interrupted'
+
     async def _cleanup_old_tasks(self) -> None:
         current_time = datetime.now(timezone.utc)
         tasks_to_remove = []
@@ -46,12 +333,81 @@ class TaskManager:
                 tasks_to_remove.append(task_id)
         
         for task_id in tasks_to_remove:
-            self.active_tasks.pop(task_id, None)
-            self.task_results.pop(task_id, None)
-            self.task_metadata.pop(task_id, None)
+            await self.remove_task(task_id)
+
+        if self.checkpoint_dir:
+            # checkpoints of tasks lost in a restart and never resumed; anything
+            # else in the directory is not ours to delete
+            for name in os.listdir(self.checkpoint_dir):
+                path = os.path.join(self.checkpoint_dir, name)
+                if not is_checkpoint_file(name) or not os.path.isfile(path):
+                    continue
+                try:
+                    if time.time() - os.path.getmtime(path) > 3600:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
 
     async def remove_task(self, task_id: str) -> None:
         prevLen = len(self.active_tasks)
-        self.active_tasks.pop(task_id, None)
+        run = self._runs.pop(task_id, None)
+        if run is not None:
+            run.cancel()
+        self.scheduler.unregister(task_id)
+        optimizer = self.active_tasks.pop(task_id, None)
+        if optimizer is not None and optimizer.checkpointer is not None:
+            optimizer.checkpointer.remove()
         self.task_results.pop(task_id, None)
-        self.task_metadata.pop(task_id, None)
\ No newline at end of file
+        metadata = self.task_metadata.pop(task_id, None)
+        if metadata is not None and self._tasks_by_key.get(metadata.get('cache_key')) == task_id:
+            del self._tasks_by_key[metadata['cache_key']]
+
+    def task_status(self, task_id: str) -> Optional[dict]:
+        """Status with queue position and estimated start time while waiting for a slot."""
+        metadata = self.task_metadata.get(task_id)
+        if metadata is None:
+            return None
+        latest = self.task_results[task_id].latest
+        status = {'task_id': task_id, 'status': metadata['status'],
+                  'created_at': metadata['created_at'].isoformat(),
+                  'generation': None if latest is None else latest['generation']}
+        if metadata['status'] == 'initialized':
+            # waiting for its evaluating client: where a turn would queue right now
+            position, wait = self.scheduler.estimate(metadata['priority'])
+        else:
+            position = self.scheduler.position(task_id)
+            wait = None if position is None else self.scheduler.estimated_wait(position)
+            if position is not None:
+                status['status'] = 'queued'
+        if metadata.get('stop_reason'):
+            status['stop_reason'] = metadata['stop_reason']
+        if metadata.get('cached'):
+            status['message'] = "Result served from the cache"
+        if metadata['status'] == 'interrupted':
+            status['message'] = f"Resumes from generation {self.active_tasks[task_id].generation} on reconnect"
+        if wait is not None:
+            status['queue_position'] = position
+            status['estimated_start'] = (datetime.now(timezone.utc) + timedelta(seconds=wait)).isoformat()
+        return status
+
+    def render_metrics(self) -> str:
+        """Prometheus text exposition of every task's metrics."""
+        gauges = {
+            'ga_tasks_active': len(self.active_tasks),
+            'ga_tasks_waiting': self.scheduler.waiting,
+            'ga_tasks_running': len(self.scheduler.running),
+            'ga_scheduler_slots': self.scheduler.slots,
+            'ga_scheduler_free_slots': self.scheduler.free,
+            'ga_batch_jobs_running': sum(1 for job in self.batch_jobs.values() if not job.finished),
+            'ga_result_cache_entries': 0 if self.result_cache is None else len(self.result_cache),
+            'ga_executor_workers': self.executor_workers,
+        }
+        cache = self.result_cache
+        counters = {
+            'ga_result_cache_hits_total': 0 if cache is None else cache.hits,
+            'ga_result_cache_misses_total': 0 if cache is None else cache.misses,
+            'ga_result_cache_attached_total': 0 if cache is None else cache.attached,
+            'ga_result_cache_warm_starts_total': 0 if cache is None else cache.warm_starts,
+        }
+        tasks = [(task_id, metadata['metrics']) for task_id, metadata in self.task_metadata.items()]
+        return render_prometheus(tasks, gauges, self.loop_lag, counters)
@@ -0,0 +1,111 @@
+"""Coalesced, rate-limited delivery of evolution updates.
+
+The GA hands every generation's update to ``UpdatePublisher.publish``, which
+never blocks. A background sender delivers at most ``max_rate`` updates per
+second. While a send is in flight, newer updates replace the pending one, so a
+slow socket drops intermediate generations and never slows the GA down.
+
+Modes:
+    throttled    latest update at up to ``max_rate`` per second
+    improvement  like throttled, but only updates whose best_fitness changed
+    headless     nothing until the run finishes, then the final update
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from .metrics import TaskMetrics
+
+logger = logging.getLogger(__name__)
+
+UPDATE_MODES = ('throttled', 'improvement', 'headless')
+
+
+class UpdatePublisher:
+
+    def __init__(self, send: Callable[[dict], Awaitable[None]], mode: str = 'throttled', max_rate: Optional[float] = 10.0,
+                 metrics: Optional[TaskMetrics] = None):
+        if mode not in UPDATE_MODES:
+            raise ValueError(f"Unknown update mode '{mode}', expected one of {UPDATE_MODES}")
+        self._send = send
+        self.metrics = metrics
+        self.mode = mode
+        # None or 0 means no rate limit beyond what the socket accepts
+        self.interval = 1.0 / max_rate if max_rate else 0.0
+        self.published = 0
+        self.sent = 0
+        self._pending: Optional[dict] = None
+        self._latest: Optional[dict] = None
+        self._latest_sent = True
+        self._last_best: Optional[float] = None
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._sender: Optional[asyncio.Task] = None
+
+    @property
+    def coalesced(self) -> int:
+        """Updates that were replaced or filtered out before reaching the client."""
+        return self.published - self.sent
+
+    def publish(self, update_data: dict) -> None:
+        if self._error is not None:
+            raise self._error
+        self.published += 1
+        self._latest = update_data
+        self._latest_sent = False
+        if self.mode == 'headless':
+            return
+        if self.mode == 'improvement':
+            if update_data['best_fitness'] == self._last_best:
+                return
+            self._last_best = update_data['best_fitness']
+        self._pending = update_data
+        self._wakeup.set()
+        if self._sender is None:
+            self._sender = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        next_send = 0.0
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                if self._pending is not None:
+                    delay = next_send - time.perf_counter()
+                    if delay > 0:
+                        # keep collecting newer updates while waiting for the slot
+                        await asyncio.sleep(delay)
+                    update_data, self._pending = self._pending, None
+                    if update_data is not None:
+                        next_send = time.perf_counter() + self.interval
+                        await self._deliver(update_data)
+                if self._closed and self._pending is None:
+                    return
+        except Exception as e:
+            logger.warning(f"Update sender stopped: {e}")
+            self._error = e
+
+    async def _deliver(self, update_data: dict) -> None:
+        start = time.perf_counter()
+        await self._send(update_data)
+        self.sent += 1
+        if self.metrics is not None:
+            self.metrics.observe_phase('send', time.perf_counter() - start)
+            self.metrics.observe_send(update_data['generation'])
+        if update_data is self._latest:
+            self._latest_sent = True
+
+    async def close(self) -> None:
+        """Flush pending updates and make sure the final one reaches the client."""
+        self._closed = True
+        if self._sender is not None:
+            self._wakeup.set()
+            await self._sender
+        if self._error is not None:
+            raise self._error
+        if self._latest is not None and not self._latest_sent:
+            await self._deliver(self._latest)
+        if self.metrics is not None:
+            self.metrics.updates_coalesced += self.coalesced
@@ -0,0 +1,192 @@
+"""Compact binary WebSocket frames, negotiated with the ``ga.binary.v1`` subprotocol.
+
+JSON remains the default. A client that offers the subprotocol on connect
+receives every server message as a binary frame instead. Each frame starts
+with a little-endian header ``<2sBB``: the magic ``b'GA'``, the format
+version and the frame kind. Next comes a kind-specific fixed part, then raw
+little-endian arrays.
+
+``KIND_UPDATE`` (one per generation)::
+
+    <16s I d d d B B B I   task uuid, generation, best_fitness, average_fitness,
+                           population_diversity, status, flags, solution type, length
+    solution payload:
+      SOLUTION_ROUTE     int16/int32 city indices (FLAG_WIDE selects int32)
+      SOLUTION_REAL      float64 values
+      SOLUTION_ACTIONS   uint8 action codes followed by float32 durations
+    with FLAG_DELTA a route is sent as
+      <I count, uint32 positions[count], city indices[count]
+    patched onto the previous frame's best_solution.
+    The final update of a run sets FLAG_STOPPED, and a uint8 index into
+    STOP_REASONS sits between the fixed part and the solution payload.
+
+``KIND_POPULATION`` (GPA individuals to play out)::
+
+    <16s I I I I H   task uuid, generation, offset, individuals, steps, request id length
+    request id (utf-8), uint8 action codes [individuals*steps], float32 durations [individuals*steps]
+"""
+import struct
+import uuid
+from typing import Optional
+
+import numpy as np
+
+from .stopping import STOP_REASONS
+
+SUBPROTOCOL = 'ga.binary.v1'
+MAGIC = b'GA'
+VERSION = 1
+
+KIND_UPDATE = 1
+KIND_POPULATION = 2
+
+FLAG_DELTA = 0x01
+FLAG_WIDE = 0x02
+FLAG_STOPPED = 0x04
+
+SOLUTION_ROUTE = 0
+SOLUTION_REAL = 1
+SOLUTION_ACTIONS = 2
+
+# action codes used instead of the 'left'/'right'/'jump'/'pause' strings
+ACTIONS = ('left', 'right', 'jump', 'pause')
+STATUSES = ('running', 'completed', 'stopped', 'error')
+
+_HEADER = struct.Struct('<2sBB')
+_UPDATE = struct.Struct('<16sIdddBBBI')
+_POPULATION = struct.Struct('<16sIIIIH')
+_COUNT = struct.Struct('<I')
+_REASON = struct.Struct('<B')
+
+
+def encode_actions(actions: np.ndarray) -> np.ndarray:
+    codes = np.zeros(actions.shape, dtype=np.uint8)
+    for code, action in enumerate(ACTIONS):
+        codes[actions == action] = code
+    return codes
+
+
+def decode_actions(codes: np.ndarray) -> np.ndarray:
+    return np.array(ACTIONS)[codes]
+
+
+def to_json_update(update_data: dict) -> dict:
+    """Copy of an update with arrays converted for ``send_json``."""
+    data = dict(update_data)
+    if isinstance(data.get('best_solution'), np.ndarray):
+        data['best_solution'] = data['best_solution'].tolist()
+    return data
+
+
+def _task_bytes(task_id: str) -> bytes:
+    try:
+        return uuid.UUID(str(task_id)).bytes
+    except ValueError:
+        return bytes(16)
+
+
+class BinaryUpdateEncoder:
+    """Encodes one connection's updates, delta-encoding routes against the previous frame."""
+
+    def __init__(self):
+        self._previous: Optional[np.ndarray] = None
+
+    def encode(self, update_data: dict) -> bytes:
+        solution = np.asarray(update_data['best_solution'])
+        flags = 0
+        if solution.dtype.names is not None:
+            solution_type = SOLUTION_ACTIONS
+            payload = encode_actions(solution['action']).tobytes() + solution['duration'].astype('<f4').tobytes()
+        elif np.issubdtype(solution.dtype, np.integer):
+            solution_type = SOLUTION_ROUTE
+            wide = solution.size and int(solution.max()) > np.iinfo(np.int16).max
+            route = solution.astype('<i4' if wide else '<i2')
+            flags |= FLAG_WIDE if wide else 0
+            payload = route.tobytes()
+            if self._previous is not None and self._previous.shape == route.shape:
+                changed = np.flatnonzero(self._previous != route)
+                delta = _COUNT.pack(changed.size) + changed.astype('<u4').tobytes() + route[changed].tobytes()
+                if len(delta) < len(payload):
+                    flags |= FLAG_DELTA
+                    payload = delta
+            self._previous = route
+        else:
+            solution_type = SOLUTION_REAL
+            payload = solution.astype('<f8').tobytes()
+
+        stop_reason = b''
+        if update_data.get('stop_reason') in STOP_REASONS:
+            flags |= FLAG_STOPPED
+            stop_reason = _REASON.pack(STOP_REASONS.index(update_data['stop_reason']))
+
+        status = update_data.get('status', 'running')
+        fixed = _UPDATE.pack(
+            _task_bytes(update_data['task_id']),
+            update_data['generation'],
+            update_data['best_fitness'],
+            update_data['average_fitness'],
+            update_data['population_diversity'],
+            STATUSES.index(status) if status in STATUSES else 0,
+            flags,
+            solution_type,
+            solution.shape[0] if solution.ndim else 0,
+        )
+        return _HEADER.pack(MAGIC, VERSION, KIND_UPDATE) + fixed + stop_reason + payload
+
+
+def decode_update(frame: bytes, previous_solution: Optional[np.ndarray] = None) -> dict:
+    """Inverse of BinaryUpdateEncoder.encode, for Python clients and debugging."""
+    magic, version, kind = _HEADER.unpack_from(frame)
+    if magic != MAGIC or kind != KIND_UPDATE:
+        raise ValueError("Not an evolution update frame")
+    offset = _HEADER.size
+    (task, generation, best_fitness, average_fitness, diversity,
+     status, flags, solution_type, length) = _UPDATE.unpack_from(frame, offset)
+    offset += _UPDATE.size
+    stop_reason = None
+    if flags & FLAG_STOPPED:
+        stop_reason = STOP_REASONS[_REASON.unpack_from(frame, offset)[0]]
+        offset += _REASON.size
+
+    if solution_type == SOLUTION_ACTIONS:
+        actions = decode_actions(np.frombuffer(frame, dtype=np.uint8, count=length, offset=offset))
+        durations = np.frombuffer(frame, dtype='<f4', count=length, offset=offset + length)
+        solution = list(zip(actions.tolist(), durations.astype(float).tolist()))
+    elif solution_type == SOLUTION_ROUTE:
+        dtype = '<i4' if flags & FLAG_WIDE else '<i2'
+        if flags & FLAG_DELTA:
+            if previous_solution is None:
+                raise ValueError("Delta frame received without a previous solution")
+            (count,) = _COUNT.unpack_from(frame, offset)
+            positions = np.frombuffer(frame, dtype='<u4', count=count, offset=offset + _COUNT.size)
+            values = np.frombuffer(frame, dtype=dtype, count=count, offset=offset + _COUNT.size + 4 * count)
+            solution = np.array(previous_solution, dtype=dtype)
+            solution[positions] = values
+        else:
+            solution = np.frombuffer(frame, dtype=dtype, count=length, offset=offset).copy()
+    else:
+        solution = np.frombuffer(frame, dtype='<f8', count=length, offset=offset).copy()
+
+    update_data = {
+        'task_id': str(uuid.UUID(bytes=task)),
+        'generation': generation,
+        'best_fitness': best_fitness,
+        'best_solution': solution,
+        'average_fitness': average_fitness,
+        'population_diversity': diversity,
+        'status': STATUSES[status],
+    }
+    if stop_reason is not None:
+        update_data['stop_reason'] = stop_reason
+    return update_data
+
+
+def encode_population(task_id: str, generation: int, individuals: np.ndarray,
+                      offset: int = 0, request_id: str = '') -> bytes:
+    """Binary form of EVALUATE_POPULATION / EVALUATE_BATCH for GPA individuals."""
+    request = request_id.encode('utf-8')
+    n_individuals, steps = individuals.shape
+    fixed = _POPULATION.pack(_task_bytes(task_id), generation, offset, n_individuals, steps, len(request))
+    return (_HEADER.pack(MAGIC, VERSION, KIND_POPULATION) + fixed + request
+            + encode_actions(individuals['action']).tobytes()
+            + individuals['duration'].astype('<f4').tobytes())
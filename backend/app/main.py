@@ -1,11 +1,17 @@
+import asyncio
 import json
-from fastapi import FastAPI, WebSocket, HTTPException, Request
+from fastapi import FastAPI, WebSocket, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from .core import wire
+from .core.metrics import monitor_event_loop_lag
+from .core.throttle import UpdatePublisher
 from .core.task_manager import TaskManager
-from .models.schemas import OptimizationRequest, TaskResponse
+from .models.schemas import BatchRequest, BatchStatus, OptimizationRequest, TaskResponse
 import logging 
 import sys
 import os
+import tempfile
 
 # Configure logging
 logging.basicConfig(
@@ -20,12 +26,26 @@ logging.basicConfig(
 # Create logger for this file
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-task_manager = TaskManager()
-
 # Get environment variables with defaults
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
 PORT = int(os.getenv('PORT', 8000))
+# Worker processes for CPU-bound evolution; unset uses one per core, 0 disables the pool
+OPTIMIZER_WORKERS = os.getenv('OPTIMIZER_WORKERS')
+# Tasks computing at once; unset uses the worker count (one per core)
+OPTIMIZER_SLOTS = os.getenv('OPTIMIZER_SLOTS')
+# Checkpoints of running tasks, so a client that reconnects resumes its run; empty disables
+CHECKPOINT_DIR = os.getenv('CHECKPOINT_DIR', os.path.join(tempfile.gettempdir(), 'ga-checkpoints'))
+# Finished results shared by identical requests; size 0 disables the cache, an empty dir keeps it in memory only
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', 256))
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', 86400))
+RESULT_CACHE_DIR = os.getenv('RESULT_CACHE_DIR', '')
+
+app = FastAPI()
+task_manager = TaskManager(max_workers=int(OPTIMIZER_WORKERS) if OPTIMIZER_WORKERS else None,
+                           slots=int(OPTIMIZER_SLOTS) if OPTIMIZER_SLOTS else None,
+                           checkpoint_dir=CHECKPOINT_DIR or None,
+                           result_cache_size=RESULT_CACHE_SIZE, result_cache_ttl=RESULT_CACHE_TTL,
+                           result_cache_dir=RESULT_CACHE_DIR or None)
 
 # Configure CORS
 app.add_middleware(
@@ -36,6 +56,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    app.state.loop_lag_monitor = asyncio.ensure_future(monitor_event_loop_lag(task_manager.loop_lag))
+
+@app.on_event("startup")
+async def resume_checkpointed_tasks():
+    await task_manager.resume_checkpoints()
+
+@app.on_event("shutdown")
+async def shutdown_task_manager():
+    app.state.loop_lag_monitor.cancel()
+    await task_manager.shutdown()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(task_manager.render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check(request: Request):
     # Directly inspect the headers that the application is receiving
@@ -53,57 +90,161 @@ async def health_check(request: Request):
 @app.post("/api/tasks", response_model=TaskResponse)
 async def create_task(request: OptimizationRequest):
     try:
-        task_id = await task_manager.create_task(request.dict())
-        return TaskResponse(task_id=task_id, status="created")
+        task_id, cache = await task_manager.create_task(request.dict())
+        status = task_manager.task_status(task_id)
+        # a shared task reports where it is, a new one that it was created
+        return TaskResponse(task_id=task_id, status=status['status'] if cache in ('attached', 'hit') else "created",
+                            created_at=status['created_at'], message=status.get('message'),
+                            queue_position=status.get('queue_position'),
+                            estimated_start=status.get('estimated_start'), cache=cache)
     except ValueError as e:
         raise HTTPException(status_code=429, detail=str(e))
 
+@app.get("/api/tasks/{task_id}/results")
+async def get_task_results(task_id: str, from_generation: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    results = task_manager.task_results.get(task_id)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return {
+        'task_id': task_id,
+        'status': task_manager.task_metadata[task_id]['status'],
+        'updates': [wire.to_json_update(update_data) for update_data in results.since(from_generation, limit)],
+    }
+
+@app.get("/api/tasks/{task_id}", response_model=TaskResponse)
+async def get_task(task_id: str):
+    status = task_manager.task_status(task_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return TaskResponse(**status)
+
+async def ndjson_lines(results):
+    async for result in results:
+        yield json.dumps(result) + '\n'
+
+@app.post("/api/batches")
+async def create_batch(request: BatchRequest):
+    """Solve every instance and stream the results as NDJSON in completion order.
+
+    The job keeps running if the client disconnects; its id is in the
+    X-Batch-Id header for polling.
+    """
+    try:
+        job_id = await task_manager.create_batch([instance.dict() for instance in request.instances],
+                                                 request.priority, request.instances_per_chunk)
+    except ValueError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return StreamingResponse(ndjson_lines(task_manager.batch_jobs[job_id].stream()),
+                             media_type="application/x-ndjson",
+                             headers={'X-Batch-Id': job_id, 'Location': f"/api/batches/{job_id}"})
+
+@app.get("/api/batches/{job_id}", response_model=BatchStatus)
+async def get_batch(job_id: str):
+    job = task_manager.batch_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return BatchStatus(**job.progress())
+
+@app.get("/api/batches/{job_id}/results")
+async def get_batch_results(job_id: str, offset: int = Query(0, ge=0)):
+    """Results from ``offset`` in completion order as NDJSON, following the job until it finishes."""
+    job = task_manager.batch_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return StreamingResponse(ndjson_lines(job.stream(offset)), media_type="application/x-ndjson")
+
 @app.websocket("/ws/tasks/{task_id}")
 async def task_websocket(websocket: WebSocket, task_id: str):
-    await websocket.accept()
+    # clients that offer the binary subprotocol get compact frames, everyone else JSON
+    binary = wire.SUBPROTOCOL in websocket.scope.get('subprotocols', [])
+    await websocket.accept(subprotocol=wire.SUBPROTOCOL if binary else None)
     try:
-        optimizer = task_manager.active_tasks.get(task_id)
+        optimizer = task_manager.active_tasks.get(task_id) or await task_manager.restore_task(task_id)
         if not optimizer:
             logger.info("optimizer is null")
             await websocket.close(code=4004)
             return
+        results = task_manager.task_results[task_id]
+        metadata = task_manager.task_metadata[task_id]
+
+        # clients may ask for a different update frame rate, 0 meaning unthrottled
+        update_rate = optimizer.update_rate
+        fps = websocket.query_params.get('fps')
+        if fps is not None:
+            try:
+                update_rate = max(0.0, float(fps))
+            except ValueError:
+                logger.warning(f"Task {task_id}: ignoring invalid fps '{fps}'")
+        # replay buffered generations from this offset before following live updates
+        replay_from = websocket.query_params.get('from_generation')
+        encoder = wire.BinaryUpdateEncoder()
 
         async def update_callback(data):
-            await websocket.send_json(data)
+            if binary:
+                await websocket.send_bytes(encoder.encode(data))
+            else:
+                await websocket.send_json(wire.to_json_update(data))
             
 
-        async def close_callback():
-            await task_manager.remove_task(task_id)
-            await websocket.close()
-
         async def wait_for_frontend():
             recieved = False
             while not recieved:
-                logger.info("await recieve text from front-end")
+                logger.debug("await recieve text from front-end")
                 data = await websocket.receive_text()
                 message = json.loads(data)
-                logger.info(f"Task {task_id}: Received message from client: {message}")
+                logger.debug(f"Task {task_id}: Received message from client: {message}")
                 
-                if message.get("type") == "FITNESS_RESULTS":
+                if message.get("type") in ("FITNESS_RESULTS", "FITNESS_RESULT"):
                     received_task_id = message.get("taskId")
                     scores = message.get("scores")
+                    request_id = message.get("requestId")
                     # generation = message.get("generation") # Optional: if you need to match generation
 
-                    if received_task_id == task_id and scores is not None:
+                    if received_task_id != task_id:
+                        logger.warning(f"Task {task_id}: Received fitness results for mismatched task ID {received_task_id}.")
+                    elif message["type"] == "FITNESS_RESULT" and request_id is not None:
+                        # one individual of a streamed batch
+                        optimizer.set_gpa_fitness_results(None, request_id=request_id,
+                                                          index=message.get("index"), score=message.get("score"))
+                    elif scores is not None:
                         # Find the correct optimizer instance (already have it as `optimizer`)
                         # and set its fitness results
-                        optimizer.set_gpa_fitness_results(scores)
+                        optimizer.set_gpa_fitness_results(scores, request_id=request_id)
                     else:
-                        logger.warning(f"Task {task_id}: Received FITNESS_RESULTS for mismatched task ID {received_task_id} or missing scores.")
+                        logger.warning(f"Task {task_id}: Received FITNESS_RESULTS with missing scores.")
                     
                     recieved = True
                 # Handle other client messages if any (e.g., pause, resume, early stop)
 
-        await optimizer.evolve(task_id, update_callback, close_callback, wait_for_frontend, websocket=websocket)
+        if metadata['status'] in ('initialized', 'interrupted'):
+            if optimizer.generation > 0:
+                logger.info(f"Task {task_id}: resuming at generation {optimizer.generation}")
+            if optimizer.needs_client:
+                # the first client to connect evaluates the population in its browser
+                optimizer.wire_format = 'binary' if binary else 'json'
+                task_manager.start_task(task_id, wait_for_frontend, websocket)
+            else:
+                task_manager.start_task(task_id)
+
+        # every connection is a viewer of the shared run
+        next_generation = 0
+        if replay_from is not None:
+            for update_data in results.since(int(replay_from)):
+                await update_callback(update_data)
+                next_generation = update_data['generation'] + 1
+        publisher = UpdatePublisher(update_callback, mode=optimizer.update_mode, max_rate=update_rate,
+                                    metrics=optimizer.metrics)
+        async for update_data in results.subscribe(next_generation):
+            publisher.publish(update_data)
+        await publisher.close()
+        if results.error is not None:
+            await websocket.close(code=1011)
+        else:
+            await websocket.close()
 
 
     except Exception as e:
+        # a viewer going away does not affect the run
         logger.info(e)
-        await task_manager.remove_task(task_id)
         await websocket.close(code=1011)
 
@@ -2,12 +2,20 @@ from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict
 from enum import Enum
 
+from ..core.functions import CROSSOVERS, DTYPES, MUTATIONS, OBJECTIVES
+
 class ProblemType(str, Enum):
     TSP = "tsp"
     GPA = "GPA"
-    #FUNCTION_OPTIMIZATION = "function_optimization"
+    FUNCTION_OPTIMIZATION = "function_optimization"
     #KNAPSACK = "knapsack"
 
+# bounds the memory of one task's population buffers
+MAX_GENES = 10_000_000
+
+# instances in one batch request
+MAX_BATCH_INSTANCES = 1000
+
 class OptimizationRequest(BaseModel):
     problem_type: ProblemType
     population_size: int = Field(
@@ -19,8 +27,8 @@ class OptimizationRequest(BaseModel):
     dimension: int = Field(
         default=10,
         ge=2,
-        le=100,
-        description="Dimension of the problem space"
+        le=100_000,
+        description="Dimension of the problem space; at most 100 for GPA"
     )
     mutation_rate: float = Field(
         default=0.1,
@@ -40,23 +48,194 @@ class OptimizationRequest(BaseModel):
         le=1000,
         description="Maximum number of generations"
     )
+    seed: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Seed for the task's random generator, for reproducible runs"
+    )
+    priority: int = Field(
+        default=0,
+        ge=0,
+        le=10,
+        description="Scheduling priority, higher values get execution slots first"
+    )
     parameters: Optional[Dict] = Field(
         default={},
         description="Additional problem-specific parameters"
     )
+    cache: str = Field(
+        default="reuse",
+        regex="^(reuse|warm_start|off)$",
+        description="'reuse' shares identical runs and finished results, 'warm_start' seeds a new run "
+                    "from a finished one's elites, 'off' always runs from scratch"
+    )
+
+    @validator('dimension')
+    def validate_dimension(cls, v, values):
+        if v > 100 and values.get('problem_type') == ProblemType.GPA:
+            raise ValueError("dimension above 100 is not supported for GPA")
+        # the population, parents and offspring each hold this many genes
+        if v * values.get('population_size', 50) > MAX_GENES:
+            raise ValueError(f"population_size * dimension must not exceed {MAX_GENES}")
+        return v
 
     @validator('parameters')
     def validate_parameters(cls, v, values):
         if values['problem_type'] == ProblemType.TSP:
             if 'cities' not in v:
                 raise ValueError("TSP problem type requires 'cities' parameter")
+        if v.get('function'):
+            if values['problem_type'] != ProblemType.FUNCTION_OPTIMIZATION:
+                raise ValueError("'function' is only supported for function_optimization")
+            function = v['function']
+            allowed = {'objective', 'bounds', 'dtype', 'crossover', 'alpha', 'eta_c',
+                       'mutation', 'eta_m', 'sigma', 'gene_rate'}
+            if not isinstance(function, dict) or not set(function) <= allowed:
+                raise ValueError(f"'function' must be an object with keys from {sorted(allowed)}")
+            if function.get('objective', 'sphere') not in OBJECTIVES:
+                raise ValueError(f"'function.objective' must be one of {sorted(OBJECTIVES)}")
+            bounds = function.get('bounds', [0, 1])
+            if not isinstance(bounds, list) or len(bounds) != 2 or not bounds[0] < bounds[1]:
+                raise ValueError("'function.bounds' must be [low, high] with low < high")
+            for key, options in (('dtype', DTYPES), ('crossover', CROSSOVERS), ('mutation', MUTATIONS)):
+                if key in function and function[key] not in options:
+                    raise ValueError(f"'function.{key}' must be one of {list(options)}")
+            for key in ('alpha', 'eta_c', 'eta_m', 'sigma'):
+                if function.get(key) is not None and function[key] < 0:
+                    raise ValueError(f"'function.{key}' must not be negative")
+            if function.get('gene_rate') is not None and not 0 < function['gene_rate'] <= 1:
+                raise ValueError("'function.gene_rate' must be between 0 and 1")
+        if v.get('updates'):
+            updates = v['updates']
+            if not isinstance(updates, dict):
+                raise ValueError("'updates' must be an object such as {'mode': 'throttled', 'max_rate': 10}")
+            if updates.get('mode', 'throttled') not in ('throttled', 'improvement', 'headless'):
+                raise ValueError("'updates.mode' must be 'throttled', 'improvement' or 'headless'")
+            if updates.get('max_rate', 10) is not None and updates.get('max_rate', 10) < 0:
+                raise ValueError("'updates.max_rate' must not be negative")
+        if v.get('gpa_evaluator'):
+            if values['problem_type'] != ProblemType.GPA:
+                raise ValueError("'gpa_evaluator' is only supported for GPA")
+            gpa_evaluator = v['gpa_evaluator']
+            if not isinstance(gpa_evaluator, dict) or gpa_evaluator.get('mode', 'client') not in ('client', 'simulator'):
+                raise ValueError("'gpa_evaluator' must be an object such as {'mode': 'simulator', 'fps': 60}")
+            if not 10 <= gpa_evaluator.get('fps', 60) <= 240:
+                raise ValueError("'gpa_evaluator.fps' must be between 10 and 240")
+        if v.get('gpa_stream'):
+            if values['problem_type'] != ProblemType.GPA:
+                raise ValueError("'gpa_stream' is only supported for GPA")
+            gpa_stream = v['gpa_stream']
+            allowed = {'batch_size', 'max_in_flight', 'timeout', 'penalty'}
+            if not isinstance(gpa_stream, dict) or not set(gpa_stream) <= allowed:
+                raise ValueError(f"'gpa_stream' must be an object with keys from {sorted(allowed)}")
+        # an empty object enables it with its defaults
+        if v.get('local_search') is not None:
+            if values['problem_type'] != ProblemType.TSP:
+                raise ValueError("'local_search' is only supported for TSP")
+            local_search = v['local_search']
+            if not isinstance(local_search, dict):
+                raise ValueError("'local_search' must be an object such as {'elite': 2, 'time_budget': 0.01}")
+            if not 0 < local_search.get('time_budget', 0.01) <= 1:
+                raise ValueError("'local_search.time_budget' must be between 0 and 1 second")
+        if v.get('seeding') is not None:
+            if values['problem_type'] != ProblemType.TSP:
+                raise ValueError("'seeding' is only supported for TSP")
+            seeding = v['seeding']
+            if not isinstance(seeding, dict):
+                raise ValueError("'seeding' must be an object such as {'fraction': 0.2, 'methods': ['nearest_neighbor']}")
+            if not 0 < seeding.get('fraction', 0.2) <= 1:
+                raise ValueError("'seeding.fraction' must be between 0 and 1")
+            methods = seeding.get('methods', ['nearest_neighbor', 'greedy', 'space_filling'])
+            if not methods or not set(methods) <= {'nearest_neighbor', 'greedy', 'space_filling'}:
+                raise ValueError("'seeding.methods' must list 'nearest_neighbor', 'greedy' or 'space_filling'")
+        if v.get('large_instance') is not None:
+            if values['problem_type'] != ProblemType.TSP:
+                raise ValueError("'large_instance' is only supported for TSP")
+            large_instance = v['large_instance']
+            if not isinstance(large_instance, dict):
+                raise ValueError("'large_instance' must be an object such as {'neighbors': 10}")
+            if not 4 <= large_instance.get('neighbors', 10) <= 32:
+                raise ValueError("'large_instance.neighbors' must be between 4 and 32")
+        if v.get('stopping') is not None:
+            stopping = v['stopping']
+            allowed = {'stagnation', 'min_improvement', 'target_fitness', 'min_diversity', 'time_limit',
+                       'on_stagnation', 'max_restarts', 'hypermutation_rounds'}
+            if not isinstance(stopping, dict) or not set(stopping) <= allowed:
+                raise ValueError(f"'stopping' must be an object with keys from {sorted(allowed)}")
+            for key in ('stagnation', 'max_restarts', 'hypermutation_rounds'):
+                if stopping.get(key) is not None and (not isinstance(stopping[key], int) or stopping[key] < 1):
+                    raise ValueError(f"'stopping.{key}' must be a positive integer")
+            for key in ('min_improvement', 'min_diversity', 'time_limit'):
+                if stopping.get(key) is not None and stopping[key] < 0:
+                    raise ValueError(f"'stopping.{key}' must not be negative")
+            if stopping.get('on_stagnation', 'stop') not in ('stop', 'restart', 'hypermutate'):
+                raise ValueError("'stopping.on_stagnation' must be 'stop', 'restart' or 'hypermutate'")
+        if v.get('islands') is not None:
+            if values['problem_type'] == ProblemType.GPA:
+                raise ValueError("The island model is not supported for GPA")
+            islands = v['islands']
+            if not isinstance(islands, dict):
+                raise ValueError("'islands' must be an object such as {'count': 4}")
+            if islands.get('topology', 'ring') not in ('ring', 'fully_connected'):
+                raise ValueError("'islands.topology' must be 'ring' or 'fully_connected'")
+            if not 1 <= islands.get('count', 4) <= 64:
+                raise ValueError("'islands.count' must be between 1 and 64")
+            if islands.get('migration_interval', 10) < 1:
+                raise ValueError("'islands.migration_interval' must be at least 1")
+            if islands.get('migration_size', 2) < 0:
+                raise ValueError("'islands.migration_size' must not be negative")
         return v
 
+class BatchRequest(BaseModel):
+    instances: List[OptimizationRequest] = Field(
+        ...,
+        min_items=1,
+        max_items=MAX_BATCH_INSTANCES,
+        description="Independent instances, each solved to completion"
+    )
+    priority: int = Field(
+        default=0,
+        ge=0,
+        le=10,
+        description="Scheduling priority of the batch's chunks"
+    )
+    instances_per_chunk: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=100,
+        description="Instances solved per worker round trip; chosen from the batch size when unset"
+    )
+
+    @validator('instances', each_item=True)
+    def validate_instance(cls, v):
+        parameters = v.parameters or {}
+        if v.problem_type == ProblemType.GPA and (parameters.get('gpa_evaluator') or {}).get('mode') != 'simulator':
+            raise ValueError("GPA instances in a batch need {'gpa_evaluator': {'mode': 'simulator'}}")
+        if parameters.get('islands') is not None:
+            raise ValueError("The island model is not supported in a batch")
+        return v
+
+class BatchStatus(BaseModel):
+    job_id: str
+    status: str
+    total: int
+    completed: int
+    failed: int
+    created_at: str
+    finished_at: Optional[str] = None
+    elapsed_seconds: float
+
 class TaskResponse(BaseModel):
     task_id: str
     status: str
     created_at: Optional[str] = None
     message: Optional[str] = None
+    queue_position: Optional[int] = None
+    estimated_start: Optional[str] = None
+    generation: Optional[int] = None
+    stop_reason: Optional[str] = None
+    # 'attached', 'hit' or 'warm_start' when an identical request was reused, see result_cache.py
+    cache: Optional[str] = None
 
 class EvolutionUpdate(BaseModel):
     task_id: str
@@ -68,6 +247,7 @@ class EvolutionUpdate(BaseModel):
     population_diversity: Optional[float] = None
     status: str
     elapsed_time: Optional[float] = None
+    stop_reason: Optional[str] = None
 
 class TaskStatus(BaseModel):
     task_id: str
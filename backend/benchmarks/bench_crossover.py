@@ -0,0 +1,73 @@
+"""Benchmark batched order crossover against the original per-child loop.
+
+The correctness checks against the same reference loop live in
+tests/test_operators.py.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_crossover
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.core.operators import order_crossover, random_cut_points
+
+POPULATION_SIZES = [10, 100, 1000]
+DIMENSIONS = [2, 10, 50, 100]
+
+
+def legacy_order_crossover(parents1: np.ndarray, parents2: np.ndarray, cut_points: np.ndarray) -> np.ndarray:
+    """The original list-based OX loop, kept as the reference implementation."""
+    n_rows, dimension = parents1.shape
+    offspring = np.full((n_rows, dimension), -1)
+    for i in range(n_rows):
+        point1, point2 = cut_points[i]
+        parent1 = parents1[i].tolist()
+        parent2 = parents2[i].tolist()
+        offspring_route = [-1] * dimension
+        offspring_route[point1:point2] = parent1[point1:point2]
+        remaining = [gene for gene in parent2 if gene not in offspring_route[point1:point2]]
+        if point1 > 0:
+            offspring_route[:point1] = remaining[:point1]
+        if point2 < dimension:
+            offspring_route[point2:] = remaining[point1:]
+        offspring[i] = np.array(offspring_route, dtype=int)
+    return offspring
+
+
+def random_parents(rng: np.random.Generator, population_size: int, dimension: int) -> np.ndarray:
+    return rng.permuted(np.tile(np.arange(dimension), (population_size, 1)), axis=1)
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'population':>10} {'dimension':>9} {'legacy ms':>10} {'batched ms':>10} {'speedup':>8}")
+    for population_size in POPULATION_SIZES:
+        for dimension in DIMENSIONS:
+            parents1 = random_parents(rng, population_size, dimension)
+            parents2 = random_parents(rng, population_size, dimension)
+            cut_points = random_cut_points(rng, population_size, dimension)
+            legacy_time = best_of(lambda: legacy_order_crossover(parents1, parents2, cut_points), args.repeat)
+            batched_time = best_of(lambda: order_crossover(parents1, parents2, cut_points), args.repeat)
+            print(f"{population_size:>10} {dimension:>9} {legacy_time * 1000:>10.3f} "
+                  f"{batched_time * 1000:>10.3f} {legacy_time / batched_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
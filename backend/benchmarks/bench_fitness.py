@@ -0,0 +1,77 @@
+"""Benchmark the vectorized TSP scorer against the original per-pair loop.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_fitness
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from app.core.optimizer import GeneticOptimizer
+
+
+def legacy_fitness(optimizer: GeneticOptimizer) -> np.ndarray:
+    """The original double-loop scorer, kept as the reference implementation."""
+    fitness = np.zeros(optimizer.population_size)
+    for i in range(optimizer.population_size):
+        route = optimizer.population[i].astype(int)
+        distance = 0
+        for j in range(optimizer.dimension):
+            city1 = optimizer.cities[route[j]]
+            city2 = optimizer.cities[route[(j + 1) % optimizer.dimension]]
+            distance += np.sqrt(np.sum((city1 - city2) ** 2))
+        fitness[i] = -distance
+    return fitness
+
+
+def vectorized_fitness(optimizer: GeneticOptimizer) -> np.ndarray:
+    # score every tour from scratch instead of returning the cached lengths
+    optimizer.tour_lengths[:] = np.nan
+    return asyncio.run(optimizer._evaluate_population(None, None))
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--population-size', type=int, default=1000)
+    parser.add_argument('--dimension', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    cities = rng.uniform(0, 1000, size=(args.dimension, 2)).tolist()
+    optimizer = GeneticOptimizer({
+        'problem_type': 'tsp',
+        'population_size': args.population_size,
+        'dimension': args.dimension,
+        'seed': args.seed,
+        'parameters': {'cities': cities},
+    })
+
+    expected = legacy_fitness(optimizer)
+    actual = vectorized_fitness(optimizer)
+    if not np.allclose(expected, actual):
+        raise SystemExit("Vectorized fitness does not match the reference scorer")
+
+    legacy_time = best_of(lambda: legacy_fitness(optimizer), args.repeat)
+    vectorized_time = best_of(lambda: vectorized_fitness(optimizer), args.repeat)
+    print(f"population={optimizer.population_size} dimension={optimizer.dimension}")
+    print(f"legacy:     {legacy_time * 1000:10.3f} ms")
+    print(f"vectorized: {vectorized_time * 1000:10.3f} ms")
+    print(f"speedup:    {legacy_time / vectorized_time:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Seeded TSP instances for benchmarks: uniform, clustered and TSPLIB files."""
+from typing import List
+
+import numpy as np
+
+
+def uniform_cities(n_cities: int, seed: int = 0, size: float = 1000.0) -> np.ndarray:
+    """Cities drawn uniformly from a size x size square."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, size, size=(n_cities, 2))
+
+
+def clustered_cities(n_cities: int, seed: int = 0, n_clusters: int = 8, size: float = 1000.0,
+                     spread: float = 0.03) -> np.ndarray:
+    """Cities scattered normally around a few uniform cluster centres."""
+    rng = np.random.default_rng(seed)
+    n_clusters = max(1, min(n_clusters, n_cities))
+    centres = rng.uniform(0, size, size=(n_clusters, 2))
+    assignment = rng.integers(0, n_clusters, size=n_cities)
+    cities = centres[assignment] + rng.normal(0, spread * size, size=(n_cities, 2))
+    return np.clip(cities, 0, size)
+
+
+def load_tsplib(path: str) -> np.ndarray:
+    """Read the NODE_COORD_SECTION of a TSPLIB file with 2D coordinates (e.g. EUC_2D)."""
+    coordinates: List[List[float]] = []
+    in_coordinates = False
+    with open(path) as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('NODE_COORD_SECTION'):
+                in_coordinates = True
+                continue
+            if in_coordinates:
+                if line == 'EOF' or not line[0].isdigit():
+                    break
+                _, x, y = line.split()[:3]
+                coordinates.append([float(x), float(y)])
+    if not coordinates:
+        raise ValueError(f"No NODE_COORD_SECTION coordinates found in {path}")
+    return np.array(coordinates)
+
+
+def make_instance(kind: str, n_cities: int, seed: int = 0) -> np.ndarray:
+    """``uniform``, ``clustered`` or ``tsplib:<path>`` (the file sets the city count)."""
+    if kind == 'uniform':
+        return uniform_cities(n_cities, seed)
+    if kind == 'clustered':
+        return clustered_cities(n_cities, seed)
+    if kind.startswith('tsplib:'):
+        return load_tsplib(kind.split(':', 1)[1])
+    raise ValueError(f"Unknown instance kind '{kind}'")
@@ -0,0 +1,186 @@
+"""Benchmark suite for the GeneticOptimizer hot paths.
+
+Times fitness evaluation, selection, crossover, mutation and a full evolve
+loop (with no-op callbacks and headless updates) across a grid of population
+sizes and dimensions. Results are written as JSON so two commits can be
+compared. Everything runs offline.
+
+Run from the backend directory:
+
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --output after.json --compare before.json
+    python -m benchmarks.run --instance clustered --profile run.prof
+
+``--profile`` writes cProfile stats, which can be viewed with ``snakeviz`` or
+turned into a flamegraph with ``flameprof``.
+"""
+import argparse
+import asyncio
+import cProfile
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app.core.optimizer import GeneticOptimizer
+
+from .instances import make_instance
+
+PHASES = ('evaluate', 'select', 'crossover', 'mutate', 'evolve')
+
+
+def _parse_grid(value: str) -> List[int]:
+    return [int(item) for item in value.split(',') if item]
+
+
+def _timings(func: Callable[[], None], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _make_optimizer(cities: np.ndarray, population_size: int, seed: int, max_generations: int) -> GeneticOptimizer:
+    return GeneticOptimizer({
+        'problem_type': 'tsp',
+        'population_size': population_size,
+        'dimension': len(cities),
+        'max_generations': max_generations,
+        'seed': seed,
+        'parameters': {'cities': cities.tolist(), 'updates': {'mode': 'headless'}},
+    })
+
+
+async def _noop(*args, **kwargs) -> None:
+    return None
+
+
+def bench_case(cities: np.ndarray, population_size: int, seed: int, repeat: int, generations: int) -> Dict[str, List[float]]:
+    """Time every phase for one (population, dimension) point."""
+    optimizer = _make_optimizer(cities, population_size, seed, generations)
+    fitness = optimizer._compute_fitness()
+    parents1, parents2 = optimizer._select_parents(fitness)
+    parents1, parents2 = parents1.copy(), parents2.copy()
+    offspring = optimizer._crossover(parents1, parents2).copy()
+
+    def evaluate():
+        # forget the cached tour lengths, or every call after the first is a lookup
+        optimizer.tour_lengths[:] = np.nan
+        optimizer._compute_fitness()
+
+    results = {
+        'evaluate': _timings(evaluate, repeat),
+        'select': _timings(lambda: optimizer._select_parents(fitness), repeat),
+        'crossover': _timings(lambda: optimizer._crossover(parents1, parents2), repeat),
+        'mutate': _timings(lambda: optimizer._mutate(offspring.copy()), repeat),
+    }
+
+    def run_evolve():
+        evolving = _make_optimizer(cities, population_size, seed, generations)
+        asyncio.run(evolving.evolve('benchmark', _noop, _noop, _noop))
+
+    # per-generation time of a full evolve loop
+    results['evolve'] = [t / generations for t in _timings(run_evolve, max(1, repeat // 5))]
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(args) -> dict:
+    results = []
+    for dimension in args.dimensions:
+        cities = make_instance(args.instance, dimension, args.seed)
+        for population_size in args.populations:
+            timings = bench_case(cities, population_size, args.seed, args.repeat, args.generations)
+            for phase in PHASES:
+                samples = timings[phase]
+                results.append({
+                    'instance': args.instance,
+                    'population_size': population_size,
+                    'dimension': len(cities),
+                    'phase': phase,
+                    'min_ms': min(samples) * 1000,
+                    'median_ms': statistics.median(samples) * 1000,
+                    'samples': len(samples),
+                })
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'generations': args.generations,
+        },
+        'results': results,
+    }
+
+
+def _key(entry: dict) -> tuple:
+    return entry['instance'], entry['population_size'], entry['dimension'], entry['phase']
+
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    previous = {_key(entry): entry for entry in baseline['results']} if baseline else {}
+    header = f"{'population':>10} {'dimension':>9} {'phase':>10} {'median ms':>10}"
+    print(header + (f" {'baseline':>10} {'ratio':>7}" if baseline else ''))
+    for entry in report['results']:
+        line = f"{entry['population_size']:>10} {entry['dimension']:>9} {entry['phase']:>10} {entry['median_ms']:>10.3f}"
+        old = previous.get(_key(entry))
+        if old is not None:
+            line += f" {old['median_ms']:>10.3f} {entry['median_ms'] / old['median_ms']:>6.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--instance', default='uniform', help="uniform, clustered or tsplib:<path>")
+    parser.add_argument('--populations', type=_parse_grid, default=[10, 100, 1000])
+    parser.add_argument('--dimensions', type=_parse_grid, default=[10, 50, 100])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--generations', type=int, default=20, help="generations per full evolve run")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON report here")
+    parser.add_argument('--compare', help="JSON report of a previous run to compare against")
+    parser.add_argument('--profile', help="write cProfile stats of the whole run here")
+    args = parser.parse_args()
+    if args.instance.startswith('tsplib:'):
+        # the file fixes the city count
+        args.dimensions = [0]
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    report = run_suite(args)
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
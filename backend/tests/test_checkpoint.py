@@ -0,0 +1,83 @@
+"""Checkpoint files and their cleanup, see app/core/checkpoint.py."""
+import asyncio
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+from app.core.checkpoint import Checkpointer, checkpoint_path, is_checkpoint_file, read_checkpoint
+from app.core.islands import IslandModel
+from app.core.task_manager import TaskManager, build_optimizer
+
+
+def test_checkpoint_file_names():
+    task_id = str(uuid.uuid4())
+    assert is_checkpoint_file(f'{task_id}.npz')
+    assert is_checkpoint_file(f'{task_id}.npz.tmp')
+    assert not is_checkpoint_file(f'{task_id}.json')
+    assert not is_checkpoint_file('results.npz')
+    assert not is_checkpoint_file('notes.txt')
+
+
+def test_cleanup_only_removes_stale_checkpoints(tmp_path):
+    task_id = str(uuid.uuid4())
+    stale = [f'{task_id}.npz', f'{task_id}.npz.tmp']
+    foreign = ['notes.txt', 'results.npz']
+    for name in stale + foreign:
+        (tmp_path / name).touch()
+    (tmp_path / 'subdirectory').mkdir()
+    for name in stale + foreign + ['subdirectory']:
+        os.utime(tmp_path / name, (0, 0))
+
+    manager = TaskManager(max_workers=0, checkpoint_dir=str(tmp_path))
+    asyncio.run(manager._cleanup_old_tasks())
+    assert sorted(os.listdir(tmp_path)) == sorted(foreign + ['subdirectory'])
+
+
+def advance(optimizer, generations: int) -> list:
+    """Best fitness and solution of every generation, for single populations and island models."""
+    if isinstance(optimizer, IslandModel):
+        updates = []
+        for _ in range(generations // optimizer.migration_interval):
+            island_updates = asyncio.run(optimizer._run_epoch('task', optimizer.migration_interval, None))
+            updates += optimizer._merge_updates('task', island_updates)
+            optimizer._migrate()
+    else:
+        updates = [optimizer.step('task') for _ in range(generations)]
+    return [(update['best_fitness'], np.asarray(update['best_solution'])) for update in updates]
+
+
+def tsp_config(**parameters) -> dict:
+    cities = np.random.default_rng(0).uniform(0, 1000, size=(30, 2)).tolist()
+    return {'problem_type': 'tsp', 'population_size': 20, 'dimension': 30, 'max_generations': 40, 'seed': 7,
+            'parameters': dict(parameters, cities=cities, stopping={'stagnation': 100})}
+
+
+@pytest.mark.parametrize('config', [
+    tsp_config(),
+    tsp_config(islands={'count': 2, 'migration_interval': 3}),
+    {'problem_type': 'function_optimization', 'population_size': 20, 'dimension': 8, 'max_generations': 40,
+     'seed': 7, 'parameters': {'function': {'objective': 'rastrigin'}}},
+], ids=['tsp', 'islands', 'function'])
+def test_restored_checkpoint_continues_identically(tmp_path, config):
+    config['task_id'] = str(uuid.uuid4())
+    original = build_optimizer(config)
+    advance(original, 9)
+    path = checkpoint_path(str(tmp_path), config['task_id'])
+    asyncio.run(Checkpointer(path, config).save(original))
+
+    saved_config, arrays = read_checkpoint(path)
+    assert saved_config == config
+    restored = build_optimizer(saved_config)
+    restored.restore_arrays(arrays)
+    assert restored.generation == original.generation
+    assert restored.best_fitness == original.best_fitness
+    restored_arrays = restored.checkpoint_arrays()
+    for key, value in original.checkpoint_arrays().items():
+        # NaN tour lengths still have to be rescored and compare equal here
+        np.testing.assert_array_equal(restored_arrays[key], value, err_msg=key)
+
+    for (expected_fitness, expected_solution), (fitness, solution) in zip(advance(original, 9), advance(restored, 9)):
+        assert fitness == expected_fitness
+        assert np.array_equal(solution, expected_solution)
@@ -0,0 +1,27 @@
+"""Edge assembly crossover of app/core/eax.py."""
+import numpy as np
+import pytest
+
+from app.core.candidates import CandidateGraph
+from app.core.eax import eax_crossover
+
+
+@pytest.mark.parametrize('n_cities', [6, 20, 100])
+def test_children_are_permutations_with_exact_deltas(n_cities):
+    rng = np.random.default_rng(n_cities)
+    graph = CandidateGraph(rng.uniform(0, 1000, size=(n_cities, 2)), k=min(10, n_cities - 1))
+    for _ in range(50):
+        parent_a, parent_b = rng.permutation(n_cities), rng.permutation(n_cities)
+        child, delta = eax_crossover(parent_a, parent_b, graph, rng)
+        assert (np.sort(child) == np.arange(n_cities)).all()
+        lengths = graph.route_lengths(np.stack([parent_a, child]))
+        assert delta == pytest.approx(lengths[1] - lengths[0])
+
+
+def test_identical_parents_give_a_copy():
+    rng = np.random.default_rng(0)
+    graph = CandidateGraph(rng.uniform(0, 1000, size=(20, 2)), k=10)
+    parent = rng.permutation(20)
+    child, delta = eax_crossover(parent, parent[::-1].copy(), graph, rng)
+    assert (child == parent).all() and child is not parent
+    assert delta == 0.0
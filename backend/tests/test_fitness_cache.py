@@ -0,0 +1,67 @@
+"""Fitness memoization of app/core/fitness_cache.py."""
+import numpy as np
+
+from app.core.fitness_cache import FitnessCache, canonical_routes
+from app.core.optimizer import GeneticOptimizer
+
+
+def test_rotations_and_reversal_share_a_key():
+    tour = np.random.default_rng(0).permutation(12)
+    variants = [np.roll(tour, shift) for shift in range(12)]
+    variants += [variant[::-1] for variant in variants]
+    routes = np.array(variants)
+    canonical = canonical_routes(routes)
+    assert (canonical == canonical[0]).all()
+    assert canonical[0, 0] == 0 and canonical[0, 1] < canonical[0, -1]
+    assert len(set(FitnessCache(canonicalize_routes=True).keys(routes))) == 1
+
+
+def test_different_tours_keep_different_keys():
+    routes = np.array([[0, 1, 2, 3, 4], [0, 2, 1, 3, 4]])
+    keys = FitnessCache(canonicalize_routes=True).keys(routes)
+    assert keys[0] != keys[1]
+
+
+def test_canonical_routes_leaves_its_input_alone():
+    routes = np.array([[3, 2, 0, 1, 4]])
+    original = routes.copy()
+    canonical_routes(routes)
+    assert (routes == original).all()
+
+
+def test_lookup_marks_misses_with_nan():
+    cache = FitnessCache()
+    genomes = np.arange(12, dtype=np.float64).reshape(4, 3)
+    keys = cache.keys(genomes)
+    cache.store(keys[:2], np.array([1.5, -2.0]))
+    fitness, missing = cache.lookup(keys)
+    assert fitness[:2].tolist() == [1.5, -2.0]
+    assert np.isnan(fitness[2:]).all()
+    assert missing.tolist() == [False, False, True, True]
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_lru_eviction():
+    cache = FitnessCache(max_size=2)
+    keys = cache.keys(np.arange(3, dtype=np.float64).reshape(3, 1))
+    cache.store(keys[:2], np.array([0.0, 1.0]))
+    cache.lookup(keys[:1])
+    cache.store(keys[2:], np.array([2.0]))
+    fitness, missing = cache.lookup(keys)
+    assert missing.tolist() == [False, True, False]
+
+
+def test_cached_fitness_matches_scoring_with_duplicates():
+    optimizer = GeneticOptimizer({
+        'problem_type': 'function_optimization', 'population_size': 20, 'dimension': 5, 'seed': 0,
+        'fitness_cache_size': 64, 'parameters': {'function': {'objective': 'rastrigin'}},
+    })
+    # half the population repeats the other half, and a second call is all hits
+    optimizer.population[10:] = optimizer.population[:10]
+    expected = optimizer._score(optimizer.population)
+    first = optimizer._compute_fitness()
+    second = optimizer._compute_fitness()
+    assert not np.isnan(first).any()
+    assert (first == expected).all() and (second == expected).all()
+    assert len(optimizer.fitness_cache) == 10
+    assert optimizer.metrics.cache_hits == 20
@@ -0,0 +1,79 @@
+"""Real-valued objectives and operators of app/core/functions.py."""
+import numpy as np
+import pytest
+
+from app.core.functions import OBJECTIVES, FunctionProblem, register_objective
+from app.core.optimizer import GeneticOptimizer
+
+
+@pytest.mark.parametrize('name', sorted(OBJECTIVES))
+def test_objectives_score_every_row(name):
+    problem = FunctionProblem({'objective': name})
+    genes = problem.initialize(np.random.default_rng(0), 16, 5)
+    assert genes.shape == (16, 5)
+    assert ((genes >= problem.low) & (genes <= problem.high)).all()
+    values = problem.evaluate(genes)
+    assert values.shape == (16,) and values.dtype == np.float64
+
+
+@pytest.mark.parametrize('crossover', ['sbx', 'blend'])
+@pytest.mark.parametrize('mutation', ['polynomial', 'gaussian'])
+@pytest.mark.parametrize('dtype', ['float32', 'float64'])
+def test_operators_stay_within_bounds(crossover, mutation, dtype):
+    problem = FunctionProblem({'objective': 'sphere', 'crossover': crossover, 'mutation': mutation, 'dtype': dtype})
+    rng = np.random.default_rng(0)
+    parents1, parents2 = problem.initialize(rng, 50, 10), problem.initialize(rng, 50, 10)
+    children = problem.mutate(problem.crossover(parents1, parents2, rng), rng)
+    assert children.shape == (50, 10)
+    assert ((children >= problem.low) & (children <= problem.high)).all()
+
+
+@pytest.mark.parametrize('crossover', ['sbx', 'blend'])
+def test_optimizer_improves_on_sphere(crossover):
+    optimizer = GeneticOptimizer({
+        'problem_type': 'function_optimization', 'population_size': 50, 'dimension': 10, 'seed': 0,
+        'max_generations': 100, 'parameters': {'function': {'objective': 'sphere', 'crossover': crossover}},
+    })
+    first = optimizer.step('task')['best_fitness']
+    while not optimizer.finished:
+        last = optimizer.step('task')['best_fitness']
+    # the reported value is the objective, which sphere minimizes towards 0
+    assert 0 <= last < first / 10
+
+
+def test_unknown_objective():
+    with pytest.raises(ValueError):
+        FunctionProblem({'objective': 'no-such-function'})
+
+
+def test_register_objective_adds_an_objective():
+    @register_objective('test_shifted_sphere', (-1.0, 1.0))
+    def shifted_sphere(x):
+        return np.sum((x - 0.5) ** 2, axis=1)
+    try:
+        problem = FunctionProblem({'objective': 'test_shifted_sphere'})
+        assert (problem.low, problem.high) == (-1.0, 1.0)
+        assert problem.evaluate(np.full((1, 4), 0.5)).tolist() == [0.0]
+    finally:
+        del OBJECTIVES['test_shifted_sphere']
+
+
+@pytest.mark.parametrize('name, bounds', [
+    ('', (0, 1)),
+    (None, (0, 1)),
+    ('sphere', (0, 1)),
+    ('test_reversed', (1, 0)),
+    ('test_empty', (1, 1)),
+    ('test_single', (1,)),
+    ('test_text', ('low', 'high')),
+])
+def test_register_objective_rejects_bad_input(name, bounds):
+    with pytest.raises(ValueError):
+        register_objective(name, bounds)
+    assert name not in OBJECTIVES or name == 'sphere'
+
+
+def test_register_objective_rejects_non_callables():
+    with pytest.raises(ValueError):
+        register_objective('test_not_callable', (0, 1))(42)
+    assert 'test_not_callable' not in OBJECTIVES
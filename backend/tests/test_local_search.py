@@ -0,0 +1,60 @@
+"""2-opt and Or-opt moves of app/core/local_search.py."""
+import time
+
+import numpy as np
+import pytest
+
+from app.core.candidates import CandidateGraph
+from app.core.local_search import LocalSearch
+
+MOVES = [(True, False), (False, True), (True, True)]
+
+
+def tour_length(distance_matrix: np.ndarray, tour: np.ndarray) -> float:
+    return float(distance_matrix[tour, np.roll(tour, -1)].sum())
+
+
+@pytest.fixture
+def cities():
+    return np.random.default_rng(0).uniform(0, 1000, size=(60, 2))
+
+
+@pytest.fixture
+def distance_matrix(cities):
+    return np.sqrt(((cities[:, np.newaxis] - cities[np.newaxis]) ** 2).sum(axis=-1))
+
+
+@pytest.mark.parametrize('two_opt, or_opt', MOVES)
+def test_improve_returns_a_shorter_permutation_and_its_delta(distance_matrix, two_opt, or_opt):
+    local_search = LocalSearch(distance_matrix, two_opt=two_opt, or_opt=or_opt)
+    rng = np.random.default_rng(1)
+    for _ in range(10):
+        tour = rng.permutation(len(distance_matrix))
+        improved, delta = local_search.improve(tour, time.perf_counter() + 10)
+        assert (np.sort(improved) == np.arange(len(distance_matrix))).all()
+        assert delta <= 0
+        assert tour_length(distance_matrix, improved) <= tour_length(distance_matrix, tour)
+        assert delta == pytest.approx(tour_length(distance_matrix, improved) - tour_length(distance_matrix, tour))
+
+
+def test_improve_with_candidate_graph_matches_rescore(cities, distance_matrix):
+    local_search = LocalSearch(None, candidates=CandidateGraph(cities, 10))
+    tour = np.random.default_rng(2).permutation(len(cities))
+    improved, delta = local_search.improve(tour, time.perf_counter() + 10)
+    assert (np.sort(improved) == np.arange(len(cities))).all()
+    assert delta == pytest.approx(tour_length(distance_matrix, improved) - tour_length(distance_matrix, tour))
+
+
+def test_improve_leaves_a_local_optimum_alone(distance_matrix):
+    local_search = LocalSearch(distance_matrix)
+    tour, _ = local_search.improve(np.random.default_rng(3).permutation(len(distance_matrix)),
+                                   time.perf_counter() + 10)
+    again, delta = local_search.improve(tour, time.perf_counter() + 10)
+    assert delta == 0
+    assert (again == tour).all()
+
+
+def test_short_tours_are_returned_unchanged(distance_matrix):
+    tour = np.arange(4)
+    improved, delta = LocalSearch(distance_matrix[:4, :4]).improve(tour, time.perf_counter() + 1)
+    assert improved is tour and delta == 0
@@ -0,0 +1,64 @@
+"""Invariants of the batched operators in app/core/operators.py."""
+import numpy as np
+import pytest
+
+from app.core.operators import order_crossover, random_cut_points, segment_mask, two_point_crossover
+from benchmarks.bench_crossover import legacy_order_crossover, random_parents
+
+POPULATION_SIZES = [10, 100, 1000]
+DIMENSIONS = [2, 10, 50, 100]
+TRIALS = 5
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.mark.parametrize('dimension', DIMENSIONS)
+def test_cut_points_are_distinct_sorted_and_in_range(rng, dimension):
+    cut_points = random_cut_points(rng, 1000, dimension)
+    assert cut_points.shape == (1000, 2)
+    assert (cut_points[:, 0] < cut_points[:, 1]).all()
+    assert (cut_points >= 0).all() and (cut_points < dimension).all()
+
+
+@pytest.mark.parametrize('population_size', POPULATION_SIZES)
+@pytest.mark.parametrize('dimension', DIMENSIONS)
+def test_order_crossover_children_are_permutations(rng, population_size, dimension):
+    for _ in range(TRIALS):
+        parents1 = random_parents(rng, population_size, dimension)
+        parents2 = random_parents(rng, population_size, dimension)
+        offspring = order_crossover(parents1, parents2, random_cut_points(rng, population_size, dimension))
+        assert (np.sort(offspring, axis=1) == np.arange(dimension)).all()
+
+
+@pytest.mark.parametrize('population_size', POPULATION_SIZES)
+@pytest.mark.parametrize('dimension', DIMENSIONS)
+def test_order_crossover_matches_reference_loop(rng, population_size, dimension):
+    for _ in range(TRIALS):
+        parents1 = random_parents(rng, population_size, dimension)
+        parents2 = random_parents(rng, population_size, dimension)
+        cut_points = random_cut_points(rng, population_size, dimension)
+        offspring = order_crossover(parents1, parents2, cut_points)
+        assert (offspring == legacy_order_crossover(parents1, parents2, cut_points)).all()
+
+
+@pytest.mark.parametrize('dimension', DIMENSIONS)
+def test_order_crossover_keeps_parent1_segment(rng, dimension):
+    parents1 = random_parents(rng, 100, dimension)
+    parents2 = random_parents(rng, 100, dimension)
+    cut_points = random_cut_points(rng, 100, dimension)
+    in_segment = segment_mask(cut_points, dimension)
+    offspring = order_crossover(parents1, parents2, cut_points)
+    assert (offspring[in_segment] == parents1[in_segment]).all()
+
+
+def test_two_point_crossover_takes_each_gene_from_one_parent(rng):
+    parents1 = random_parents(rng, 100, 20)
+    parents2 = random_parents(rng, 100, 20)
+    cut_points = random_cut_points(rng, 100, 20)
+    in_segment = segment_mask(cut_points, 20)
+    offspring = two_point_crossover(parents1, parents2, cut_points)
+    assert (offspring[in_segment] == parents1[in_segment]).all()
+    assert (offspring[~in_segment] == parents2[~in_segment]).all()
@@ -0,0 +1,117 @@
+"""Content-addressed result cache of app/core/result_cache.py and its use in TaskManager."""
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.result_cache import ResultCache, cacheable, request_key
+from app.core.task_manager import TaskManager
+
+CITIES = np.random.default_rng(0).uniform(0, 1000, size=(15, 2)).tolist()
+
+
+def tsp_request(**extra) -> dict:
+    return dict({'problem_type': 'tsp', 'population_size': 20, 'dimension': 15, 'max_generations': 20,
+                 'mutation_rate': 0.1, 'seed': 3, 'parameters': {'cities': CITIES, 'seeding': {'fraction': 0.2}}},
+                **extra)
+
+
+def test_request_key_ignores_key_order_and_delivery_settings():
+    request = tsp_request()
+    reordered = {key: request[key] for key in reversed(list(request))}
+    reordered['parameters'] = {'seeding': {'fraction': 0.2}, 'cities': CITIES}
+    assert request_key(reordered) == request_key(request)
+    delivery = tsp_request(priority=5, cache='warm_start', task_id='other')
+    delivery['parameters']['updates'] = {'mode': 'headless'}
+    assert request_key(delivery) == request_key(request)
+
+
+def test_request_key_hashes_coordinates_as_floats():
+    integers = tsp_request()
+    integers['parameters'] = {'cities': [[1, 2], [3, 4]]}
+    floats = tsp_request()
+    floats['parameters'] = {'cities': [[1.0, 2.0], [3.0, 4.0]]}
+    assert request_key(integers) == request_key(floats)
+
+
+def test_request_key_changes_with_the_problem():
+    moved = tsp_request()
+    moved['parameters'] = dict(moved['parameters'], cities=CITIES[1:] + CITIES[:1])
+    assert request_key(moved) != request_key(tsp_request())
+    assert request_key(tsp_request(seed=4)) != request_key(tsp_request())
+
+
+def test_browser_scored_runs_are_not_cacheable():
+    assert cacheable(tsp_request())
+    assert not cacheable({'problem_type': 'GPA', 'parameters': {}})
+    assert cacheable({'problem_type': 'GPA', 'parameters': {'gpa_evaluator': {'mode': 'simulator'}}})
+
+
+def test_entries_keep_the_better_result_and_persist(tmp_path):
+    async def main():
+        cache = ResultCache(directory=str(tmp_path))
+        update = {'generation': 9, 'best_fitness': 100.0, 'best_solution': np.arange(5)}
+        await cache.put('key', update, np.zeros((2, 5)), minimize=True)
+        await cache.put('key', dict(update, best_fitness=120.0), np.zeros((2, 5)), minimize=True)
+        assert (await cache.get('key')).update['best_fitness'] == 100.0
+        reloaded = await ResultCache(directory=str(tmp_path)).get('key')
+        assert reloaded.update['best_fitness'] == 100.0
+        assert (reloaded.update['best_solution'] == np.arange(5)).all()
+    asyncio.run(main())
+
+
+def test_expired_entries_are_dropped():
+    async def main():
+        cache = ResultCache(ttl=0.0)
+        await cache.put('key', {'best_fitness': 1.0}, np.zeros((1, 3)), minimize=True)
+        await asyncio.sleep(0.01)
+        assert await cache.get('key') is None
+    asyncio.run(main())
+
+
+async def finish(manager: TaskManager, task_id: str) -> None:
+    await manager._runs[task_id]
+    # the result is stored by the run's close callback
+    await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize('mode', ['reuse', 'warm_start', 'off'])
+def test_cache_modes(mode):
+    async def main():
+        manager = TaskManager(max_workers=0)
+        first, outcome = await manager.create_task(tsp_request())
+        assert outcome is None
+        second, outcome = await manager.create_task(tsp_request(cache=mode))
+        if mode == 'off':
+            assert second != first and outcome is None
+        else:
+            assert (second, outcome) == (first, 'attached')
+        await finish(manager, first)
+        await manager.remove_task(first)
+
+        task_id, outcome = await manager.create_task(tsp_request(cache=mode))
+        cache = manager.result_cache
+        if mode == 'reuse':
+            assert outcome == 'hit' and cache.hits == 1
+            assert manager.task_status(task_id)['status'] == 'completed'
+            entry = await cache.get(request_key(tsp_request()))
+            assert manager.task_results[task_id].latest['best_fitness'] == entry.update['best_fitness']
+        elif mode == 'warm_start':
+            assert outcome == 'warm_start' and cache.warm_starts == 1
+            assert manager.task_status(task_id)['status'] in ('running', 'queued')
+        else:
+            assert outcome is None and cache.hits == cache.warm_starts == 0
+        await manager.shutdown()
+    asyncio.run(main())
+
+
+def test_interrupted_tasks_are_not_attached_to():
+    async def main():
+        manager = TaskManager(max_workers=0)
+        first, _ = await manager.create_task(tsp_request(max_generations=1000))
+        manager._runs[first].cancel()
+        manager.interrupt_task(first)
+        second, outcome = await manager.create_task(tsp_request(max_generations=1000))
+        assert second != first and outcome is None
+        await manager.shutdown()
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""Shared per-task update history of app/core/results.py."""
+import asyncio
+
+from app.core.results import TaskResults
+
+
+def update(generation: int) -> dict:
+    return {'generation': generation, 'best_fitness': -float(generation)}
+
+
+def generations(updates) -> list:
+    return [update_data['generation'] for update_data in updates]
+
+
+def test_ring_buffer_keeps_the_latest_generations():
+    results = TaskResults(maxlen=5)
+    for generation in range(12):
+        results.publish(update(generation))
+    assert generations(results.updates) == [7, 8, 9, 10, 11]
+    assert results.latest['generation'] == 11
+
+
+def test_since_replays_from_a_generation():
+    results = TaskResults(maxlen=5)
+    assert results.since(0) == []
+    for generation in range(12):
+        results.publish(update(generation))
+    assert generations(results.since(9)) == [9, 10, 11]
+    assert generations(results.since(8, limit=2)) == [8, 9]
+    # evicted generations are skipped, replay starts at the oldest one kept
+    assert generations(results.since(0)) == [7, 8, 9, 10, 11]
+    assert results.since(12) == []
+
+
+def test_subscribers_replay_then_follow_live_updates():
+    async def main():
+        results = TaskResults(maxlen=100)
+        for generation in range(5):
+            results.publish(update(generation))
+
+        async def collect(from_generation):
+            return generations([update_data async for update_data in results.subscribe(from_generation)])
+
+        late, early = asyncio.ensure_future(collect(3)), asyncio.ensure_future(collect(0))
+        for generation in range(5, 8):
+            await asyncio.sleep(0)
+            results.publish(update(generation))
+        await results.close()
+        assert await late == [3, 4, 5, 6, 7]
+        assert await early == list(range(8))
+    asyncio.run(main())
+
+
+def test_subscribe_to_a_failed_run_ends():
+    async def main():
+        results = TaskResults()
+        results.publish(update(0))
+        results.fail("worker died")
+        assert generations([update_data async for update_data in results.subscribe()]) == [0]
+        assert results.error == "worker died"
+        results.reopen()
+        assert results.error is None and not results.finished
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""Slot limits and priority order of app/core/scheduler.py."""
+import asyncio
+
+import pytest
+
+from app.core.scheduler import Scheduler, scheduled
+
+
+async def hold_turn(scheduler: Scheduler, task_id: str, release: asyncio.Event, order: list, cost: int = 1):
+    async with scheduler.turn(task_id, cost):
+        order.append(task_id)
+        await release.wait()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_turns_never_exceed_the_slots():
+    async def main():
+        scheduler = Scheduler(2)
+        active, peak = 0, 0
+
+        async def work(task_id):
+            nonlocal active, peak
+            async with scheduler.turn(task_id):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.001)
+                active -= 1
+
+        await asyncio.gather(*(work(f'task-{i}') for i in range(8)))
+        assert peak == 2
+        assert scheduler.free == 2 and not scheduler.running
+    asyncio.run(main())
+
+
+def test_waiting_turns_start_by_priority_then_fifo():
+    async def main():
+        scheduler = Scheduler(1)
+        for task_id, priority in (('blocker', 0), ('low', 0), ('high', 5), ('mid', 2), ('high-2', 5)):
+            scheduler.register(task_id, priority)
+        release, order = asyncio.Event(), []
+        blocker = asyncio.ensure_future(hold_turn(scheduler, 'blocker', release, order))
+        await settle()
+        names = ('low', 'high', 'mid', 'high-2')
+        releases = {task_id: asyncio.Event() for task_id in names}
+        waiters = []
+        for task_id in names:
+            waiters.append(asyncio.ensure_future(hold_turn(scheduler, task_id, releases[task_id], order)))
+            await settle()
+        assert scheduler.waiting == 4
+        assert scheduler.position('high') == 0 and scheduler.position('low') == 3
+        release.set()
+        await blocker
+        # each waiter holds the only slot until released, so they start one at a time
+        for expected in ('high', 'high-2', 'mid', 'low'):
+            await settle()
+            assert order[-1] == expected
+            releases[expected].set()
+        await asyncio.gather(*waiters)
+        assert order == ['blocker', 'high', 'high-2', 'mid', 'low']
+    asyncio.run(main())
+
+
+def test_a_wide_turn_is_not_overtaken():
+    async def main():
+        scheduler = Scheduler(2)
+        release, order = asyncio.Event(), []
+        first = asyncio.ensure_future(hold_turn(scheduler, 'first', release, order))
+        await settle()
+        wide = asyncio.ensure_future(hold_turn(scheduler, 'wide', release, order, cost=2))
+        await settle()
+        narrow = asyncio.ensure_future(hold_turn(scheduler, 'narrow', release, order))
+        await settle()
+        # one slot is free, but the two-slot turn at the head of the queue keeps it
+        assert order == ['first'] and scheduler.free == 1
+        release.set()
+        await asyncio.gather(first, wide, narrow)
+        assert order == ['first', 'wide', 'narrow']
+    asyncio.run(main())
+
+
+def test_unregister_cancels_waiting_turns():
+    async def main():
+        scheduler = Scheduler(1)
+        release, order = asyncio.Event(), []
+        holder = asyncio.ensure_future(hold_turn(scheduler, 'holder', release, order))
+        await settle()
+        waiter = asyncio.ensure_future(hold_turn(scheduler, 'waiter', release, order))
+        await settle()
+        scheduler.unregister('waiter')
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.waiting == 0
+        release.set()
+        await holder
+        assert order == ['holder'] and scheduler.free == 1
+    asyncio.run(main())
+
+
+def test_scheduled_without_a_scheduler_runs_immediately():
+    async def main():
+        async with scheduled(None, 'task'):
+            return True
+    assert asyncio.run(main())
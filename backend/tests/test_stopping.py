@@ -0,0 +1,92 @@
+"""Stop criteria and stagnation escapes of app/core/stopping.py."""
+import numpy as np
+import pytest
+
+from app.core.optimizer import GeneticOptimizer
+from app.core.stopping import StoppingCriteria
+
+
+def observe_all(criteria: StoppingCriteria, best_values, diversity: float = 1.0, seconds: float = 0.01):
+    """Reason returned for each observed best value."""
+    return [criteria.observe(best, diversity, seconds) for best in best_values]
+
+
+def test_without_criteria_a_run_never_stops_early():
+    assert observe_all(StoppingCriteria({}), [5.0] * 100) == [None] * 100
+
+
+@pytest.mark.parametrize('minimize, values', [(True, [10.0, 8.0, 5.0]), (False, [-10.0, -8.0, -5.0])])
+def test_target_fitness(minimize, values):
+    target = 5.0 if minimize else -5.0
+    assert observe_all(StoppingCriteria({'target_fitness': target}, minimize), values) == [None, None, 'target_reached']
+
+
+def test_stagnation_counts_generations_without_enough_improvement():
+    criteria = StoppingCriteria({'stagnation': 3, 'min_improvement': 0.5}, minimize=True)
+    # 9.9 and 7.9 onwards improve by less than min_improvement, 8.0 resets the count
+    assert observe_all(criteria, [10.0, 9.9, 8.0, 7.9, 7.8, 7.7]) == [None, None, None, None, None, 'stagnation']
+
+
+def test_min_diversity():
+    criteria = StoppingCriteria({'min_diversity': 0.1})
+    assert criteria.observe(1.0, 0.5, 0.01) is None
+    assert criteria.observe(2.0, 0.1, 0.01) == 'converged'
+
+
+def test_time_limit_counts_computation_seconds():
+    criteria = StoppingCriteria({'time_limit': 1.0})
+    assert observe_all(criteria, [1.0, 2.0, 3.0], seconds=0.4) == [None, None, 'time_limit']
+
+
+def test_on_stagnation_stop():
+    assert StoppingCriteria({'stagnation': 2}).escape() is None
+
+
+@pytest.mark.parametrize('action', ['restart', 'hypermutate'])
+def test_on_stagnation_escapes_up_to_max_restarts(action):
+    criteria = StoppingCriteria({'stagnation': 2, 'on_stagnation': action, 'max_restarts': 2})
+    assert observe_all(criteria, [1.0, 1.0, 1.0]) == [None, None, 'stagnation']
+    assert criteria.escape() == action and criteria.stagnant == 0
+    assert criteria.escape() == action
+    assert criteria.escape() is None
+    assert criteria.restarts == 2
+
+
+def test_unknown_stagnation_action():
+    with pytest.raises(ValueError):
+        StoppingCriteria({'on_stagnation': 'panic'})
+
+
+def test_state_round_trip():
+    criteria = StoppingCriteria({'stagnation': 5}, minimize=True)
+    observe_all(criteria, [3.0, 2.0, 2.0])
+    restored = StoppingCriteria({'stagnation': 5}, minimize=True)
+    restored.load(criteria.state())
+    assert restored.state() == criteria.state()
+
+
+def run(stopping: dict, max_generations: int = 200) -> GeneticOptimizer:
+    cities = np.random.default_rng(0).uniform(0, 1000, size=(12, 2)).tolist()
+    optimizer = GeneticOptimizer({
+        'problem_type': 'tsp', 'population_size': 20, 'dimension': 12, 'max_generations': max_generations,
+        'seed': 1, 'parameters': {'cities': cities, 'stopping': stopping},
+    })
+    while not optimizer.finished:
+        update_data = optimizer.step('task')
+    assert update_data['stop_reason'] == optimizer.stop_reason
+    return optimizer
+
+
+def test_runs_report_their_stop_reason():
+    assert run({}, max_generations=5).stop_reason == 'max_generations'
+    assert run({'stagnation': 10}).stop_reason == 'stagnation'
+    assert run({'target_fitness': 1e9}).generation == 1
+
+
+@pytest.mark.parametrize('action', ['restart', 'hypermutate'])
+def test_runs_escape_stagnation_and_keep_their_best(action):
+    optimizer = run({'stagnation': 10, 'on_stagnation': action, 'max_restarts': 2})
+    assert optimizer.stopping.restarts == 2
+    assert optimizer.stop_reason == 'stagnation'
+    # the escapes keep the best tour, so the reported best is still a real tour's length
+    assert optimizer.best_fitness == pytest.approx(-optimizer._route_lengths(optimizer.best_solution[np.newaxis])[0])
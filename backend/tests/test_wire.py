@@ -0,0 +1,74 @@
+"""Binary update frames of app/core/wire.py."""
+import uuid
+
+import numpy as np
+import pytest
+
+from app.core.wire import FLAG_DELTA, FLAG_WIDE, BinaryUpdateEncoder, _HEADER, _UPDATE, decode_update
+
+TASK_ID = str(uuid.UUID(int=12345))
+
+
+def make_update(solution, generation=0, **extra) -> dict:
+    return dict({'task_id': TASK_ID, 'generation': generation, 'best_fitness': -1234.5,
+                 'average_fitness': -1500.25, 'population_diversity': 0.125, 'status': 'running',
+                 'best_solution': solution}, **extra)
+
+
+def flags(frame: bytes) -> int:
+    return _UPDATE.unpack_from(frame, _HEADER.size)[6]
+
+
+def assert_round_trip(update_data: dict, decoded: dict) -> None:
+    for key in ('task_id', 'generation', 'best_fitness', 'average_fitness', 'population_diversity', 'status'):
+        assert decoded[key] == update_data[key]
+    assert decoded.get('stop_reason') == update_data.get('stop_reason')
+
+
+@pytest.mark.parametrize('n_cities', [10, 40_000])
+def test_route_frames_round_trip_with_deltas(n_cities):
+    rng = np.random.default_rng(0)
+    encoder = BinaryUpdateEncoder()
+    route = rng.permutation(n_cities)
+    previous = None
+    for generation in range(5):
+        if generation:
+            # a 2-opt style change touches a few positions, so the frame is a delta
+            i, j = sorted(rng.choice(n_cities, size=2, replace=False))
+            route = route.copy()
+            route[i:j + 1] = route[i:j + 1][::-1]
+        update_data = make_update(route, generation)
+        frame = encoder.encode(update_data)
+        assert bool(flags(frame) & FLAG_WIDE) == (n_cities > np.iinfo(np.int16).max)
+        decoded = decode_update(frame, previous)
+        assert_round_trip(update_data, decoded)
+        assert (decoded['best_solution'] == route).all()
+        previous = decoded['best_solution']
+    assert flags(frame) & FLAG_DELTA
+
+
+def test_delta_frame_needs_the_previous_solution():
+    encoder = BinaryUpdateEncoder()
+    route = np.arange(100)
+    encoder.encode(make_update(route))
+    frame = encoder.encode(make_update(np.roll(route[:4], 1).tolist() + route[4:].tolist()))
+    assert flags(frame) & FLAG_DELTA
+    with pytest.raises(ValueError):
+        decode_update(frame)
+
+
+def test_real_solution_and_stop_reason_round_trip():
+    solution = np.random.default_rng(0).uniform(-5, 5, size=30)
+    update_data = make_update(solution, 99, status='completed', stop_reason='stagnation')
+    decoded = decode_update(BinaryUpdateEncoder().encode(update_data))
+    assert_round_trip(update_data, decoded)
+    assert (decoded['best_solution'] == solution).all()
+
+
+def test_action_solution_round_trip():
+    dtype = np.dtype([('action', 'U5'), ('duration', 'f8')])
+    solution = np.array([('left', 0.5), ('jump', 1.25), ('right', 2.0), ('pause', 0.75)], dtype=dtype)
+    update_data = make_update(solution)
+    decoded = decode_update(BinaryUpdateEncoder().encode(update_data))
+    assert_round_trip(update_data, decoded)
+    assert decoded['best_solution'] == [('left', 0.5), ('jump', 1.25), ('right', 2.0), ('pause', 0.75)]